@@ -0,0 +1,128 @@
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import numpy as np
+
+"""
+Planning benchmark suite over the lab5 and lab6 mazes.
+
+    python benchmarks/run.py run [num_seeds] [out_file]
+        runs lab5/controllers/rrt_controller/benchmark.py (every planner and
+        sampler on maze1-3) and lab6/controllers/exploration_controller/benchmark.py
+        (Grid.rrt and Grid.plan on maze1-3), each in its own directory and process since the
+        labs have modules of the same names, and writes all their records to
+        out_file (benchmark_results.json by default)
+
+    python benchmarks/run.py compare baseline_file current_file [tolerance]
+        compares two result files per lab, map, planner and sampler, and exits
+        with status 1 if any metric got worse by more than tolerance (0.1, i.e.
+        10%, by default) or fewer seeds were solved
+
+A record holds, for one planner run: solved, time_to_first_solution, time
+(seconds), nodes (tree size, or cells expanded for A*), collision_checks (segments checked against the
+obstacles, smoothing included), path_length and smoothed_length (before and
+after smoothing) and peak_memory (bytes, traced).
+"""
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SUITES = [os.path.join(ROOT, 'lab5', 'controllers', 'rrt_controller'),
+          os.path.join(ROOT, 'lab6', 'controllers', 'exploration_controller')]
+
+# compared as the median over the solved seeds, lower is better
+METRICS = ['time_to_first_solution', 'time', 'nodes', 'collision_checks', 'path_length', 'smoothed_length',
+           'peak_memory']
+
+
+def run_suite(directory, num_seeds) -> dict:
+    """
+    Run the benchmark.py of a lab and return its parsed JSON output.
+    """
+    args = [sys.executable, 'benchmark.py']
+    if os.path.basename(directory) == 'rrt_controller':
+        args.append('json')
+    output = subprocess.run(args + [str(num_seeds)], cwd=directory, stdout=subprocess.PIPE, check=True).stdout
+    return json.loads(output)
+
+
+def run(num_seeds, out_file):
+    records = []
+    for directory in SUITES:
+        start = time.perf_counter()
+        result = run_suite(directory, num_seeds)
+        for record in result['records']:
+            record['lab'] = result['lab']
+        records.extend(result['records'])
+        print('%s: %d records, %.1f s' % (result['lab'], len(result['records']), time.perf_counter() - start))
+    results = {'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': platform.python_version(),
+               'machine': platform.machine(), 'num_seeds': num_seeds, 'records': records}
+    with open(out_file, 'w') as f:
+        json.dump(results, f, indent=1)
+    print('wrote %s' % out_file)
+
+
+def summarize(records) -> dict:
+    """
+    Group records by (lab, map, planner, sampler).
+
+    Returns:
+        dict of group -> {'runs': number of runs, 'solved': number solved, metric: median over the solved runs}
+    """
+    groups = {}
+    for record in records:
+        key = (record['lab'], record['map'], record['planner'], record['sampler'])
+        groups.setdefault(key, []).append(record)
+    summary = {}
+    for key, group in groups.items():
+        solved = [record for record in group if record['solved']]
+        summary[key] = {'runs': len(group), 'solved': len(solved)}
+        for metric in METRICS:
+            values = [record[metric] for record in solved if record.get(metric) is not None]
+            summary[key][metric] = float(np.median(values)) if values else None
+    return summary
+
+
+def compare(baseline_file, current_file, tolerance) -> bool:
+    """
+    Print the change of every metric and return whether anything regressed.
+    """
+    with open(baseline_file) as f:
+        baseline = summarize(json.load(f)['records'])
+    with open(current_file) as f:
+        current = summarize(json.load(f)['records'])
+    regressed = False
+    for key in sorted(set(baseline) | set(current)):
+        name = ' '.join(key)
+        if key not in baseline or key not in current:
+            print('%s: only in %s' % (name, baseline_file if key in baseline else current_file))
+            continue
+        old, new = baseline[key], current[key]
+        changes = []
+        if new['solved'] * old['runs'] < old['solved'] * new['runs']:
+            changes.append('REGRESSION solved %d/%d -> %d/%d' % (old['solved'], old['runs'], new['solved'], new['runs']))
+            regressed = True
+        for metric in METRICS:
+            if old[metric] is None or new[metric] is None:
+                continue
+            change = (new[metric] - old[metric]) / old[metric] if old[metric] > 0 else 0.
+            if change > tolerance:
+                changes.append('REGRESSION %s %+.1f%%' % (metric, 100 * change))
+                regressed = True
+            elif change < -tolerance:
+                changes.append('%s %+.1f%%' % (metric, 100 * change))
+        print('%s: %s' % (name, ', '.join(changes) if changes else 'unchanged'))
+    return regressed
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    command = args.pop(0) if args and args[0] in ('run', 'compare') else 'run'
+    if command == 'run':
+        run(int(args[0]) if len(args) > 0 else 5, args[1] if len(args) > 1 else 'benchmark_results.json')
+    else:
+        if len(args) < 2:
+            print('usage: python benchmarks/run.py compare baseline_file current_file [tolerance]')
+            sys.exit(2)
+        sys.exit(1 if compare(args[0], args[1], float(args[2]) if len(args) > 2 else 0.1) else 0)
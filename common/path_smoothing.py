@@ -0,0 +1,206 @@
+import time
+import numpy as np
+
+"""
+Path post-processing shared by the RRT planners.
+
+A path is a sequence of 2D points whose consecutive segments are known to be
+collision free. Shortcutting keeps a subsequence of the points such that every
+new segment is collision free as well; it only needs a batched collision test
+
+    segments_collide(starts, ends) -> bool array
+
+taking arrays of shape (B, 2), so the candidate shortcuts are checked in a few
+calls instead of one call per pair. Modes:
+
+    greedy   -- from each kept point jump to the furthest visible one
+    shortest -- the shortest visible subsequence, by dynamic programming over
+                the visibility of all pairs
+    random   -- random shortcut trials on the current path
+
+Corner cutting (Chaikin) can then round off the remaining corners; a cut is
+only kept where its segment is collision free.
+"""
+
+
+def path_length(points) -> float:
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    return float(np.sum(np.hypot(*np.diff(points, axis=0).T)))
+
+
+def visibility(points, segments_collide) -> np.ndarray:
+    """
+    Visibility between all pairs of path points.
+
+    Returns:
+        bool array of shape (N, N), entry [i, j] with i < j is True if the
+        segment from point i to point j is collision free. Consecutive points
+        are taken as visible without a check.
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    n = len(points)
+    visible = np.zeros((n, n), dtype=bool)
+    i, j = np.triu_indices(n, k=2)
+    if len(i) > 0:
+        visible[i, j] = ~np.asarray(segments_collide(points[i], points[j]), dtype=bool)
+    visible[np.arange(n - 1), np.arange(1, n)] = True
+    return visible
+
+
+def greedy_shortcut(points, segments_collide) -> "list[int]":
+    """
+    From each kept point jump to the furthest visible point, or the next one.
+    Only the rows of the kept points are checked, one batch per kept point.
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    n = len(points)
+    if n == 0:
+        return []
+    indices = [0]
+    i = 0
+    while i < n - 1:
+        j = i + 1
+        candidates = points[i + 2:]
+        if len(candidates) > 0:
+            collisions = np.asarray(segments_collide(np.repeat(points[i:i + 1], len(candidates), axis=0),
+                                                     candidates), dtype=bool)
+            free = np.flatnonzero(~collisions)
+            if len(free) > 0:
+                j = i + 2 + int(free[-1])
+        indices.append(j)
+        i = j
+    return indices
+
+
+def shortest_shortcut(points, segments_collide) -> "list[int]":
+    """
+    Shortest subsequence of the path from the first to the last point whose
+    segments are all collision free.
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    n = len(points)
+    if n == 0:
+        return []
+    visible = visibility(points, segments_collide)
+    dist = np.hypot(points[:, None, 0] - points[None, :, 0], points[:, None, 1] - points[None, :, 1])
+    cost = np.full(n, np.inf)
+    cost[0] = 0.
+    previous = np.zeros(n, dtype=int)
+    for j in range(1, n):
+        # the points are in path order, so every predecessor is settled
+        candidates = np.where(visible[:j, j], cost[:j] + dist[:j, j], np.inf)
+        previous[j] = int(np.argmin(candidates))
+        cost[j] = candidates[previous[j]]
+    indices = [n - 1]
+    while indices[-1] != 0:
+        indices.append(int(previous[indices[-1]]))
+    return indices[::-1]
+
+
+def random_shortcut(points, segments_collide, trials=100) -> "list[int]":
+    """
+    Random shortcut trials: pick two points of the current path and drop the
+    ones between them if they see each other. Draws from np.random, with the
+    same calls as the loop this replaces, so seeded runs do not change.
+    """
+    visible = visibility(points, segments_collide)
+    indices = list(range(len(visible)))
+    if len(indices) == 0:
+        return indices
+    for _ in range(trials):
+        plen = len(indices)
+        picks = [np.random.randint(0, plen), np.random.randint(0, plen)]
+        picks.sort()
+        if picks[1] - picks[0] > 1 and visible[indices[picks[0]], indices[picks[1]]]:
+            indices = indices[:picks[0] + 1] + indices[picks[1]:]
+    return indices
+
+
+SHORTCUT_MODES = {'greedy': greedy_shortcut, 'shortest': shortest_shortcut, 'random': random_shortcut}
+
+
+def chaikin(points, segments_collide, iterations=2, ratio=0.25) -> np.ndarray:
+    """
+    Chaikin corner cutting with fixed end points. Every interior corner p is
+    replaced by the two points at ratio along its segments. Corners whose new
+    segments collide are kept as they are, and an iteration that cannot be
+    made collision free that way is dropped.
+
+    Returns:
+        np.ndarray of shape (M, 2)
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    for _ in range(iterations):
+        if len(points) < 3:
+            break
+        corners = points[1:-1]
+        before = corners + ratio * (points[:-2] - corners)
+        after = corners + ratio * (points[2:] - corners)
+        keep = np.asarray(segments_collide(before, after), dtype=bool)
+        while True:
+            # owner[m] is the corner new point m comes from, -1 for the end points
+            new_points, owner = [points[0]], [-1]
+            for k in range(len(corners)):
+                new_points.append(before[k])
+                if keep[k]:
+                    new_points.append(corners[k])
+                new_points.append(after[k])
+                owner.extend([k] * (3 if keep[k] else 2))
+            new_points.append(points[-1])
+            owner.append(-1)
+            new_points = np.array(new_points)
+            collisions = np.flatnonzero(np.asarray(segments_collide(new_points[:-1], new_points[1:]), dtype=bool))
+            culprits = set(owner[m] for m in collisions) | set(owner[m + 1] for m in collisions)
+            culprits = [k for k in culprits if k >= 0 and not keep[k]]
+            if len(collisions) == 0 or len(culprits) == 0:
+                break
+            keep[culprits] = True
+        if len(collisions) > 0:
+            break
+        points = new_points
+    return points
+
+
+class SmoothedPath:
+    """
+    Result of smooth_path.
+
+    Attributes:
+        indices: indices of the kept input points, in order
+        points: np.ndarray of shape (M, 2), the smoothed path; the kept input
+            points unless corner cutting added new ones
+        original_length, length: path lengths before and after smoothing
+        time: seconds spent smoothing
+    """
+
+    def __init__(self, indices, points, original_length, length, time):
+        self.indices = indices
+        self.points = points
+        self.original_length = original_length
+        self.length = length
+        self.time = time
+
+    def __repr__(self):
+        return 'SmoothedPath(%d points, length %.3f -> %.3f, %.2f ms)' % (
+            len(self.points), self.original_length, self.length, self.time * 1000)
+
+
+def smooth_path(points, segments_collide, mode='greedy', chaikin_iterations=0, **kwargs) -> SmoothedPath:
+    """
+    Shortcut a path and optionally round its corners.
+
+    Arguments:
+        points: sequence of (x, y), the path
+        segments_collide: batched collision test, see the module docstring
+        mode: 'greedy', 'shortest' or 'random', see SHORTCUT_MODES
+        chaikin_iterations: rounds of corner cutting after shortcutting, 0 for none
+        kwargs: passed on to the shortcut function, e.g. trials for 'random'
+    """
+    start = time.perf_counter()
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    indices = SHORTCUT_MODES[mode](points, segments_collide, **kwargs)
+    smoothed = points[indices]
+    if chaikin_iterations > 0:
+        smoothed = chaikin(smoothed, segments_collide, chaikin_iterations)
+    elapsed = time.perf_counter() - start
+    return SmoothedPath(indices, smoothed, path_length(points), path_length(smoothed), elapsed)
@@ -0,0 +1,162 @@
+import heapq
+import math
+
+"""
+Incremental nearest neighbour index over 2D points, for growing RRT trees.
+
+Points are bucketed into a uniform grid of square cells. A query visits the cells
+in rings of growing Chebyshev distance around the query cell and stops as soon
+as no unvisited cell can hold anything closer than what was found, so with a
+cell size close to the typical point spacing a query only looks at a handful of
+cells regardless of how many points are stored. Small sets, where walking the
+rings would cost more than looking at every point, are scanned directly.
+"""
+
+
+class PointIndex:
+    # below this many points nearest() scans all of them instead of walking rings
+    LINEAR_SCAN_SIZE = 64
+
+    def __init__(self, cell_size: float):
+        """
+        Arguments:
+            cell_size -- side length of the grid cells, in the units of the points
+        """
+        self.cell_size = cell_size
+        self._cells = {}
+        self._points = []
+        self._count = 0
+        # bounding box of the occupied cells, limits how far a query has to look
+        self._min_cell = None
+        self._max_cell = None
+
+    def __len__(self):
+        return self._count
+
+    def _cell(self, x, y):
+        return (math.floor(x / self.cell_size), math.floor(y / self.cell_size))
+
+    def clear(self):
+        self._cells = {}
+        self._points = []
+        self._count = 0
+        self._min_cell = None
+        self._max_cell = None
+
+    def insert(self, x, y, item):
+        """ Add item located at (x, y)
+        """
+        cell = self._cell(x, y)
+        # the insertion order is kept so that ties resolve like a linear scan would
+        point = (x, y, self._count, item)
+        self._cells.setdefault(cell, []).append(point)
+        self._points.append(point)
+        self._count += 1
+        if self._min_cell is None:
+            self._min_cell = cell
+            self._max_cell = cell
+        else:
+            self._min_cell = (min(self._min_cell[0], cell[0]), min(self._min_cell[1], cell[1]))
+            self._max_cell = (max(self._max_cell[0], cell[0]), max(self._max_cell[1], cell[1]))
+
+    def _ring(self, cx, cy, k):
+        """ Non-empty buckets of the cells at Chebyshev distance k from (cx, cy)
+        """
+        cells = self._cells
+        if k == 0:
+            bucket = cells.get((cx, cy))
+            if bucket:
+                yield bucket
+            return
+        for i in range(cx - k, cx + k + 1):
+            for j in (cy - k, cy + k):
+                bucket = cells.get((i, j))
+                if bucket:
+                    yield bucket
+        for j in range(cy - k + 1, cy + k):
+            for i in (cx - k, cx + k):
+                bucket = cells.get((i, j))
+                if bucket:
+                    yield bucket
+
+    def _max_ring(self, cx, cy):
+        return max(cx - self._min_cell[0], self._max_cell[0] - cx,
+                   cy - self._min_cell[1], self._max_cell[1] - cy, 0)
+
+    def iter_nearest(self, x, y):
+        """
+        Yield (item, distance) for every stored item, closest first.
+
+        Items are produced lazily, so a caller looking for the closest item that
+        satisfies some condition only pays for the rings it actually needs.
+        """
+        if self._count == 0:
+            return
+        cx, cy = self._cell(x, y)
+        max_ring = self._max_ring(cx, cy)
+        heap = []
+        for k in range(max_ring + 1):
+            for bucket in self._ring(cx, cy, k):
+                for px, py, order, item in bucket:
+                    heapq.heappush(heap, ((px - x) ** 2 + (py - y) ** 2, order, item))
+            # anything in ring k + 1 or further is at least k cells away
+            bound = (k * self.cell_size) ** 2
+            while heap and heap[0][0] < bound:
+                dist_sq, _, item = heapq.heappop(heap)
+                yield item, math.sqrt(dist_sq)
+        while heap:
+            dist_sq, _, item = heapq.heappop(heap)
+            yield item, math.sqrt(dist_sq)
+
+    def within(self, x, y, radius):
+        """
+        Return a list of (item, distance) of the stored items within radius of (x, y),
+        in insertion order.
+        """
+        if self._count == 0:
+            return []
+        if self._count < self.LINEAR_SCAN_SIZE:
+            candidates = self._points
+        else:
+            cx, cy = self._cell(x, y)
+            reach = min(math.ceil(radius / self.cell_size), self._max_ring(cx, cy))
+            candidates = []
+            for k in range(reach + 1):
+                for bucket in self._ring(cx, cy, k):
+                    candidates.extend(bucket)
+            candidates.sort(key=lambda point: point[2])
+        radius_sq = radius ** 2
+        result = []
+        for px, py, _, item in candidates:
+            dist_sq = (px - x) ** 2 + (py - y) ** 2
+            if dist_sq <= radius_sq:
+                result.append((item, math.sqrt(dist_sq)))
+        return result
+
+    def nearest(self, x, y):
+        """
+        Return (item, distance) of the stored item closest to (x, y), or (None, inf) if empty.
+        Among equally close items the first inserted one is returned.
+        """
+        if self._count == 0:
+            return None, math.inf
+        if self._count < self.LINEAR_SCAN_SIZE:
+            best_dist_sq, best_item = math.inf, None
+            for px, py, _, item in self._points:
+                dist_sq = (px - x) ** 2 + (py - y) ** 2
+                if dist_sq < best_dist_sq:
+                    best_dist_sq, best_item = dist_sq, item
+            return best_item, math.sqrt(best_dist_sq)
+        cx, cy = self._cell(x, y)
+        max_ring = self._max_ring(cx, cy)
+        best = (math.inf, 0, None)
+        for k in range(max_ring + 1):
+            # every cell of ring k is at least (k - 1) cells away from the query
+            if best[2] is not None and ((k - 1) * self.cell_size) ** 2 > best[0]:
+                break
+            for bucket in self._ring(cx, cy, k):
+                for px, py, order, item in bucket:
+                    candidate = ((px - x) ** 2 + (py - y) ** 2, order, item)
+                    if candidate[:2] < best[:2]:
+                        best = candidate
+        return best[2], math.sqrt(best[0])
@@ -0,0 +1,263 @@
+import numpy as np
+import math
+
+# 2D point
+class Point:
+    # Constructor
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+    # Function for printing a point
+    def __str__(self):
+        return f"[{self.x}, {self.y}]"
+
+    # Function for printing a list of points
+    def __repr__(self):
+        return f"[{self.x}, {self.y}]"
+
+"""
+SE(2) object that represents 2D pose/transformation containing position and orientation.
+It can be used to
+    * represent the pose of a coordinate frame, e.g., T^a_b represents the pose of coordinate frame b expressed
+        in the coordinate frame a.
+    * represent a transformation operation that roates and translates a coordinate frame or a point.
+
+Composition, inversion and point transforms are evaluated in closed form from the
+cached cosine and sine of the heading, so no 3x3 matrix is built on the way.
+The homogeneous matrix is still available as SE2.T, computed on first access.
+"""
+class SE2:
+    # Constructor.
+    def __init__(self, x, y, h):
+        """
+        Args:
+            * When the SE2 is used to represent a pose:
+                * x(float): x coordinate of the pose position.
+                * y(float): y coordinate of the pose position.
+                * h(float): pose orientation (in radians).
+            * When the SE2 is used to represent a transform:
+                * x(float): x-component of the translation.
+                * y(float): y-component of the translation.
+                * h(float): rotation component of the transformation (in radians).
+        """
+        self.x = x
+        self.y = y
+        self.h = h
+        self.c = math.cos(self.h)
+        self.s = math.sin(self.h)
+        self._T = None
+
+    @classmethod
+    def _from_cs(cls, x, y, c, s):
+        """
+        Build an SE2 from a translation and the cosine and sine of its rotation,
+        skipping the trigonometry of the constructor.
+        """
+        pose = cls.__new__(cls)
+        pose.x = x
+        pose.y = y
+        pose.h = math.atan2(s, c)
+        pose.c = c
+        pose.s = s
+        pose._T = None
+        return pose
+
+    # Homogeneous transformation matrix, built on first use.
+    @property
+    def T(self) -> np.ndarray:
+        if self._T is None:
+            self._T = np.array([
+                [self.c, -self.s, self.x],
+                [self.s, self.c, self.y],
+                [0, 0, 1]
+            ])
+        return self._T
+
+    # Returns the translation component as a point.
+    def position(self) -> Point:
+        """
+        When the SE2 is used to represent a pose, the return value represents the position of the pose.
+        When the SE2 is used to represent a transformation, the return value represents the translation.
+        """
+        return Point(self.x, self.y)
+
+    # Apply transformation to a 2D point.
+    def transform_point(self, point: Point) -> Point:
+        """
+        Apply the transformation (self) to the point, i.e. R * p + t.
+        Args:
+            * point(Point): the point before the transform.
+        Return:
+            *(Point): the point after the transformation.
+        """
+        return Point(self.c * point.x - self.s * point.y + self.x,
+                     self.s * point.x + self.c * point.y + self.y)
+
+    # Compose with another transformation.
+    def compose(self, other: 'SE2') -> 'SE2':
+        """
+        Compose the transformation (self) with another transform (other).
+        The result has the transformation matrix T_self * T_other; its heading is
+        wrapped to [-pi, pi].
+        Args:
+            * other(SE2 or SE2Array): The other SE2 to compose (on the right).
+        Return:
+            * (SE2): The resulting SE2 after composition, or an SE2Array if other is a batch.
+        """
+        if isinstance(other, SE2Array):
+            return SE2Array._from_cs(self.c * other.x - self.s * other.y + self.x,
+                                     self.s * other.x + self.c * other.y + self.y,
+                                     self.c * other.c - self.s * other.s,
+                                     self.s * other.c + self.c * other.s)
+        return SE2._from_cs(self.c * other.x - self.s * other.y + self.x,
+                            self.s * other.x + self.c * other.y + self.y,
+                            self.c * other.c - self.s * other.s,
+                            self.s * other.c + self.c * other.s)
+
+    # Inverse of the transformation.
+    def inverse(self) -> 'SE2':
+        """
+        Returns the inverse of the transformation, with rotation R^T and translation -R^T * t.
+        Return:
+            * (SE2): the inverse transformation.
+        """
+        return SE2._from_cs(-self.c * self.x - self.s * self.y,
+                            self.s * self.x - self.c * self.y,
+                            self.c,
+                            -self.s)
+
+    # Add Gaussian noise to the transformation.
+    def add_noise(self, x_sigma: float, y_sigma: float, h_sigma:float) -> 'SE2':
+        new_x = self.x + np.random.normal(0, x_sigma)
+        new_y = self.y + np.random.normal(0, y_sigma)
+        new_h = self.h + np.random.normal(0, h_sigma)
+        return SE2(new_x, new_y, new_h)
+
+    # Compute the mean of a list of poses.
+    @staticmethod
+    def mean(pose_list: "list['SE2']") -> 'SE2':
+        """
+        Computes the mean of multiple poses.
+        The average orientation is computed using circular mean.
+        """
+        return SE2Array.from_poses(pose_list).mean()
+
+    # Function for printing a transformation. Angle is displayed in degrees.
+    def __str__(self):
+        deg = math.degrees(self.h)
+        return f"[{self.x}, {self.y}, {deg}]"
+
+    # Function for printing a list of transformations. Angle is displayed in degrees.
+    def __repr__(self):
+        deg = math.degrees(self.h)
+        return f"[{self.x}, {self.y}, {deg}]"
+
+
+"""
+A batch of N SE(2) poses/transformations stored as parallel arrays.
+
+Operations follow numpy broadcasting over the batch: an SE2Array composes element-wise
+with another SE2Array of the same length, and a single SE2 on either side is applied
+to every element.
+"""
+class SE2Array:
+    def __init__(self, x, y, h):
+        """
+        Args:
+            * x(array-like): x coordinates / translations, shape (N,).
+            * y(array-like): y coordinates / translations, shape (N,).
+            * h(array-like): orientations / rotations in radians, shape (N,).
+        """
+        self.x = np.asarray(x, dtype=float)
+        self.y = np.asarray(y, dtype=float)
+        self.h = np.asarray(h, dtype=float)
+        self.c = np.cos(self.h)
+        self.s = np.sin(self.h)
+
+    @classmethod
+    def _from_cs(cls, x, y, c, s):
+        poses = cls.__new__(cls)
+        poses.x = x
+        poses.y = y
+        poses.h = np.arctan2(s, c)
+        poses.c = c
+        poses.s = s
+        return poses
+
+    # Pack a list of SE2 into a batch.
+    @classmethod
+    def from_poses(cls, pose_list: "list[SE2]") -> 'SE2Array':
+        poses = cls.__new__(cls)
+        poses.x = np.array([pose.x for pose in pose_list], dtype=float)
+        poses.y = np.array([pose.y for pose in pose_list], dtype=float)
+        poses.h = np.array([pose.h for pose in pose_list], dtype=float)
+        poses.c = np.array([pose.c for pose in pose_list], dtype=float)
+        poses.s = np.array([pose.s for pose in pose_list], dtype=float)
+        return poses
+
+    # Unpack the batch into a list of SE2.
+    def to_poses(self) -> "list[SE2]":
+        return [SE2._from_cs(x, y, c, s) for x, y, c, s in
+                zip(self.x.tolist(), self.y.tolist(), self.c.tolist(), self.s.tolist())]
+
+    def __len__(self):
+        return len(self.x)
+
+    def __getitem__(self, i) -> SE2:
+        return SE2._from_cs(float(self.x[i]), float(self.y[i]), float(self.c[i]), float(self.s[i]))
+
+    # Apply every transformation to points.
+    def transform_points(self, points) -> np.ndarray:
+        """
+        Apply the transformations (self) to points.
+        Args:
+            * points(np.ndarray): shape (M, 2), rows of (x, y).
+        Return:
+            * (np.ndarray): shape (N, M, 2), entry [i, j] is point j transformed by pose i.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        px = points[None, :, 0]
+        py = points[None, :, 1]
+        c, s = self.c[:, None], self.s[:, None]
+        new_x = c * px - s * py + self.x[:, None]
+        new_y = s * px + c * py + self.y[:, None]
+        return np.stack([new_x, new_y], axis=-1)
+
+    # Compose with another transformation or batch of transformations.
+    def compose(self, other) -> 'SE2Array':
+        """
+        Compose the transformations (self) with other, on the right.
+        Args:
+            * other(SE2 or SE2Array): a single transform applied to every element,
+              or a batch of the same length composed element-wise.
+        Return:
+            * (SE2Array): the resulting batch, headings wrapped to [-pi, pi].
+        """
+        return SE2Array._from_cs(self.c * other.x - self.s * other.y + self.x,
+                                 self.s * other.x + self.c * other.y + self.y,
+                                 self.c * other.c - self.s * other.s,
+                                 self.s * other.c + self.c * other.s)
+
+    # Element-wise inverse.
+    def inverse(self) -> 'SE2Array':
+        return SE2Array._from_cs(-self.c * self.x - self.s * self.y,
+                                 self.s * self.x - self.c * self.y,
+                                 self.c.copy(),
+                                 -self.s)
+
+    # Add independent Gaussian noise to every element.
+    def add_noise(self, x_sigma: float, y_sigma: float, h_sigma: float) -> 'SE2Array':
+        n = len(self)
+        return SE2Array(self.x + np.random.normal(0, x_sigma, n),
+                        self.y + np.random.normal(0, y_sigma, n),
+                        self.h + np.random.normal(0, h_sigma, n))
+
+    # Mean pose of the batch.
+    def mean(self) -> SE2:
+        """
+        Computes the mean of the poses.
+        The average orientation is computed using circular mean.
+        """
+        return SE2(float(np.mean(self.x)), float(np.mean(self.y)),
+                   math.atan2(float(np.mean(self.s)), float(np.mean(self.c))))
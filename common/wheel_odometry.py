@@ -0,0 +1,160 @@
+import numpy as np
+import math
+from se2 import SE2, SE2Array
+
+"""
+Differential drive odometry for whole logs of wheel speeds at once.
+
+A log is an (S, 3) array with one row (omega_l, omega_r, dt) per time step, wheel
+speeds in radian/second and dt in seconds, as recorded by read_odometry in lab4 or
+MoveRobot.get_motion_info in the Webots controllers. Steps without data (None rows
+or NaN) are treated as no motion.
+"""
+
+# Straight-line threshold on the rotational speed, same as Environment.diff_drive_odometry
+OMEGA_EPS = 1e-5
+
+
+def steps_to_array(odometry_steps) -> np.ndarray:
+    """
+    Pack a list of (omega_l, omega_r, dt) tuples into an (S, 3) array.
+    None entries become rows of zeros.
+    """
+    rows = [(0., 0., 0.) if step is None else step for step in odometry_steps]
+    return np.array(rows, dtype=float).reshape(-1, 3)
+
+
+def diff_drive_odometry(steps, wheel_radius: float, axle_length: float) -> SE2Array:
+    """
+    Relative transform T^{k}_{k+1} of every time step, assuming constant wheel speeds within a step.
+    Args:
+        * steps (np.ndarray): shape (S, 3), rows of (omega_l, omega_r, dt).
+        * wheel_radius (float): radius of the wheels (in meter).
+        * axle_length (float): distance between the wheels (in meter).
+    Return:
+        * (SE2Array): S relative transforms.
+    """
+    steps = np.nan_to_num(np.asarray(steps, dtype=float).reshape(-1, 3))
+    omega_l, omega_r, dt = steps[:, 0], steps[:, 1], steps[:, 2]
+    v_l = omega_l * wheel_radius
+    v_r = omega_r * wheel_radius
+    v_x = (v_l + v_r) / 2
+    omega = (v_r - v_l) / axle_length
+
+    # move along an arc of radius v_x / omega, or straight ahead when barely turning
+    turning = np.abs(omega) >= OMEGA_EPS
+    curve_radius = v_x / np.where(turning, omega, 1.)
+    curve_angle = omega * dt
+    dx = np.where(turning, curve_radius * np.sin(curve_angle), v_x * dt)
+    dy = np.where(turning, curve_radius * (1 - np.cos(curve_angle)), 0.)
+    return SE2Array(dx, dy, curve_angle)
+
+
+class OdometryIntegrator:
+    """
+    Prefix composition of a log of odometry steps.
+
+    Keeps the pose P_k = T^{0}_{k} reached after every step k relative to the start
+    of the log, so that the relative transform between any two steps is
+        T^{start}_{end} = P_start^{-1} * P_end
+    in constant time. Since SE(2) rotations commute, the prefix headings are a
+    cumulative sum and the prefix translations a cumulative sum of the step
+    translations rotated by the heading before each step.
+
+    New steps can be appended as they arrive; each costs O(1) amortised.
+    """
+
+    def __init__(self, wheel_radius: float, axle_length: float, steps=None):
+        """
+        Args:
+            * wheel_radius (float): radius of the wheels (in meter).
+            * axle_length (float): distance between the wheels (in meter).
+            * steps (array-like or None): initial log, see steps_to_array.
+        """
+        self.wheel_radius = wheel_radius
+        self.axle_length = axle_length
+        # prefix poses, entry k is the pose after k steps; storage grows by doubling
+        self._x = np.zeros(16)
+        self._y = np.zeros(16)
+        self._h = np.zeros(16)
+        self._count = 0
+        if steps is not None:
+            self.extend(steps)
+
+    @classmethod
+    def from_steps(cls, odometry_steps, wheel_radius: float, axle_length: float) -> 'OdometryIntegrator':
+        """
+        Build the integrator for a list of (omega_l, omega_r, dt) tuples, e.g. from read_odometry.
+        """
+        return cls(wheel_radius, axle_length, steps_to_array(odometry_steps))
+
+    def __len__(self):
+        """ Number of integrated steps """
+        return self._count
+
+    def _reserve(self, size):
+        if size < len(self._x):
+            return
+        capacity = len(self._x)
+        while capacity <= size:
+            capacity *= 2
+        for name in ('_x', '_y', '_h'):
+            grown = np.zeros(capacity)
+            grown[:self._count + 1] = getattr(self, name)[:self._count + 1]
+            setattr(self, name, grown)
+
+    def extend(self, steps):
+        """
+        Integrate a batch of steps, shape (S, 3), in one vectorised pass.
+        """
+        odo = diff_drive_odometry(steps, self.wheel_radius, self.axle_length)
+        n = len(odo)
+        if n == 0:
+            return
+        start = self._count
+        self._reserve(start + n)
+        h0, x0, y0 = self._h[start], self._x[start], self._y[start]
+        # heading before each step, then rotate each step translation into the start frame
+        heading = h0 + np.concatenate(([0.], np.cumsum(odo.h)))
+        c, s = np.cos(heading[:-1]), np.sin(heading[:-1])
+        self._h[start + 1:start + n + 1] = heading[1:]
+        self._x[start + 1:start + n + 1] = x0 + np.cumsum(c * odo.x - s * odo.y)
+        self._y[start + 1:start + n + 1] = y0 + np.cumsum(s * odo.x + c * odo.y)
+        self._count += n
+
+    def append(self, omega_l: float, omega_r: float, dt: float):
+        """
+        Integrate a single step.
+        """
+        self.extend(np.array([[omega_l, omega_r, dt]]))
+
+    def pose(self, k: int) -> SE2:
+        """
+        Pose after k steps relative to the start of the log, T^{0}_{k}.
+        """
+        return SE2(self._x[k], self._y[k], _wrap(self._h[k]))
+
+    def relative(self, start_step: int, end_step: int) -> SE2:
+        """
+        Odometry integrated over steps start_step, ..., end_step - 1, i.e. T^{start_step}_{end_step}.
+        Same result as composing the per-step odometry one by one.
+        """
+        if not (0 <= start_step <= end_step <= self._count):
+            raise IndexError(f"odometry window [{start_step}, {end_step}) outside of [0, {self._count}]")
+        dh = self._h[end_step] - self._h[start_step]
+        dx = self._x[end_step] - self._x[start_step]
+        dy = self._y[end_step] - self._y[start_step]
+        c = math.cos(self._h[start_step])
+        s = math.sin(self._h[start_step])
+        return SE2(c * dx + s * dy, -s * dx + c * dy, _wrap(dh))
+
+    def since(self, start_step: int) -> SE2:
+        """
+        Odometry from start_step to the latest integrated step.
+        """
+        return self.relative(start_step, self._count)
+
+
+def _wrap(h):
+    """ Wrap an angle to [-pi, pi) """
+    return (h + math.pi) % (2 * math.pi) - math.pi
@@ -0,0 +1,103 @@
+import sys
+import time
+import setting
+import random
+from grid import CozGrid
+from particle import Particle, Robot
+from particle_filter import generate_marker_pairs, marker_likelihood
+from likelihood_field import LikelihoodField
+from pose_stats import PoseStats, particles_to_array
+from utils import add_gaussian_noise, grid_distance
+import numpy as np
+
+""" Compare the likelihood field measurement model against the marker pairing model.
+
+    For random robot poses, both models weight the same particle set against the
+    same noisy marker readings. Reports the time to weight all particles, how
+    close the resulting beliefs are (correlation of the normalized weights, overlap
+    of the 100 heaviest particles) and how far each weighted mean is from the robot.
+
+    The pairing model ignores unmatched markers, so with several markers in view it
+    favors particles that see fewer of them; expect the two models to disagree
+    most on those trials.
+
+    Usage: python benchmark_likelihood.py [map_file] [num_trials]
+"""
+
+
+def pair_weights(particles, measured_marker_list, grid):
+    """ Particle weights as computed by measurement_update with MEASUREMENT_MODEL = 'marker_pairs'
+    """
+    weights = []
+    for p in particles:
+        x, y = p.xy
+        l = 0.0
+        if grid.is_in(x, y) and grid.is_free(x, y):
+            marker_pairs = generate_marker_pairs(measured_marker_list.copy(), p.read_markers(grid))
+            if marker_pairs:
+                l = 1.0
+                for robot_marker, particle_marker in marker_pairs:
+                    l *= marker_likelihood(robot_marker, particle_marker)
+        weights.append(l)
+    return np.array(weights)
+
+
+def noisy_markers(robot, grid):
+    markers = []
+    for m in robot.read_markers(grid):
+        markers.append((add_gaussian_noise(m[0], sigma=setting.MARKER_TRANS_SIGMA),
+                        add_gaussian_noise(m[1], sigma=setting.MARKER_TRANS_SIGMA),
+                        add_gaussian_noise(m[2], sigma=setting.MARKER_HEAD_SIGMA)))
+    return markers
+
+
+def run(map_file, num_trials):
+    grid = CozGrid(map_file)
+
+    start = time.time()
+    field = LikelihoodField(grid)
+    print('field build: %.3f s, table shape %s' % (time.time() - start, field.tables.shape))
+
+    particles = [Particle(*grid.random_free_place()) for _ in range(setting.PARTICLE_COUNT)]
+    poses = particles_to_array(particles)
+
+    pair_times, field_times = [], []
+    trial = 0
+    while trial < num_trials:
+        robot = Robot(*grid.random_free_place(), random.uniform(0, 360))
+        measured = noisy_markers(robot, grid)
+        if not measured:
+            continue
+        trial += 1
+
+        start = time.time()
+        w_pair = pair_weights(particles, measured, grid)
+        pair_times.append(time.time() - start)
+        start = time.time()
+        w_field = field.particle_weights(poses, measured)
+        field_times.append(time.time() - start)
+
+        if w_pair.sum() == 0 or w_field.sum() == 0:
+            print('trial %d: one model gave all particles zero weight' % trial)
+            continue
+        w_pair /= w_pair.sum()
+        w_field /= w_field.sum()
+        corr = np.corrcoef(w_pair, w_field)[0, 1]
+        top_pair = set(np.argsort(w_pair)[-100:])
+        top_field = set(np.argsort(w_field)[-100:])
+        mean_pair = PoseStats(poses, w_pair)
+        mean_field = PoseStats(poses, w_field)
+        err_pair = grid_distance(mean_pair.mean_x, mean_pair.mean_y, robot.x, robot.y)
+        err_field = grid_distance(mean_field.mean_x, mean_field.mean_y, robot.x, robot.y)
+        print('trial %d: %d markers, weight corr %.3f, top-100 overlap %d%%, mean error pairs %.3f / field %.3f'
+              % (trial, len(measured), corr, len(top_pair & top_field), err_pair, err_field))
+
+    print('marker_pairs:     %.4f s per update (%d particles)' % (np.mean(pair_times), len(particles)))
+    print('likelihood_field: %.4f s per update (%d particles)' % (np.mean(field_times), len(particles)))
+    print('speedup: %.1fx' % (np.mean(pair_times) / np.mean(field_times)))
+
+
+if __name__ == '__main__':
+    map_file = sys.argv[1] if len(sys.argv) > 1 else 'map_arena.json'
+    num_trials = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    run(map_file, num_trials)
@@ -15,6 +15,7 @@ class CozGrid:
             self.width = config['width']
             self.height = config['height']
             self.scale = config['scale']
+            self.fname = fname
 
             self.occupied = []
             self.markers = []
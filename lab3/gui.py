@@ -5,12 +5,13 @@ import time
 import setting
 import random
 random.seed(setting.RANDOM_SEED)
-import copy
 import math
+import numpy as np
 
 from grid import *
 from particle import Particle
 from utils import *
+from render_bridge import SnapshotMailbox
 
 
 
@@ -23,15 +24,17 @@ class GUIWindow():
 
         self.grid = grid
         self.running = threading.Event()
-        self.updated = threading.Event()
-        self.updated.clear()
-        self.lock = threading.Lock()
+        # latest FrameSnapshot published by the filter thread
+        self.mailbox = SnapshotMailbox()
+        self.frame_period = 1.0 / setting.GUI_FRAME_RATE
         # grid info
         self.occupied = grid.occupied
         self.markers = grid.markers
 
-        self.particles = []
-        self.robot = None
+        # canvas items reused across frames, see createItems
+        self.particle_dots = []
+        self.particle_lines = []
+        self.num_particles_shown = 0
 
         print("Occupied: ")
         print(self.occupied)
@@ -66,46 +69,71 @@ class GUIWindow():
     def weight_to_color(self, weight):
         return "#%02x00%02x" % (int(weight * 255), int((1 - weight) * 255))
 
-    def _show_mean(self, x, y, heading_deg, confident=False):
+    def createItems(self):
+        """ Create every canvas item that moves between frames, initially hidden.
+            Frames only move these items around instead of recreating them.
+        """
+        for _ in range(setting.PARTICLE_MAX_SHOW):
+            self.particle_dots.append(self.canvas.create_oval(0, 0, 0, 0, fill='#FF0000', state=HIDDEN))
+            self.particle_lines.append(self.canvas.create_line(0, 0, 0, 0, state=HIDDEN))
+        self.mean_triangle = self.canvas.create_polygon(0, 0, 0, 0, 0, 0, fill='#CCCCCC', outline='#000000', \
+            width=1, state=HIDDEN)
+        self.mean_ellipse = self.canvas.create_polygon(0, 0, 0, 0, 0, 0, fill='', outline='#CCCCCC', \
+            width=2, state=HIDDEN)
+        self.robot_triangle = self.canvas.create_polygon(0, 0, 0, 0, 0, 0, fill='#FF0000', outline='#000000', \
+            width=1, state=HIDDEN)
+        self.fov_lines = [self.canvas.create_line(0, 0, 0, 0, fill='#222222', width=2, dash=(5,3), state=HIDDEN) \
+            for _ in range(2)]
+
+    def _show_mean(self, x, y, heading_deg, confident=False, ellipse=None):
         if confident:
             color = "#00AA00"
         else:
             color = "#CCCCCC"
-        location = (x,y)
-        self.colorTriangle(location, heading_deg, color,tri_size=20)
-
+        self.canvas.coords(self.mean_triangle, *self.triangleCoords((x, y), heading_deg, tri_size=20))
+        self.canvas.itemconfigure(self.mean_triangle, fill=color, state=NORMAL)
+        if ellipse is not None:
+            self.canvas.coords(self.mean_ellipse, *self.ellipseCoords(ellipse))
+            self.canvas.itemconfigure(self.mean_ellipse, outline=color, state=NORMAL)
+        else:
+            self.canvas.itemconfigure(self.mean_ellipse, state=HIDDEN)
 
-    def _show_particles(self, particles):
-        plot_cnt = setting.PARTICLE_MAX_SHOW if len(particles) > setting.PARTICLE_MAX_SHOW else len(particles)
-        draw_skip = len(particles)/plot_cnt
+    def _show_particles(self, poses):
         line_length = 0.3
-
-        idx = 0
-        while idx < len(particles):
-            p = particles[int(idx)]
-            coord = (p.x,p.y)
-            # print((p.x,p.y))
-            self.colorCircle(coord, '#FF0000', 2)
-            ldx, ldy = rotate_point(line_length, 0, p.h)
-            self.colorLine(coord, (coord[0]+ldx, coord[1]+ldy))
-            idx += draw_skip
-
-    def _show_robot(self, robot):
-        coord = (robot.x, robot.y)
-        self.colorTriangle(coord, robot.h, '#FF0000', tri_size=15)
+        scale = self.grid.scale
+        dot_size = 2
+
+        # canvas coordinates of all particles at once
+        px = poses[:, 0] * scale
+        py = (self.height - poses[:, 1]) * scale
+        h_rad = np.radians(poses[:, 2])
+        lx = px + line_length * np.cos(h_rad) * scale
+        ly = py - line_length * np.sin(h_rad) * scale
+
+        for i in range(len(poses)):
+            self.canvas.coords(self.particle_dots[i], px[i] - dot_size, py[i] - dot_size, px[i] + dot_size, py[i] + dot_size)
+            self.canvas.coords(self.particle_lines[i], px[i], py[i], lx[i], ly[i])
+
+        # only toggle visibility of items whose state changes
+        for i in range(self.num_particles_shown, len(poses)):
+            self.canvas.itemconfigure(self.particle_dots[i], state=NORMAL)
+            self.canvas.itemconfigure(self.particle_lines[i], state=NORMAL)
+        for i in range(len(poses), self.num_particles_shown):
+            self.canvas.itemconfigure(self.particle_dots[i], state=HIDDEN)
+            self.canvas.itemconfigure(self.particle_lines[i], state=HIDDEN)
+        self.num_particles_shown = len(poses)
+
+    def _show_robot(self, robot_pose):
+        x, y, h = robot_pose
+        coord = (x, y)
+        self.canvas.coords(self.robot_triangle, *self.triangleCoords(coord, h, tri_size=15))
+        self.canvas.itemconfigure(self.robot_triangle, state=NORMAL)
         # plot fov
-        fov_lx, fov_ly = rotate_point(8, 0, robot.h + setting.ROBOT_CAMERA_FOV_DEG / 2)
-        fov_rx, fov_ry = rotate_point(8, 0, robot.h - setting.ROBOT_CAMERA_FOV_DEG / 2)
-        self.colorLine(coord, (coord[0]+fov_lx, coord[1]+fov_ly), color='#222222', linewidth=2, dashed=True)
-        self.colorLine(coord, (coord[0]+fov_rx, coord[1]+fov_ry), color='#222222', linewidth=2, dashed=True)
-
-    def clean_world(self):
-        #for eachparticle in self.dots:
-        #    self.canvas.delete(eachparticle)
-        self.canvas.delete("all")
-        self.drawGrid()
-        self.drawOccubpied()
-        self.drawMarkers()
+        for fov_line, side in zip(self.fov_lines, (1, -1)):
+            fov_x, fov_y = rotate_point(8, 0, h + side * setting.ROBOT_CAMERA_FOV_DEG / 2)
+            self.canvas.coords(fov_line, coord[0] * self.grid.scale, (self.height-coord[1]) * self.grid.scale, \
+                (coord[0]+fov_x) * self.grid.scale, (self.height-coord[1]-fov_y) * self.grid.scale)
+            self.canvas.itemconfigure(fov_line, state=NORMAL)
 
     """
     plot utils
@@ -137,7 +165,18 @@ class GUIWindow():
                 coord2[0] * self.grid.scale, (self.height-coord2[1]) * self.grid.scale,  \
                 fill=color, width=linewidth)
 
-    def colorTriangle(self, location, heading_deg, color, tri_size):
+    # Canvas coordinates of a (cx, cy, semi_major, semi_minor, angle_deg) ellipse outline, see PoseStats.covariance_ellipse
+    def ellipseCoords(self, ellipse, num_points=24):
+        cx, cy, semi_major, semi_minor, angle_deg = ellipse
+        coords = []
+        for i in range(num_points):
+            t = 2 * math.pi * i / num_points
+            ex, ey = rotate_point(semi_major * math.cos(t), semi_minor * math.sin(t), angle_deg)
+            coords.append((cx + ex) * self.grid.scale)
+            coords.append((self.height - cy - ey) * self.grid.scale)
+        return coords
+
+    def triangleCoords(self, location, heading_deg, tri_size):
         hx, hy = rotate_point(tri_size, 0, heading_deg)
         lx, ly = rotate_point(-tri_size, tri_size, heading_deg)
         rx, ry = rotate_point(-tri_size, -tri_size, heading_deg)
@@ -145,44 +184,39 @@ class GUIWindow():
         hrot = (hx + location[0]*self.grid.scale, -hy + (self.height-location[1])*self.grid.scale)
         lrot = (lx + location[0]*self.grid.scale, -ly + (self.height-location[1])*self.grid.scale)
         rrot = (rx + location[0]*self.grid.scale, -ry + (self.height-location[1])*self.grid.scale)
-        return self.canvas.create_polygon(hrot[0], hrot[1], lrot[0], lrot[1], rrot[0], rrot[1], \
+        return hrot[0], hrot[1], lrot[0], lrot[1], rrot[0], rrot[1]
+
+    def colorTriangle(self, location, heading_deg, color, tri_size):
+        return self.canvas.create_polygon(*self.triangleCoords(location, heading_deg, tri_size), \
             fill=color, outline='#000000',width=1)
 
     """
     Sync data to plot from other thread
     """
-    def show_mean(self, x, y, heading_deg, confident=False):
-        self.lock.acquire()
-        self.mean_x = x
-        self.mean_y = y
-        self.mean_heading = heading_deg
-        self.mean_confident = confident
-        self.lock.release()
-
-    def show_particles(self, particles):
-        self.lock.acquire()
-        self.particles = copy.deepcopy(particles)
-        self.lock.release()
-
-    def show_robot(self, robot):
-        self.lock.acquire()
-        self.robot = copy.deepcopy(robot)
-        self.lock.release()
-
-    def setupdate(self):
-        self.updateflag = True
-
-    def update(self):
-        self.lock.acquire()
-        self.clean_world()
-        self._show_particles(self.particles)
-        self._show_mean(self.mean_x, self.mean_y, self.mean_heading, self.mean_confident)
-        if self.robot != None:
-            self._show_robot(self.robot)
-            time.sleep(0.05)
-        self.updated.clear()
-        self.lock.release()
-        # self.updateflag = False
+    def publish(self, snapshot):
+        """ Hand a FrameSnapshot to the GUI. Never blocks on drawing;
+            if the GUI has not drawn the previous snapshot yet it is replaced.
+        """
+        self.mailbox.publish(snapshot)
+
+    def draw_snapshot(self, snapshot):
+        self._show_particles(snapshot.particles)
+        x, y, heading_deg, confident = snapshot.mean
+        self._show_mean(x, y, heading_deg, confident, snapshot.ellipse)
+        if snapshot.robot is not None:
+            self._show_robot(snapshot.robot)
+
+    def render_frame(self, master):
+        """ Draw the latest snapshot, then schedule the next frame at GUI_FRAME_RATE
+        """
+        frame_start = time.time()
+        snapshot = self.mailbox.take()
+        if snapshot is not None:
+            self.draw_snapshot(snapshot)
+            self.update_cnt += 1
+        elapsed = time.time() - frame_start
+        delay_ms = max(1, int((self.frame_period - elapsed) * 1000))
+        master.after(delay_ms, self.render_frame, master)
 
     # start GUI thread
     def start(self):
@@ -195,18 +229,12 @@ class GUIWindow():
         self.drawGrid()
         self.drawOccubpied()
         self.drawMarkers()
+        self.createItems()
 
         # Start mainloop and indicate that it is running
         self.running.set()
-        while True:
-            self.updated.wait()
-            if self.updated.is_set():
-                self.update()
-            try:
-                master.update_idletasks()
-                master.update()
-            except TclError:
-                break
+        master.after(0, self.render_frame, master)
+        master.mainloop()
 
         # Indicate that main loop has finished
         self.running.clear()
@@ -0,0 +1,163 @@
+import os
+import math
+import numpy as np
+import setting
+from grid import parse_marker_info
+
+
+class LikelihoodField:
+    """ Precomputed measurement model for a CozGrid.
+
+        A marker measured at (rx, ry, rh) in the robot frame implies, for a given
+        particle, a marker pose in the world frame. The likelihood of that
+        observation is the Gaussian of its distance and heading difference to the
+        best matching map marker, the same densities marker_likelihood uses.
+
+        Every marker has one of a few orientations, so the field is stored as one
+        2D table per marker orientation holding the best translational likelihood
+        over the markers with that orientation. The heading term is evaluated in
+        closed form, so for a given world pose
+
+            likelihood = max over orientations o of table_o(x, y) * gaussian(h - o)
+
+        which is exact up to the bilinear interpolation of the tables. Weighting a
+        particle is then a handful of table lookups per measured marker instead of
+        simulating and pairing its marker readings.
+
+        Unlike the pairing model, markers the particle should see but the robot
+        did not detect are not penalised.
+    """
+
+    def __init__(self, grid, resolution=None, trans_sigma=None, head_sigma=None):
+        """
+        Arguments:
+        grid -- CozGrid to build the field for
+        resolution -- table cell size in grid units, defaults to LIKELIHOOD_FIELD_RES
+        trans_sigma, head_sigma -- marker noise model, default to MARKER_TRANS_SIGMA / MARKER_HEAD_SIGMA
+        """
+        self.resolution = setting.LIKELIHOOD_FIELD_RES if resolution is None else resolution
+        self.trans_sigma = setting.MARKER_TRANS_SIGMA if trans_sigma is None else trans_sigma
+        self.head_sigma = setting.MARKER_HEAD_SIGMA if head_sigma is None else head_sigma
+        self._set_occupancy(grid)
+
+        # pad the tables so that implied markers slightly outside the map still get a likelihood
+        margin = 4 * self.trans_sigma
+        self.origin = (-margin, -margin)
+        nx = int(math.ceil((grid.width + 2 * margin) / self.resolution)) + 1
+        ny = int(math.ceil((grid.height + 2 * margin) / self.resolution)) + 1
+        xs = self.origin[0] + np.arange(nx) * self.resolution
+        ys = self.origin[1] + np.arange(ny) * self.resolution
+
+        markers = [parse_marker_info(m[0], m[1], m[2]) for m in grid.markers]
+        self.headings = np.array(sorted(set(m[2] for m in markers)), dtype=float)
+        self.tables = np.zeros((len(self.headings), nx, ny), dtype=np.float32)
+        for m_x, m_y, m_h in markers:
+            o = int(np.searchsorted(self.headings, m_h))
+            dist_sq = (xs[:, None] - m_x) ** 2 + (ys[None, :] - m_y) ** 2
+            table = _gaussian_sq(dist_sq, self.trans_sigma)
+            np.maximum(self.tables[o], table, out=self.tables[o])
+
+    def _set_occupancy(self, grid):
+        self.width = grid.width
+        self.height = grid.height
+        self.free = np.ones((grid.width, grid.height), dtype=bool)
+        for col, row in grid.occupied:
+            self.free[col, row] = False
+
+    @classmethod
+    def for_grid(cls, grid):
+        """ Return the field for a grid, building it at most once.
+
+            The field is kept on the grid object and saved next to the map file
+            (<map>.likelihood_field.npz); a saved field is reused as long as it was
+            built with the current resolution and noise settings.
+        """
+        field = getattr(grid, 'likelihood_field', None)
+        if field is not None:
+            return field
+        path = os.path.splitext(grid.fname)[0] + '.likelihood_field.npz'
+        field = cls.load(path, grid)
+        if field is None:
+            field = cls(grid)
+            field.save(path)
+        grid.likelihood_field = field
+        return field
+
+    def save(self, path):
+        np.savez_compressed(path, tables=self.tables, headings=self.headings, origin=np.array(self.origin),
+                            params=np.array([self.resolution, self.trans_sigma, self.head_sigma]))
+
+    @classmethod
+    def load(cls, path, grid):
+        """ Load a saved field, or return None if there is none matching the current settings
+        """
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            params = tuple(data['params'])
+            if params != (setting.LIKELIHOOD_FIELD_RES, setting.MARKER_TRANS_SIGMA, setting.MARKER_HEAD_SIGMA):
+                return None
+            field = cls.__new__(cls)
+            field.resolution, field.trans_sigma, field.head_sigma = params
+            field.tables = data['tables']
+            field.headings = data['headings']
+            field.origin = tuple(data['origin'])
+        field._set_occupancy(grid)
+        return field
+
+    def lookup(self, xs, ys, hs):
+        """ Likelihood of observing a marker at world poses (xs, ys, hs), hs in degrees.
+            All arguments are arrays of the same shape.
+        """
+        nx, ny = self.tables.shape[1:]
+        fx = (xs - self.origin[0]) / self.resolution
+        fy = (ys - self.origin[1]) / self.resolution
+        inside = (fx >= 0) & (fx < nx - 1) & (fy >= 0) & (fy < ny - 1)
+        fx = np.where(inside, fx, 0)
+        fy = np.where(inside, fy, 0)
+        ix = fx.astype(int)
+        iy = fy.astype(int)
+        tx = fx - ix
+        ty = fy - iy
+
+        likelihood = np.zeros(np.shape(xs))
+        for table, heading in zip(self.tables, self.headings):
+            trans = (table[ix, iy] * (1 - tx) * (1 - ty) + table[ix + 1, iy] * tx * (1 - ty)
+                     + table[ix, iy + 1] * (1 - tx) * ty + table[ix + 1, iy + 1] * tx * ty)
+            head_diff = np.abs((hs - heading + 180) % 360 - 180)
+            np.maximum(likelihood, trans * _gaussian_sq(head_diff ** 2, self.head_sigma), out=likelihood)
+        return np.where(inside, likelihood, 0.)
+
+    def particle_weights(self, poses, measured_marker_list):
+        """ Unnormalized importance weights of particles.
+
+            Arguments:
+            poses -- np.ndarray of shape (N, 3), rows of particle (x, y, heading_deg)
+            measured_marker_list -- robot detected markers (rx, ry, rh) in the robot frame
+
+            Returns: np.ndarray of shape (N,), zero for particles outside the free space
+        """
+        xs, ys, hs = poses[:, 0], poses[:, 1], poses[:, 2]
+        weights = self.is_free(xs, ys).astype(float)
+        h_rad = np.radians(hs)
+        c, s = np.cos(h_rad), np.sin(h_rad)
+        for rx, ry, rh in measured_marker_list:
+            # marker pose implied by this measurement for every particle
+            m_x = xs + rx * c - ry * s
+            m_y = ys + rx * s + ry * c
+            weights *= self.lookup(m_x, m_y, hs + rh)
+        return weights
+
+    def is_free(self, xs, ys):
+        """ Vectorised CozGrid.is_in and CozGrid.is_free
+        """
+        inside = (xs >= 0) & (ys >= 0) & (xs <= self.width) & (ys <= self.height)
+        ix = np.clip(np.where(inside, xs, 0).astype(int), 0, self.width - 1)
+        iy = np.clip(np.where(inside, ys, 0).astype(int), 0, self.height - 1)
+        return inside & self.free[ix, iy]
+
+
+def _gaussian_sq(x_sq, sigma):
+    """ Zero-mean Gaussian PDF evaluated at sqrt(x_sq), same as particle_filter.gaussian
+    """
+    return (1.0 / (sigma * math.sqrt(2 * math.pi))) * np.exp(-0.5 * x_sq / sigma ** 2)
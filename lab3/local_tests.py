@@ -1,4 +1,10 @@
 from utils import *
+from particle import Particle
+from pose_stats import PoseStats, particles_to_array
+from grid import CozGrid
+from likelihood_field import LikelihoodField
+from particle_filter import marker_likelihood
+import numpy as np
 import unittest
 from math import isclose
 from unittest.mock import patch
@@ -26,5 +32,61 @@ class TestGridDistance(unittest.TestCase):
         print("Good job! Test for add_gaussian_noise passed.")
 
 
+class TestPoseStats(unittest.TestCase):
+
+    def test_mean_pose(self):
+        particles = [Particle(1, 1, 350), Particle(1.2, 0.8, 10), Particle(0.8, 1.2, 0), Particle(5, 5, 0)]
+        m_x, m_y, m_h, m_confident = compute_mean_pose(particles)
+        self.assertAlmostEqual(m_x, 2)
+        self.assertAlmostEqual(m_y, 2)
+        self.assertAlmostEqual(m_h, 0)
+        self.assertFalse(m_confident)
+        stats = PoseStats.from_particles(particles)
+        self.assertAlmostEqual(stats.in_radius_fraction, 0)
+
+    def test_resampled(self):
+        poses = np.array([[1., 2., 30.], [3., 1., 90.], [2., 2., 180.], [4., 0., 270.]])
+        indices = [0, 0, 1, 3, 3, 3]
+        stats = PoseStats(poses).resampled(indices)
+        expected = PoseStats(poses[indices])
+        self.assertAlmostEqual(stats.mean_x, expected.mean_x)
+        self.assertAlmostEqual(stats.mean_y, expected.mean_y)
+        self.assertAlmostEqual(stats.mean_h, expected.mean_h)
+        self.assertAlmostEqual(stats.in_radius_fraction, expected.in_radius_fraction)
+        np.testing.assert_allclose(stats.cov, expected.cov)
+
+    def test_covariance_ellipse(self):
+        particles = [Particle(x, y, 0) for x, y in [(-2, 0), (2, 0), (0, -1), (0, 1)]]
+        cx, cy, semi_major, semi_minor, angle_deg = PoseStats.from_particles(particles).covariance_ellipse(n_sigma=1)
+        self.assertAlmostEqual(cx, 0)
+        self.assertAlmostEqual(cy, 0)
+        self.assertAlmostEqual(semi_major, math.sqrt(2))
+        self.assertAlmostEqual(semi_minor, math.sqrt(0.5))
+        self.assertAlmostEqual(abs(diff_heading_deg(angle_deg, 0)) % 180, 0)
+
+
+class TestLikelihoodField(unittest.TestCase):
+
+    def test_matches_marker_likelihood(self):
+        grid = CozGrid('map_test.json')
+        field = LikelihoodField(grid)
+        particle = Particle(6, 3, 90)
+        particle_markers = particle.read_markers(grid)
+        self.assertGreater(len(particle_markers), 0)
+        # a reading slightly off the particle's own marker reading
+        rx, ry, rh = particle_markers[0]
+        robot_marker = (rx + 0.2, ry - 0.1, rh + 3)
+        expected = marker_likelihood(robot_marker, particle_markers[0])
+        weights = field.particle_weights(particles_to_array([particle]), [robot_marker])
+        self.assertAlmostEqual(weights[0], expected, delta=expected * 0.05)
+
+    def test_far_from_markers(self):
+        grid = CozGrid('map_test.json')
+        field = LikelihoodField(grid)
+        weights = field.particle_weights(np.array([[6., 6., 0.], [-1., 6., 0.]]), [(0.5, 0., 0.)])
+        self.assertAlmostEqual(weights[0], 0)
+        self.assertEqual(weights[1], 0)
+
+
 if __name__ == '__main__':
     unittest.main()
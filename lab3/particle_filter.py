@@ -1,5 +1,7 @@
 import setting
 from particle import Particle
+from likelihood_field import LikelihoodField
+from pose_stats import particles_to_array
 from utils import add_gaussian_noise, rotate_point, grid_distance
 import numpy as np
 np.random.seed(setting.RANDOM_SEED)
@@ -193,7 +195,10 @@ def measurement_update(particles, measured_marker_list, grid):
     particle_weights = []
     num_rand_particles = 25
     
-    if len(measured_marker_list) > 0:
+    if len(measured_marker_list) > 0 and setting.MEASUREMENT_MODEL == 'likelihood_field':
+        field = LikelihoodField.for_grid(grid)
+        particle_weights = list(field.particle_weights(particles_to_array(particles), measured_marker_list))
+    elif len(measured_marker_list) > 0:
         for p in particles:
             x, y = p.xy
             if grid.is_in(x, y) and grid.is_free(x, y):
@@ -6,6 +6,8 @@ import time
 from grid import CozGrid
 from gui import GUIWindow
 from particle import Particle, Robot
+from pose_stats import PoseStats
+from render_bridge import make_snapshot
 # from setting import *
 from particle_filter import *
 from utils import *
@@ -77,6 +79,7 @@ class ParticleFilter:
         self.particles = particles
         self.robbie = robbie
         self.grid = grid
+        self.stats = None
 
     def update(self):
 
@@ -122,8 +125,8 @@ class ParticleFilter:
 
         # ---------- Display current state in GUI ----------
         # Try to find current best estimate for display
-        m_x, m_y, m_h, m_confident = compute_mean_pose(self.particles)
-        return (m_x, m_y, m_h, m_confident)
+        self.stats = PoseStats.from_particles(self.particles)
+        return (self.stats.mean_x, self.stats.mean_y, self.stats.mean_h, self.stats.confident)
 
 
 # thread to run particle filter when GUI is on
@@ -137,10 +140,9 @@ class ParticleFilterThread(threading.Thread):
     def run(self):
         while True:
             estimated = self.filter.update()
-            self.gui.show_particles(self.filter.particles)
-            self.gui.show_mean(estimated[0], estimated[1], estimated[2], estimated[3])
-            self.gui.show_robot(self.filter.robbie)
-            self.gui.updated.set()
+            # the GUI draws the latest snapshot at its own frame rate
+            self.gui.publish(make_snapshot(self.filter.particles, estimated, self.filter.robbie,
+                                           self.filter.stats.covariance_ellipse()))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,129 @@
+import math
+import numpy as np
+
+
+def particles_to_array(particles):
+    """
+    Pack a list of particles into an array.
+
+    Arguments:
+        particles: List[Particle]
+
+    Returns:
+        np.ndarray of shape (N, 3)
+            One row (x, y, heading_deg) per particle.
+    """
+    return np.array([p.xyh for p in particles], dtype=float).reshape(-1, 3)
+
+
+class PoseStats:
+    """
+    Weighted summary statistics of a particle set, computed in one vectorised pass.
+
+    Holds the weighted mean position, the circular mean heading, the 2x2 position
+    covariance and the fraction of weight within confident_dist of the mean.
+    Unweighted particle sets use uniform weights, which reproduces compute_mean_pose.
+    """
+
+    def __init__(self, poses, weights=None, confident_dist=1):
+        """
+        Arguments:
+            poses: np.ndarray of shape (N, 3)
+                Rows of (x, y, heading_deg), see particles_to_array.
+            weights: np.ndarray of shape (N,) or None
+                Non-negative particle weights (need not be normalized).
+                None means every particle has the same weight.
+            confident_dist: float
+                Radius around the mean used for the in-radius fraction.
+        """
+        self.poses = poses
+        self.confident_dist = confident_dist
+        self.count = len(poses)
+        if weights is None:
+            weights = np.ones(self.count)
+        weights = np.asarray(weights, dtype=float)
+        total = weights.sum()
+        if self.count == 0 or total <= 0:
+            self.count = 0
+            self.mean_x, self.mean_y, self.mean_h = -1, -1, 0
+            self.resultant_length = 0.
+            self.cov = np.zeros((2, 2))
+            self.in_radius_fraction = 0.
+            self.weights = weights
+            return
+        w = weights / total
+        self.weights = w
+
+        xs, ys = poses[:, 0], poses[:, 1]
+        h_rad = np.radians(poses[:, 2])
+        self.mean_x = float(w @ xs)
+        self.mean_y = float(w @ ys)
+
+        # circular mean of the heading
+        m_hx = float(w @ np.sin(h_rad))
+        m_hy = float(w @ np.cos(h_rad))
+        self.mean_h = math.degrees(math.atan2(m_hx, m_hy))
+        self.resultant_length = math.hypot(m_hx, m_hy)
+
+        dx = xs - self.mean_x
+        dy = ys - self.mean_y
+        wdx = w * dx
+        wdy = w * dy
+        self.cov = np.array([[wdx @ dx, wdx @ dy],
+                             [wdx @ dy, wdy @ dy]])
+        self.in_radius_fraction = float(w @ (dx * dx + dy * dy < confident_dist ** 2))
+
+    @classmethod
+    def from_particles(cls, particles, weights=None, confident_dist=1):
+        """ Build the statistics straight from a list of particles
+        """
+        return cls(particles_to_array(particles), weights, confident_dist)
+
+    def resampled(self, indices):
+        """
+        Statistics of the particle set obtained by resampling this one.
+
+        Resampling with replacement only changes how often each pose appears, so
+        the new set is this set with weights proportional to the draw counts.
+        No particles are gathered or copied.
+
+        Arguments:
+            indices: array-like of int
+                Indices into this set's poses, one per resampled particle.
+
+        Returns:
+            PoseStats of the resampled set
+        """
+        counts = np.bincount(np.asarray(indices, dtype=int), minlength=len(self.poses))
+        return PoseStats(self.poses, counts, self.confident_dist)
+
+    @property
+    def circular_variance(self):
+        """ 1 - mean resultant length of the headings, in [0, 1]
+        """
+        return 1. - self.resultant_length
+
+    @property
+    def confident(self):
+        """ Whether more than 95% of the weight lies within confident_dist of the mean
+        """
+        return self.count > 0 and self.in_radius_fraction > 0.95
+
+    def covariance_ellipse(self, n_sigma=2):
+        """
+        Position uncertainty ellipse of the particle set.
+
+        Arguments:
+            n_sigma: float
+                Number of standard deviations the semi-axes span.
+
+        Returns:
+            Tuple[float, float, float, float, float] (cx, cy, semi_major, semi_minor, angle_deg)
+                Ellipse centre, semi-axis lengths and the heading of the major axis.
+        """
+        eigvals, eigvecs = np.linalg.eigh(self.cov)
+        eigvals = np.clip(eigvals, 0, None)
+        angle_deg = math.degrees(math.atan2(eigvecs[1, 1], eigvecs[0, 1]))
+        return (self.mean_x, self.mean_y,
+                n_sigma * math.sqrt(eigvals[1]), n_sigma * math.sqrt(eigvals[0]),
+                angle_deg)
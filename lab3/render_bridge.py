@@ -0,0 +1,71 @@
+import threading
+from collections import namedtuple
+
+import numpy as np
+import setting
+
+
+""" Immutable view of the filter state handed from the filter thread to the GUI.
+
+    particles -- read-only np.ndarray of shape (K, 3), rows of (x, y, heading_deg),
+                 already thinned to at most PARTICLE_MAX_SHOW particles
+    mean      -- (x, y, heading_deg, confident) best estimate
+    ellipse   -- (cx, cy, semi_major, semi_minor, angle_deg) or None, see PoseStats.covariance_ellipse
+    robot     -- (x, y, heading_deg) ground truth robot pose, or None
+"""
+FrameSnapshot = namedtuple('FrameSnapshot', ['particles', 'mean', 'ellipse', 'robot'])
+
+
+def make_snapshot(particles, estimated, robot=None, ellipse=None, max_show=None):
+    """ Build a FrameSnapshot from the current filter state.
+
+        Only the particles that will be drawn are copied, picked evenly over the
+        list the same way the GUI always thinned them.
+
+        Arguments:
+        particles -- list of Particles
+        estimated -- (x, y, heading_deg, confident) as returned by ParticleFilter.update
+        robot -- Robot or None
+        ellipse -- covariance ellipse of the particles or None
+        max_show -- max number of particles to keep, defaults to PARTICLE_MAX_SHOW
+    """
+    if max_show is None:
+        max_show = setting.PARTICLE_MAX_SHOW
+    plot_cnt = min(max_show, len(particles))
+    if plot_cnt > 0:
+        draw_skip = len(particles) / plot_cnt
+        shown = [particles[int(i * draw_skip)].xyh for i in range(plot_cnt)]
+    else:
+        shown = []
+    poses = np.array(shown, dtype=float).reshape(-1, 3)
+    poses.setflags(write=False)
+    robot_pose = None if robot is None else (robot.x, robot.y, robot.h)
+    return FrameSnapshot(poses, tuple(estimated), ellipse, robot_pose)
+
+
+class SnapshotMailbox:
+    """ One-slot mailbox between a producer and a consumer thread.
+
+        publish() overwrites whatever is in the slot, so the producer never blocks
+        on a slow consumer; take() returns the newest snapshot at most once.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self.published = 0
+        self.dropped = 0
+
+    def publish(self, snapshot):
+        with self._lock:
+            if self._snapshot is not None:
+                self.dropped += 1
+            self._snapshot = snapshot
+            self.published += 1
+
+    def take(self):
+        """ Return the latest unseen snapshot, or None if nothing new was published
+        """
+        with self._lock:
+            snapshot, self._snapshot = self._snapshot, None
+        return snapshot
@@ -12,7 +12,14 @@ ODOM_HEAD_SIGMA = 2         # rotational err in deg
 MARKER_TRANS_SIGMA = 0.5    # translational err in inch (grid unit)
 MARKER_HEAD_SIGMA = 5        # rotational err in deg
 
+# measurement model used to weight particles:
+# 'marker_pairs' -- simulate each particle's marker readings and pair them with the robot's
+# 'likelihood_field' -- look weights up in a field precomputed per map (see likelihood_field.py)
+MEASUREMENT_MODEL = 'marker_pairs'
+LIKELIHOOD_FIELD_RES = 0.1  # likelihood field table resolution in grid units
+
 PARTICLE_MAX_SHOW = 500     # Max number of particles to be shown in GUI (for speed up)
+GUI_FRAME_RATE = 20         # GUI redraws per second, independent of the filter update rate
 
 ROBOT_CAMERA_FOV_DEG = 45   # Robot camera FOV in degree
 
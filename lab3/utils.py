@@ -3,6 +3,7 @@ import setting
 import random
 random.seed(setting.RANDOM_SEED)
 import math
+from pose_stats import PoseStats
 
 def grid_distance(x1, y1, x2, y2):
     """
@@ -87,35 +88,11 @@ def compute_mean_pose(particles, confident_dist=1):
 
     (This is not part of the particle filter algorithm but rather an
     addition to show the "best belief" for current pose)
+
+    See pose_stats.PoseStats for the covariance and in-radius statistics
+    this is computed from.
     """
-    m_x, m_y, m_count = 0, 0, 0
-    # for rotation average
-    m_hx, m_hy = 0, 0
-    for p in particles:
-        m_count += 1
-        m_x += p.x
-        m_y += p.y
-        m_hx += math.sin(math.radians(p.h))
-        m_hy += math.cos(math.radians(p.h))
-
-    if m_count == 0:
+    stats = PoseStats.from_particles(particles, confident_dist=confident_dist)
+    if stats.count == 0:
         return -1, -1, 0, False
-
-    m_x /= m_count
-    m_y /= m_count
-
-    # average rotation
-    m_hx /= m_count
-    m_hy /= m_count
-    m_h = math.degrees(math.atan2(m_hx, m_hy))
-
-    # Now compute how good that mean is -- check how many particles
-    # actually are in the immediate vicinity
-    m_count = 0
-    for p in particles:
-        if grid_distance(p.x, p.y, m_x, m_y) < 1:
-            m_count += 1
-
-    return m_x, m_y, m_h, m_count > len(particles) * 0.95
-
-
+    return stats.mean_x, stats.mean_y, stats.mean_h, stats.confident
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# batched differential drive odometry shared by all labs, see common/wheel_odometry.py at the repository root
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../common'))
+from wheel_odometry import OdometryIntegrator, diff_drive_odometry, steps_to_array
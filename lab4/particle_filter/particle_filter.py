@@ -3,7 +3,7 @@ from setting import *
 np.random.seed(RANDOM_SEED)
 from itertools import product
 from environment import *
-from geometry import SE2
+from geometry import SE2, SE2Array
 from sensors import MarkerMeasure
 from utils import *
 import math
@@ -25,12 +25,12 @@ def motion_update(particles: list[SE2], odometry: SE2) -> list[SE2]:
     Return:
         (list[SE2]): list of particles after the motion update.
     """
-    new_particles = []
-    for particle in particles:
-        noisy_odo = odometry.add_noise(MOTION_TRANS_SIGMA, MOTION_TRANS_SIGMA, MOTION_HEAD_SIGMA)
-        new_particle = particle.compose(noisy_odo)
-        new_particles.append(new_particle)
-    return new_particles
+    if len(particles) == 0:
+        return []
+    # every particle gets its own noisy copy of the odometry, composed in one batch
+    odometries = SE2Array.from_poses([odometry] * len(particles))
+    noisy_odo = odometries.add_noise(MOTION_TRANS_SIGMA, MOTION_TRANS_SIGMA, MOTION_HEAD_SIGMA)
+    return SE2Array.from_poses(particles).compose(noisy_odo).to_poses()
 
 # ------------------------------------------------------------------------
 def generate_marker_pairs(robot_marker_measures: list[MarkerMeasure],
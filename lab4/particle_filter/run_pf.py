@@ -10,6 +10,7 @@ from gui import GUIWindow
 from utils import *
 from setting import *
 from sensors import compute_measurements
+from odometry import OdometryIntegrator
 
 SCENARIO_NAME = "simple_world1"  #simple_world1 or maze_world1
 
@@ -29,6 +30,8 @@ def run_scenario():
     global correct_est_count
     env = Environment(CONFIGPATH)
     particle_filter = ParticleFilter(env)
+    # integrate the whole wheel speed log once, every window below is then a constant time lookup
+    odometry_log = OdometryIntegrator.from_steps(odometry_steps, env.wheel_radius, env.axle_length)
     
     start_step = 10
     end_step = len(poses)
@@ -38,7 +41,7 @@ def run_scenario():
         robot_pose = poses[i]
 
         # Compute odometry from wheel speeds.
-        odometry = integrate_odo(env, i-step_skip, i, odometry_steps)
+        odometry = odometry_log.relative(i-step_skip, i)
 
         # Compute marker measurements from sensor data.
         img_l, img_r = read_images(IMAGEFOLDER, i)
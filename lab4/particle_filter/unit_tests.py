@@ -1,8 +1,10 @@
 import unittest
 import math
 import os
-from geometry import SE2, Point
+from geometry import SE2, SE2Array, Point
+import numpy as np
 from environment import Environment
+from odometry import OdometryIntegrator
 from setting import *
 
 
@@ -41,6 +43,85 @@ class TestSE2(unittest.TestCase):
         self.assertAlmostEqual(pose_inverse.s, expected_inverse.s)
 
 
+class TestSE2Array(unittest.TestCase):
+    def setUp(self):
+        self.poses = [SE2(1, 0, -math.pi/2), SE2(-1, -1, math.pi/2), SE2(0.3, 2.0, 3.0)]
+        self.others = [SE2(1, 0, math.pi), SE2(0, 1, 0.5), SE2(-0.7, 0.2, -2.5)]
+
+    def assertPoseAlmostEqual(self, pose, expected):
+        self.assertAlmostEqual(pose.x, expected.x)
+        self.assertAlmostEqual(pose.y, expected.y)
+        self.assertAlmostEqual(pose.c, expected.c)
+        self.assertAlmostEqual(pose.s, expected.s)
+
+    def test_compose_matches_scalar(self):
+        batch = SE2Array.from_poses(self.poses).compose(SE2Array.from_poses(self.others))
+        for i, (pose, other) in enumerate(zip(self.poses, self.others)):
+            self.assertPoseAlmostEqual(batch[i], pose.compose(other))
+        # a single SE2 broadcasts over the batch on either side
+        right = SE2Array.from_poses(self.poses).compose(self.others[0])
+        left = self.others[0].compose(SE2Array.from_poses(self.poses))
+        for i, pose in enumerate(self.poses):
+            self.assertPoseAlmostEqual(right[i], pose.compose(self.others[0]))
+            self.assertPoseAlmostEqual(left[i], self.others[0].compose(pose))
+
+    def test_inverse_matches_scalar(self):
+        batch = SE2Array.from_poses(self.poses).inverse().to_poses()
+        for pose, inverse in zip(self.poses, batch):
+            self.assertPoseAlmostEqual(inverse, pose.inverse())
+            self.assertPoseAlmostEqual(inverse, SE2(*np.linalg.inv(pose.T)[:2, 2], -pose.h))
+
+    def test_transform_points(self):
+        points = np.array([[1, 0], [0, 1], [2.5, -1]])
+        transformed = SE2Array.from_poses(self.poses).transform_points(points)
+        self.assertEqual(transformed.shape, (3, 3, 2))
+        for i, pose in enumerate(self.poses):
+            for j, (px, py) in enumerate(points):
+                expected = pose.transform_point(Point(px, py))
+                self.assertAlmostEqual(transformed[i, j, 0], expected.x)
+                self.assertAlmostEqual(transformed[i, j, 1], expected.y)
+
+
+class TestOdometry(unittest.TestCase):
+    def setUp(self):
+        # only the wheel geometry is needed for the odometry
+        self.env = Environment.__new__(Environment)
+        self.env.wheel_radius = 0.1
+        self.env.axle_length = 0.5
+        rng = np.random.default_rng(0)
+        self.steps = [None] + [tuple(step) for step in np.column_stack(
+            [rng.normal(2, 3, 200), rng.normal(2, 3, 200), np.full(200, 0.064)])]
+        # straight line step
+        self.steps[20] = (1.5, 1.5, 0.064)
+
+    def integrate(self, start_step, end_step):
+        pose = SE2(0, 0, 0)
+        for omega_l, omega_r, dt in self.steps[start_step:end_step]:
+            pose = pose.compose(self.env.diff_drive_odometry(omega_l, omega_r, dt))
+        return pose
+
+    def test_relative_matches_stepwise(self):
+        odometry = OdometryIntegrator.from_steps(self.steps, self.env.wheel_radius, self.env.axle_length)
+        for start_step, end_step in [(1, 6), (15, 25), (1, 201), (100, 100)]:
+            expected = self.integrate(start_step, end_step)
+            relative = odometry.relative(start_step, end_step)
+            self.assertAlmostEqual(relative.x, expected.x)
+            self.assertAlmostEqual(relative.y, expected.y)
+            self.assertAlmostEqual(relative.c, expected.c)
+            self.assertAlmostEqual(relative.s, expected.s)
+
+    def test_append_matches_batch(self):
+        batch = OdometryIntegrator.from_steps(self.steps, self.env.wheel_radius, self.env.axle_length)
+        incremental = OdometryIntegrator(self.env.wheel_radius, self.env.axle_length)
+        for step in self.steps:
+            incremental.append(*(step or (0, 0, 0)))
+        self.assertEqual(len(incremental), len(batch))
+        self.assertAlmostEqual(incremental.since(30).x, batch.relative(30, len(batch)).x)
+        self.assertAlmostEqual(incremental.since(30).h, batch.relative(30, len(batch)).h)
+        with self.assertRaises(IndexError):
+            batch.relative(10, len(batch) + 1)
+
+
 class TestEnvironment(unittest.TestCase):
     def __init__(self, *args, **kwargs):
         super(TestEnvironment, self).__init__(*args, **kwargs)
@@ -2,6 +2,7 @@ from rrt import *
 import json
 import os
 from robot_sim import DDRobot
+from portfolio import plan_portfolio, tail_latency, format_latency
 import random
 import pickle
 
@@ -68,12 +69,28 @@ class GradingThread():
 
         for map in self.maps:
             cmap = Map(map)
-            RRT(cmap)
+            plan_rrt(cmap)
             if (cmap.is_solution_valid()):
                 points += 20
             print(map + ": " + str(points) + "/" + str(total) + " points")
 
         print("\nScore = " + str(points) + "/" + str(total) + "\n")
+
+    def run_portfolio(self, trials=10):
+        print("Grader running portfolio...\n")
+        points = 0
+        total = len(self.maps) * 20
+
+        for map in self.maps:
+            result = plan_portfolio(map)
+            if result.path is not None and is_solution_valid_from_path(Map(map), result.path):
+                points += 20
+            print(map + ": " + str(points) + "/" + str(total) + " points, " + str(result.best))
+            stats, failures, _ = tail_latency(map, trials)
+            print("    latency over " + str(trials) + " portfolios: " + format_latency(stats)
+                  + ", failures " + str(failures))
+
+        print("\nScore = " + str(points) + "/" + str(total) + "\n")
     
     def check_path_smoothing(self):
         print("Grader running...\n")
@@ -159,7 +176,7 @@ if __name__ == "__main__":
             print("Error: please give the test option <helpers/rrt/smoothing>")
             raise
     else:
-        print("correct usage: python3 autograder.py <helpers/rrt/smoothing>")
+        print("correct usage: python3 autograder.py <helpers/rrt/smoothing/portfolio>")
         exit()
 
     if test=="helpers":
@@ -174,6 +191,11 @@ if __name__ == "__main__":
         grader = GradingThread(maps)
         grader.run()
     
+    if test == "portfolio":
+        maps = ["maps/maze1.json", "maps/maze2.json", "maps/maze3.json"]
+        grader = GradingThread(maps)
+        grader.run_portfolio()
+
     if test == "smoothing":
         maps = ["maps/maze3.json"]
         path_files = ["paths/maze3_path.pkl"]
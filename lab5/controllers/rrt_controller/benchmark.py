@@ -0,0 +1,174 @@
+import json
+import sys
+import time
+import tracemalloc
+import numpy as np
+from map import Map
+from rrt import MAX_NODES, PLANNERS, plan_rrt_star, path_cost
+from sampling import SAMPLERS, make_sampler
+from utils import *
+
+STAR_TIME_BUDGET = 1.0
+# RRT* samples in json mode, a fixed count rather than a time budget keeps the runs comparable
+STAR_ITERATIONS = 1500
+
+""" RRT benchmarks.
+
+    nearest: time-to-solution of RRT with a linear nearest node scan vs the Map
+    nearest neighbour index. Both variants grow the same tree from the same
+    random seed (they pick the same nearest node), so the difference is only
+    the cost of the lookups. grow_tree is plan_rrt with a pluggable nearest
+    node lookup.
+
+    planners: node count, time to first solution and final smoothed path
+    length of every planner with every sampler, see rrt.PLANNERS and
+    sampling.SAMPLERS. RRT* runs for STAR_TIME_BUDGET seconds.
+
+    json: one record per map, planner, sampler and seed, written to stdout as
+    JSON for benchmarks/run.py at the repository root. RRT* runs for
+    STAR_ITERATIONS samples. Peak memory comes from a second, traced run with
+    the same seed, so tracing does not slow down the timed one.
+
+    Usage: python benchmark.py [nearest|planners|json] [num_seeds] [map_file ...]
+"""
+
+
+def nearest_linear(map, rand_node):
+    nearest_node = None
+    min_dist = float('inf')
+    for node in map.get_nodes():
+        dist = get_dist(node, rand_node)
+        if dist < min_dist:
+            nearest_node = node
+            min_dist = dist
+    return nearest_node
+
+
+def nearest_index(map, rand_node):
+    return map.get_nearest_node(rand_node)
+
+
+def grow_tree(map, nearest):
+    """ RRT main loop, returns time spent in nearest node lookups
+    """
+    lookup_time = 0.
+    map.add_node(map.get_start(), notify=False)
+    while map.get_num_nodes() < MAX_NODES:
+        rand_node = map.get_random_valid_node()
+        start = time.perf_counter()
+        nearest_node = nearest(map, rand_node)
+        lookup_time += time.perf_counter() - start
+        new_node = map.step_from_to(nearest_node, rand_node)
+        if not map.is_collision_with_obstacles((nearest_node, new_node)):
+            map.add_path(nearest_node, new_node, notify=False)
+        if map.is_solved():
+            break
+    return lookup_time
+
+
+def run_nearest(map_files, num_seeds):
+    for map_file in map_files:
+        for name, nearest in [('linear', nearest_linear), ('index', nearest_index)]:
+            total_times, lookup_times, node_counts = [], [], []
+            for seed in range(num_seeds):
+                np.random.seed(seed)
+                map = Map(map_file)
+                start = time.perf_counter()
+                lookup_times.append(grow_tree(map, nearest))
+                total_times.append(time.perf_counter() - start)
+                node_counts.append(map.get_num_nodes())
+                assert map.is_solution_valid()
+            print('%s %-6s: time to solution mean %.3f s / max %.3f s, nearest lookups %.3f s, nodes mean %.0f / max %d'
+                  % (map_file, name, np.mean(total_times), np.max(total_times), np.mean(lookup_times),
+                     np.mean(node_counts), np.max(node_counts)))
+
+
+def run_planners(map_files, num_seeds):
+    for map_file in map_files:
+        for planner_name, planner in PLANNERS.items():
+            for sampler_name in SAMPLERS:
+                times, node_counts, lengths, failures = [], [], [], 0
+                for seed in range(num_seeds):
+                    np.random.seed(seed)
+                    map = Map(map_file, sampler=make_sampler(sampler_name))
+                    first_solution = []
+                    start = time.perf_counter()
+                    on_improved = lambda path, cost: first_solution.append(time.perf_counter() - start)
+                    if planner is plan_rrt_star:
+                        path = planner(map, time_budget=STAR_TIME_BUDGET, on_improved=on_improved)
+                    else:
+                        path = planner(map, on_improved=on_improved)
+                    if path is None or not map.is_solution_valid():
+                        failures += 1
+                        continue
+                    times.append(first_solution[0])
+                    node_counts.append(map.get_num_nodes())
+                    lengths.append(path_cost(path))
+                if failures == num_seeds:
+                    print('%s %-7s %-8s: no solution' % (map_file, planner_name, sampler_name))
+                    continue
+                print('%s %-7s %-8s: time to first solution mean %.3f s / max %.3f s, nodes mean %.0f / max %d, '
+                      'path length mean %.3f, failures %d'
+                      % (map_file, planner_name, sampler_name, np.mean(times), np.max(times),
+                         np.mean(node_counts), np.max(node_counts), np.mean(lengths), failures))
+
+
+def plan_record(map_file, planner_name, sampler_name, seed):
+    """ Plan once and return a benchmark record, see run_json
+    """
+    np.random.seed(seed)
+    map = Map(map_file, sampler=make_sampler(sampler_name))
+    first_solution = []
+    start = time.perf_counter()
+    on_improved = lambda path, cost: first_solution.append(time.perf_counter() - start)
+    if planner_name == 'star':
+        path = plan_rrt_star(map, max_iterations=STAR_ITERATIONS, on_improved=on_improved)
+    else:
+        path = PLANNERS[planner_name](map, on_improved=on_improved)
+    elapsed = time.perf_counter() - start
+    solved = path is not None and map.is_solution_valid()
+    return {'map': map_file, 'planner': planner_name, 'sampler': sampler_name, 'seed': seed,
+            'solved': solved,
+            'time_to_first_solution': first_solution[0] if first_solution else None,
+            'time': elapsed,
+            'nodes': map.get_num_nodes(),
+            'collision_checks': map.collision_checks,
+            'path_length': path_cost(map.get_path()) if solved else None,
+            'smoothed_length': path_cost(path) if solved else None}
+
+
+def peak_memory(map_file, planner_name, sampler_name, seed):
+    """ Peak traced memory in bytes of the same run as plan_record
+    """
+    tracemalloc.start()
+    try:
+        plan_record(map_file, planner_name, sampler_name, seed)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_json(map_files, num_seeds):
+    records = []
+    for map_file in map_files:
+        for planner_name in PLANNERS:
+            for sampler_name in SAMPLERS:
+                for seed in range(num_seeds):
+                    record = plan_record(map_file, planner_name, sampler_name, seed)
+                    record['peak_memory'] = peak_memory(map_file, planner_name, sampler_name, seed)
+                    records.append(record)
+    json.dump({'lab': 'lab5', 'records': records}, sys.stdout, indent=1)
+    print()
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    mode = args.pop(0) if args and args[0] in ('nearest', 'planners', 'json') else 'nearest'
+    num_seeds = int(args[0]) if len(args) > 0 else 10
+    map_files = args[1:] if len(args) > 1 else ['maze1.json', 'maze2.json', 'maze3.json']
+    if mode == 'nearest':
+        run_nearest(map_files, num_seeds)
+    elif mode == 'planners':
+        run_planners(map_files, num_seeds)
+    else:
+        run_json(map_files, num_seeds)
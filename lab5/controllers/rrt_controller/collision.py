@@ -0,0 +1,159 @@
+import math
+import numpy as np
+
+# same tolerance as utils.is_zero
+ZERO_TOL = 1e-2
+
+
+class ObstacleIndex:
+    """Precomputed collision queries against a list of polygon obstacles.
+
+        Obstacle edges are unpacked once into plain floats for single segment
+        queries and into arrays for batches, which test many segments against
+        every edge in the same handful of numpy operations. Both reproduce
+        utils.is_intersect exactly, including its collinearity tolerance.
+
+        That tolerance is on the cross product, so with the short sides of the
+        thin wall obstacles a segment can register a hit far outside the bounding
+        box of the side. Culling edges by bounding box would change results, so
+        segments are always tested against all edges; bounding boxes and the
+        cell grid are used for the point queries, where they are exact.
+
+        Attributes:
+        obstacles -- the obstacles the index was built from, lists of corner Nodes
+    """
+
+    def __init__(self, obstacles, cell_size):
+        """
+            Arguments:
+            obstacles -- list of obstacles, each a list of corner Nodes
+            cell_size -- side length of the grid cells used for point queries
+        """
+        self.obstacles = list(obstacles)
+        self.cell_size = cell_size
+
+        # edges (p2, q2) in the order Map.is_collision_with_obstacles visits them
+        edges = []
+        for obstacle in self.obstacles:
+            num_sides = len(obstacle)
+            for idx in range(num_sides):
+                side_start, side_end = obstacle[idx], obstacle[(idx + 1) % num_sides]
+                edges.append((side_start.x, side_start.y, side_end.x, side_end.y))
+        edges = np.array(edges, dtype=float).reshape(-1, 4)
+        self.p2x, self.p2y, self.q2x, self.q2y = edges.T
+        self.edge_dx = self.q2x - self.p2x
+        self.edge_dy = self.q2y - self.p2y
+        self.edge_min_x = np.minimum(self.p2x, self.q2x)
+        self.edge_max_x = np.maximum(self.p2x, self.q2x)
+        self.edge_min_y = np.minimum(self.p2y, self.q2y)
+        self.edge_max_y = np.maximum(self.p2y, self.q2y)
+        self.edge_tuples = list(zip(*[a.tolist() for a in (
+            self.p2x, self.p2y, self.q2x, self.q2y, self.edge_dx, self.edge_dy,
+            self.edge_min_x, self.edge_max_x, self.edge_min_y, self.edge_max_y)]))
+
+        # axis aligned bounding boxes (min_x, max_x, min_y, max_y), see Map.is_inside_obstacles
+        self.boxes = [(min(n.x for n in obstacle), max(n.x for n in obstacle),
+                       min(n.y for n in obstacle), max(n.y for n in obstacle)) for obstacle in self.obstacles]
+        self.box_array = np.array(self.boxes, dtype=float).reshape(-1, 4)
+
+        # uniform grid, cell -> boxes overlapping the cell
+        self.cells = {}
+        for box in self.boxes:
+            for i in range(self._cell_of(box[0]), self._cell_of(box[1]) + 1):
+                for j in range(self._cell_of(box[2]), self._cell_of(box[3]) + 1):
+                    self.cells.setdefault((i, j), []).append(box)
+
+    def _cell_of(self, coord):
+        return math.floor(coord / self.cell_size)
+
+    def is_inside(self, x, y):
+        """Whether (x, y) is inside or on the bounding box of any obstacle
+        """
+        for min_x, max_x, min_y, max_y in self.cells.get((self._cell_of(x), self._cell_of(y)), ()):
+            if min_x <= x <= max_x and min_y <= y <= max_y:
+                return True
+        return False
+
+    def are_inside(self, xs, ys):
+        """Vectorised is_inside for arrays of points, returns a bool array
+        """
+        xs = np.asarray(xs, dtype=float)[..., None]
+        ys = np.asarray(ys, dtype=float)[..., None]
+        b = self.box_array
+        inside = (b[:, 0] <= xs) & (xs <= b[:, 1]) & (b[:, 2] <= ys) & (ys <= b[:, 3])
+        return inside.any(axis=-1)
+
+    def segment_collides(self, p1x, p1y, q1x, q1y):
+        """Whether the segment from (p1x, p1y) to (q1x, q1y) intersects any obstacle edge.
+
+            utils.is_intersect inlined over the unpacked edges; for a single segment
+            this is much cheaper than the array version.
+        """
+        seg_dx = q1x - p1x
+        seg_dy = q1y - p1y
+        seg_min_x, seg_max_x = min(p1x, q1x), max(p1x, q1x)
+        seg_min_y, seg_max_y = min(p1y, q1y), max(p1y, q1y)
+        for p2x, p2y, q2x, q2y, dx, dy, min_x, max_x, min_y, max_y in self.edge_tuples:
+            val = seg_dy * (p2x - q1x) - seg_dx * (p2y - q1y)
+            o1 = 1 if val >= ZERO_TOL else (2 if val <= -ZERO_TOL else 0)
+            val = seg_dy * (q2x - q1x) - seg_dx * (q2y - q1y)
+            o2 = 1 if val >= ZERO_TOL else (2 if val <= -ZERO_TOL else 0)
+            val = dy * (p1x - q2x) - dx * (p1y - q2y)
+            o3 = 1 if val >= ZERO_TOL else (2 if val <= -ZERO_TOL else 0)
+            val = dy * (q1x - q2x) - dx * (q1y - q2y)
+            o4 = 1 if val >= ZERO_TOL else (2 if val <= -ZERO_TOL else 0)
+            if o1 != o2 and o3 != o4:
+                return True
+            if o1 == 0 and seg_min_x <= p2x <= seg_max_x and seg_min_y <= p2y <= seg_max_y:
+                return True
+            if o2 == 0 and seg_min_x <= q2x <= seg_max_x and seg_min_y <= q2y <= seg_max_y:
+                return True
+            if o3 == 0 and min_x <= p1x <= max_x and min_y <= p1y <= max_y:
+                return True
+            if o4 == 0 and min_x <= q1x <= max_x and min_y <= q1y <= max_y:
+                return True
+        return False
+
+    def segments_collide(self, starts, ends):
+        """Vectorised segment_collides.
+
+            Arguments:
+            starts, ends -- arrays of shape (B, 2), segment end points
+
+            Returns:
+            bool array of shape (B,)
+        """
+        starts = np.asarray(starts, dtype=float).reshape(-1, 2)
+        ends = np.asarray(ends, dtype=float).reshape(-1, 2)
+        if len(self.p2x) == 0:
+            return np.zeros(len(starts), dtype=bool)
+        hits = self._edge_hits(starts[:, 0:1], starts[:, 1:2], ends[:, 0:1], ends[:, 1:2])
+        return hits.any(axis=-1)
+
+    def _edge_hits(self, p1x, p1y, q1x, q1y):
+        """utils.is_intersect(p1, q1, p2, q2) against every edge (p2, q2), broadcast over the segments
+        """
+        p2x, p2y, q2x, q2y = self.p2x, self.p2y, self.q2x, self.q2y
+        # get_orientation(p, q, r) with the operations in the same order, so results match bit for bit
+        o1 = _orientation((q1y - p1y) * (p2x - q1x) - (q1x - p1x) * (p2y - q1y))
+        o2 = _orientation((q1y - p1y) * (q2x - q1x) - (q1x - p1x) * (q2y - q1y))
+        o3 = _orientation(self.edge_dy * (p1x - q2x) - self.edge_dx * (p1y - q2y))
+        o4 = _orientation(self.edge_dy * (q1x - q2x) - self.edge_dx * (q1y - q2y))
+
+        hits = (o1 != o2) & (o3 != o4)
+        seg_min_x, seg_max_x = np.minimum(p1x, q1x), np.maximum(p1x, q1x)
+        seg_min_y, seg_max_y = np.minimum(p1y, q1y), np.maximum(p1y, q1y)
+        # is_on_segment for the collinear cases
+        hits |= (o1 == 0) & (p2x <= seg_max_x) & (p2x >= seg_min_x) & (p2y <= seg_max_y) & (p2y >= seg_min_y)
+        hits |= (o2 == 0) & (q2x <= seg_max_x) & (q2x >= seg_min_x) & (q2y <= seg_max_y) & (q2y >= seg_min_y)
+        hits |= (o3 == 0) & (p1x <= self.edge_max_x) & (p1x >= self.edge_min_x) \
+            & (p1y <= self.edge_max_y) & (p1y >= self.edge_min_y)
+        hits |= (o4 == 0) & (q1x <= self.edge_max_x) & (q1x >= self.edge_min_x) \
+            & (q1y <= self.edge_max_y) & (q1y >= self.edge_min_y)
+        return hits
+
+
+def _orientation(val):
+    """utils.get_orientation from the cross product: 0 colinear, 1 clockwise, 2 counter-clockwise
+    """
+    return (val >= ZERO_TOL) + 2 * (val <= -ZERO_TOL)
@@ -143,14 +143,14 @@ class Visualizer():
         """"Redraw all nodes, these nodes are in RRT
         """
         self.canvas.delete('nodes')
-        for node in self.map._nodes:
+        for node in self.map.get_node_coords().tolist():
             self.draw_color_circle(node, '#CCCCCC', bg=True, tags='nodes')
 
     def draw_node_path(self):
         """"Redraw all node paths
         """
         self.canvas.delete('node_paths')
-        for node_path in self.map._node_paths:
+        for node_path in self.map.get_node_paths():
             self.draw_edge(node_path[0], node_path[1], color='#DD0000', width=2, tags='node_paths')
 
     def draw_solution(self):
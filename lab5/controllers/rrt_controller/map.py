@@ -1,6 +1,12 @@
 import json
 import threading
 from utils import *
+from nn_index import PointIndex
+from collision import ObstacleIndex
+from occupancy import OccupancyRaster
+from sampling import UniformSampler
+from smoothing import smooth_path
+from tree_store import TreeStore, TreeNodes
 np.random.seed(1345678) # do not remove or change
 
 class Map:
@@ -13,10 +19,32 @@ class Map:
         Attributes:
         width -- width of map, in mm
         height -- height of map, in mm
+
+        With raster_resolution set, obstacles are also rasterised into an
+        OccupancyRaster of that cell size, see occupancy.py. In conservative mode
+        (the default) every query still answers exactly like the polygon tests,
+        the raster only skips them away from obstacle boundaries. Otherwise
+        obstacles are inflated to whole cells and queries are pure lookups.
+
+        sampler -- callable sampler(map) -> Node used by node_generator, see
+        sampling.py; uniform rejection sampling by default
+        smoothing -- shortcut mode of compute_smooth_path, 'greedy', 'shortest'
+        or 'random', see smoothing.py
+        chaikin_iterations -- rounds of corner cutting after shortcutting
+        smoothing_report -- SmoothedPath with the lengths and time of the last smoothing
+        collision_checks -- number of segments checked against the obstacles so far
     """
 
-    def __init__(self, fname, exploration_mode=False):
+    def __init__(self, fname, exploration_mode=False, raster_resolution=None, raster_conservative=True,
+                 sampler=None, smoothing='greedy', chaikin_iterations=0):
         self.fname = fname
+        self.smoothing = smoothing
+        self.chaikin_iterations = chaikin_iterations
+        self.smoothing_report = None
+        self.collision_checks = 0
+        self.sampler = sampler if sampler is not None else UniformSampler()
+        self.raster_resolution = raster_resolution
+        self.raster_conservative = raster_conservative
         with open(fname) as configfile:
             # Load dimensions from json file
             config = json.loads(configfile.read())
@@ -27,12 +55,16 @@ class Map:
             self._start = Node(tuple(config['start']))
             self._goals = [Node(tuple(coord)) for coord in config['goals']]
             self._obstacles = []
-            self._nodes = []  # node in RRT
-            self._node_paths = []  # edge in RRT
+            # RRT vertices and edges, see tree_store.py; nodes handed out are views into it
+            self._tree = TreeStore()
+            self._start_index = None  # tree index of the start
+            self._goal_indices = {}  # id(goal) -> tree index, for the goals RRT reached
             self._solved = False
             self._smooth_path = []
             self._smoothed = False
             self._restarts = []
+            # nearest neighbour lookup over the tree indices, cells of 1/32 of the map size
+            self._node_index = PointIndex(max(self.width, self.height) / 32)
 
             # Read in obstacles
             for obstacle in config['obstacles']:
@@ -45,6 +77,32 @@ class Map:
 
             self._exploration_mode = exploration_mode
             self._explored_obstacles = [] # for part 2, keep track of obstacles the robot has explored
+            self._update_obstacle_index()
+
+    def _update_obstacle_index(self):
+        """Rebuild the collision indices, whenever the obstacles or explored obstacles change
+        """
+        cell_size = max(self.width, self.height) / 16
+        self._obstacle_index = ObstacleIndex(self._obstacles, cell_size)
+        self._explored_index = ObstacleIndex(self._explored_obstacles, cell_size)
+        # corners of every obstacle, for check_new_obstacle
+        self._obstacle_corners = np.array([[(n.x, n.y) for n in obstacle] for obstacle in self._obstacles],
+                                          dtype=float).reshape(len(self._obstacles), -1, 2)
+        if self.raster_resolution is None:
+            self._obstacle_raster = self._explored_raster = None
+        else:
+            self._obstacle_raster = OccupancyRaster(self._obstacle_index.boxes, self.width, self.height,
+                                                    self.raster_resolution, self.raster_conservative)
+            self._explored_raster = OccupancyRaster(self._explored_index.boxes, self.width, self.height,
+                                                    self.raster_resolution, self.raster_conservative)
+
+    def _collision_index(self):
+        """Index of the obstacles segments are checked against in the current mode.
+            The raster stands in for it outside of conservative mode.
+        """
+        if self._obstacle_raster is not None and not self.raster_conservative:
+            return self._explored_raster if self._exploration_mode else self._obstacle_raster
+        return self._explored_index if self._exploration_mode else self._obstacle_index
 
     def is_inbound(self, node):
         """
@@ -73,28 +131,32 @@ class Map:
             Arguments:
             line_segment -- a tuple of two node
         """
-        obstacles = self._explored_obstacles if self._exploration_mode else self._obstacles
         line_start, line_end = line_segment
-        for obstacle in obstacles:
-            num_sides = len(obstacle)
-            for idx in range(num_sides):
-                side_start, side_end = obstacle[idx], obstacle[(idx + 1) % num_sides]
-                if is_intersect(line_start, line_end, side_start, side_end):
-                    return True
-        
-        return False
+        self.collision_checks += 1
+        return self._collision_index().segment_collides(line_start.x, line_start.y, line_end.x, line_end.y)
+
+    def are_collisions_with_obstacles(self, starts, ends):
+        """Batched is_collision_with_obstacles
+
+            Arguments:
+            starts -- list of segment start nodes
+            ends -- list of segment end nodes, same length as starts
+
+            Returns:
+            list of bool, True where the segment intersects an obstacle
+        """
+        start_coords = [(node.x, node.y) for node in starts]
+        end_coords = [(node.x, node.y) for node in ends]
+        self.collision_checks += len(start_coords)
+        return self._collision_index().segments_collide(start_coords, end_coords).tolist()
 
     def is_inside_obstacles(self, node, use_all_obstacles = False):
-        obstacles = self._obstacles if not use_all_obstacles else self._explored_obstacles
-        for obstacle in obstacles:
-            # Assuming obstacles are rectangles and defined by their corners in clockwise order
-            minX = min([n.x for n in obstacle])
-            maxX = max([n.x for n in obstacle])
-            minY = min([n.y for n in obstacle])
-            maxY = max([n.y for n in obstacle])
-            if minX <= node.x <= maxX and minY <= node.y <= maxY:
-                return True
-        return False
+        # Obstacles are rectangles, the index tests their precomputed bounding boxes
+        if self._obstacle_raster is not None:
+            index = self._obstacle_raster if not use_all_obstacles else self._explored_raster
+        else:
+            index = self._obstacle_index if not use_all_obstacles else self._explored_index
+        return index.is_inside(node.x, node.y)
         """
         Check if a node is inside any obstacles.
 
@@ -110,15 +172,39 @@ class Map:
         #####################################################
         #####################################################
 
+    def are_inside_obstacles(self, xs, ys):
+        """Batched is_inside_obstacles over all obstacles
+
+            Arguments:
+            xs, ys -- arrays of point coordinates
+
+            Returns:
+            bool array, True where the point is inside an obstacle
+        """
+        index = self._obstacle_raster if self._obstacle_raster is not None else self._obstacle_index
+        return index.are_inside(xs, ys)
+
     def get_size(self):
         """Return the size of grid
         """
         return self.width, self.height
 
     def get_nodes(self):
-        """Return all nodes in RRT
+        """Return all nodes in RRT, a read-only sequence of views into the tree
+        """
+        return TreeNodes(self._tree)
+
+    def get_node_coords(self):
+        """Return the coordinates of all nodes in RRT as a (N, 2) array
         """
-        return self._nodes
+        return self._tree.coords()
+
+    def get_node_paths(self):
+        """Return all edges in RRT as a list of ((x, y), (x, y)) from parent to child
+        """
+        coords = self._tree.coords().tolist()
+        parents, children = self._tree.edges()
+        return [(coords[parent], coords[child]) for parent, child in zip(parents.tolist(), children.tolist())]
 
     def get_goals(self):
         """Return list of goals. You can assume there is only one goal.
@@ -142,7 +228,7 @@ class Map:
     def get_num_nodes(self):
         """Return number of nodes in RRT
         """
-        return len(self._nodes)
+        return len(self._tree)
 
     def set_start(self, node):
         """Set the start cell
@@ -188,6 +274,7 @@ class Map:
 
         self.lock.acquire()
         self._obstacles.append(nodes)
+        self._update_obstacle_index()
         self.updated.set()
         self.changes.append('obstacles')
         self.lock.release()
@@ -197,41 +284,114 @@ class Map:
         """
         return self.node_generator()
 
-    def add_node(self, node):
-        """Add one node to RRT
+    def _tree_index(self, node):
+        """Tree index of a node in RRT: a view, the start or a reached goal
+        """
+        if hasattr(node, 'index') and getattr(node, 'store', None) is self._tree:
+            return node.index
+        if node is self._start and self._start_index is not None:
+            return self._start_index
+        if id(node) in self._goal_indices:
+            return self._goal_indices[id(node)]
+        raise ValueError('node is not in RRT')
+
+    def add_node(self, node, notify=True):
+        """Add one node to RRT, as a root
+
+            Arguments:
+            node -- the node to add
+            notify -- signal the change to the visualizer, see notify_tree_changed
+
+            Returns:
+            the view of the node in RRT
         """
         self.lock.acquire()
-        self._nodes.append(node)
-        self.updated.set()
-        self.changes.append('nodes')
+        index = self._tree.add(node.x, node.y, -1, getattr(node, 'cost', 0.))
+        if node is self._start:
+            self._start_index = index
+        self._node_index.insert(node.x, node.y, index)
+        if notify:
+            self.updated.set()
+            self.changes.append('nodes')
         self.lock.release()
+        return self._tree.node(index)
+
+    def get_nearest_node(self, node):
+        """Return the node in RRT closest to the given node, or None if RRT is empty
+        """
+        index = self._node_index.nearest(node.x, node.y)[0]
+        return self._tree.node(index) if index is not None else None
 
-    def add_path(self, start_node, end_node):
+    def get_nodes_within(self, node, radius):
+        """Return a list of (node, distance) of the nodes in RRT within radius of the given node
+        """
+        return [(self._tree.node(index), dist) for index, dist in self._node_index.within(node.x, node.y, radius)]
+
+    def add_path(self, start_node, end_node, notify=True):
         """Add one edge to RRT, and add the end_node to nodes. If end_node is
            the goal or close to goal mark problem as solved.
 
             Arguments:
-            start_node -- start node of the path
+            start_node -- start node of the path, a node in RRT
             end_node -- end node of the path
+            notify -- signal the change to the visualizer, see notify_tree_changed
+
+            Returns:
+            the view of end_node in RRT, or None if the edge collides
         """
         if self.is_collision_with_obstacles((start_node, end_node)):
-            return
+            return None
         self.lock.acquire()
-        end_node.parent = start_node
-        self._nodes.append(end_node)
-        self._node_paths.append((start_node, end_node))
+        start_index = self._tree_index(start_node)
+        index = self._tree.add(end_node.x, end_node.y, start_index, getattr(end_node, 'cost', 0.))
+        self._node_index.insert(end_node.x, end_node.y, index)
+        end_view = self._tree.node(index)
+        end_node.parent = self._tree.node(start_index)
 
         for goal in self._goals:
-            if end_node == goal:
+            if end_node is goal:
+                self._goal_indices[id(goal)] = index
                 self._solved = True
                 break
             if get_dist(goal, end_node) < 15 and (not self.is_collision_with_obstacles((end_node, goal))):
-                goal.parent = end_node
-                self._nodes.append(goal)
-                self._node_paths.append((end_node, goal))
+                goal.parent = end_view
+                goal_index = self._tree.add(goal.x, goal.y, index, 0.)
+                self._goal_indices[id(goal)] = goal_index
+                self._node_index.insert(goal.x, goal.y, goal_index)
                 self._solved = True
                 break
 
+        if notify:
+            self.updated.set()
+            self.changes.extend(['node_paths', 'nodes', 'solved' if self._solved else None])
+        self.lock.release()
+        return end_view
+
+    def rewire(self, node, parent, notify=True):
+        """Make parent the parent of a node in RRT, e.g. when RRT* finds a cheaper
+           way to reach it.
+
+            Arguments:
+            node -- a node in RRT
+            parent -- its new parent, a node in RRT
+            notify -- signal the change to the visualizer, see notify_tree_changed
+        """
+        self.lock.acquire()
+        index, parent_index = self._tree_index(node), self._tree_index(parent)
+        self._tree.parent[index] = parent_index
+        for goal in self._goals:
+            if self._goal_indices.get(id(goal)) == index:
+                goal.parent = self._tree.node(parent_index)
+        if notify:
+            self.updated.set()
+            self.changes.extend(['node_paths', 'solved' if self._solved else None])
+        self.lock.release()
+
+    def notify_tree_changed(self):
+        """Signal the visualizer that nodes and edges were added with notify=False
+           since it last redrew them
+        """
+        self.lock.acquire()
         self.updated.set()
         self.changes.extend(['node_paths', 'nodes', 'solved' if self._solved else None])
         self.lock.release()
@@ -253,14 +413,7 @@ class Map:
         # check the final path returned for RRT
         if not self._solved:
             return False
-        cur = None
-        for goal in self._goals:
-            cur = goal
-            while cur.parent is not None:
-                cur = cur.parent
-            if cur == self._start:
-                return True
-        return False
+        return self._reached_goal_index() is not None
 
     def step_from_to(self, node0, node1, limit=75):
         """
@@ -299,14 +452,8 @@ class Map:
         # TODO: your code here
         #############################################################################
         ############################################################################
-        while True:
-            # Random point within the map boundaries
-            x = np.random.uniform(-self.width / 2, self.width / 2)
-            y = np.random.uniform(-self.height / 2, self.height / 2)
-            rand_node = Node((x, y))
-            # Check if the node is outside of obstacles
-            if not self.is_inside_obstacles(rand_node):
-                return rand_node
+        # the sampling strategy (uniform, goal biased, gaussian, bridge) lives in self.sampler
+        return self.sampler(self)
 
     def get_smooth_path(self):
         if self._smoothed:
@@ -333,36 +480,46 @@ class Map:
         # TODO: please enter your code below.
         ############################################################################
         ############################################################################
-        smooth_path = [path[0]]  # Start with the first node
-        i = 0
-        while i < len(path) - 1:
-            j = len(path) - 1
-            while j > i + 1:
-                if not self.is_collision_with_obstacles((smooth_path[-1], path[j])):
-                    break
-                j -= 1
-            smooth_path.append(path[j])
-            i = j
-        return smooth_path
+        # shortcuts are checked in batches, see smoothing.py; the default greedy mode
+        # jumps from each kept node to the furthest visible one
+        index = self._collision_index()
+
+        def segments_collide(starts, ends):
+            self.collision_checks += len(starts)
+            return index.segments_collide(starts, ends)
+
+        result = smooth_path([(node.x, node.y) for node in path], segments_collide,
+                             self.smoothing, self.chaikin_iterations)
+        self.smoothing_report = result
+        if len(result.points) == len(result.indices):
+            return [path[i] for i in result.indices]
+        # corner cutting makes new nodes in between the kept start and goal
+        return [path[0]] + [Node((x, y)) for x, y in result.points[1:-1].tolist()] + [path[-1]]
+
+    def _reached_goal_index(self):
+        """Tree index of the first goal connected to the start in RRT, or None
+        """
+        for goal in self._goals:
+            index = self._goal_indices.get(id(goal))
+            if index is not None and self._start_index is not None \
+                    and self._tree.root_of(index) == self._start_index:
+                return index
+        return None
 
     def get_path(self):
-        
-        final_path = None
-        
-        while final_path is None:
-            path = []
-            cur = None
-            for goal in self._goals:
-                cur = goal
-                while cur.parent is not None:
-                    path.append(cur)
-                    cur = cur.parent
-                if cur == self._start:
-                    path.append(cur)
-                    break
-            final_path = path[::-1]
-        
-        return final_path
+        """Return the path from the start to the goal in RRT, the start, views of
+           the tree nodes in between and the goal, or an empty list if RRT has not
+           reached it
+        """
+        index = self._reached_goal_index()
+        if index is None:
+            return []
+        path = [self._tree.node(i) for i in self._tree.path_to(index)]
+        path[0] = self._start
+        for goal in self._goals:
+            if self._goal_indices.get(id(goal)) == index:
+                path[-1] = goal
+        return path
 
     def is_solved(self):
         """Return whether a solution has been found
@@ -374,14 +531,7 @@ class Map:
         """
         if not self._solved:
             return False
-        cur = None
-        for goal in self._goals:
-            cur = goal
-            while cur.parent is not None:
-                cur = cur.parent
-            if cur == self._start:
-                return True
-        return False
+        return self._reached_goal_index() is not None
 
     def reset_paths(self):
         """Reset the grid so that RRT can run again
@@ -407,6 +557,7 @@ class Map:
         self._solved = False
         for goal in self._goals:
             goal.parent = None
+        self._goal_indices = {}
         self.updated.set()
         self.changes.append('solved')
         self.lock.release()
@@ -415,7 +566,10 @@ class Map:
         """Clear all nodes in RRT
         """
         self.lock.acquire()
-        self._nodes = []
+        self._tree.clear()
+        self._node_index.clear()
+        self._start_index = None
+        self._goal_indices = {}
         self.updated.set()
         self.changes.append('nodes')
         self.lock.release()
@@ -424,7 +578,7 @@ class Map:
         """Clear all edges in RRT
         """
         self.lock.acquire()
-        self._node_paths = []
+        self._tree.clear_parents()
         self.updated.set()
         self.changes.append('node_paths')
         self.lock.release()
@@ -443,6 +597,7 @@ class Map:
         """
         self.lock.acquire()
         self._obstacles = []
+        self._update_obstacle_index()
         self.updated.set()
         self.changes.append('obstacles')
         self.lock.release()
@@ -452,13 +607,17 @@ class Map:
         """
         self.lock.acquire()
         has_new_obstacle = False
-        for obstacle in self._obstacles:
-            if obstacle in self._explored_obstacles:
+        explored = set(id(obstacle) for obstacle in self._explored_obstacles)
+        distances = self.distances_to_obstacles(robot)
+        for obstacle, distance in zip(self._obstacles, distances.tolist()):
+            if id(obstacle) in explored:
                 continue
-            if self.distance_to_obstacle(robot, obstacle) <= vision_distance:
+            if distance <= vision_distance:
                 self._explored_obstacles.append(obstacle)
                 self.changes.append('obstacles')
                 has_new_obstacle = True
+        if has_new_obstacle:
+            self._update_obstacle_index()
         self.lock.release()
         return has_new_obstacle
 
@@ -482,3 +641,20 @@ class Map:
             bx, by = corner.x, corner.y
             distances.append(((x - bx) ** 2 + (y - by) ** 2) ** 0.5)
         return min(distances)
+
+    def distances_to_obstacles(self, robot):
+        """distance_to_obstacle for every obstacle at once, returns an array in the order of the obstacles
+        """
+        x, y = robot.x, robot.y
+        corners = self._obstacle_corners
+        if len(corners) == 0:
+            return np.zeros(0)
+        x1, x2 = np.minimum(corners[:, 0, 0], corners[:, 2, 0]), np.maximum(corners[:, 0, 0], corners[:, 2, 0])
+        y1, y2 = np.minimum(corners[:, 0, 1], corners[:, 2, 1]), np.maximum(corners[:, 0, 1], corners[:, 2, 1])
+        within_x = (x1 < x) & (x < x2)
+        within_y = (y1 < y) & (y < y2)
+
+        distances = (((x - corners[:, :, 0]) ** 2 + (y - corners[:, :, 1]) ** 2) ** 0.5).min(axis=1)
+        distances = np.where(within_x, np.minimum(distances, np.minimum(np.abs(y - y1), np.abs(y - y2))), distances)
+        distances = np.where(within_y, np.minimum(distances, np.minimum(np.abs(x - x1), np.abs(x - x2))), distances)
+        return np.where(within_x & within_y, 0., distances)
@@ -0,0 +1,160 @@
+import math
+import numpy as np
+
+# cell states
+FREE = 0
+PARTIAL = 1
+FULL = 2
+
+
+class OccupancyRaster:
+    """Occupancy bitmap of axis aligned rectangular obstacles over the map.
+
+        Every cell is FREE (touches no obstacle), FULL (lies entirely inside an
+        obstacle box) or PARTIAL (crosses an obstacle boundary). A distance field
+        holds, for every cell centre, the distance to the closest obstacle box.
+
+        In conservative mode a point in a PARTIAL cell is decided by the exact box
+        test, so point queries give the same answers as Map.is_inside_obstacles
+        without a raster. Otherwise PARTIAL cells count as obstacle, which inflates
+        the obstacles by less than one cell and makes every query a single lookup.
+        Segment queries always treat PARTIAL cells as obstacle; Map only uses them
+        outside of conservative mode.
+
+        The raster covers the map and any part of the obstacles sticking out of it,
+        so everything outside of it is free. Cells are indexed [x, y] from its
+        lower left corner.
+    """
+
+    def __init__(self, boxes, width, height, resolution, conservative=True):
+        """
+            Arguments:
+            boxes -- obstacle boxes (min_x, max_x, min_y, max_y), see ObstacleIndex.boxes
+            width, height -- map size, the map is centered on the origin
+            resolution -- cell size
+            conservative -- decide points in PARTIAL cells with the exact box test
+        """
+        self.boxes = list(boxes)
+        self.resolution = resolution
+        self.conservative = conservative
+        self.box_array = np.array(self.boxes, dtype=float).reshape(-1, 4)
+        b = self.box_array
+        min_x, max_x = min([-width / 2] + b[:, 0].tolist()), max([width / 2] + b[:, 1].tolist())
+        min_y, max_y = min([-height / 2] + b[:, 2].tolist()), max([height / 2] + b[:, 3].tolist())
+        self.origin = (min_x, min_y)
+        # one extra cell so that points on the upper edges land inside
+        self.nx = int(math.floor((max_x - min_x) / resolution)) + 1
+        self.ny = int(math.floor((max_y - min_y) / resolution)) + 1
+
+        # cell bounds
+        x0 = self.origin[0] + np.arange(self.nx) * resolution
+        y0 = self.origin[1] + np.arange(self.ny) * resolution
+        x0, y0 = x0[:, None, None], y0[None, :, None]
+        x1, y1 = x0 + resolution, y0 + resolution
+        touches = (x0 <= b[:, 1]) & (x1 >= b[:, 0]) & (y0 <= b[:, 3]) & (y1 >= b[:, 2])
+        covered = (x0 >= b[:, 0]) & (x1 <= b[:, 1]) & (y0 >= b[:, 2]) & (y1 <= b[:, 3])
+        self.state = np.where(covered.any(axis=-1), FULL,
+                              np.where(touches.any(axis=-1), PARTIAL, FREE)).astype(np.uint8)
+
+        # distance transform: exact distance from the cell centres to the closest box
+        cx, cy = x0 + resolution / 2, y0 + resolution / 2
+        dx = np.maximum(np.maximum(b[:, 0] - cx, cx - b[:, 1]), 0)
+        dy = np.maximum(np.maximum(b[:, 2] - cy, cy - b[:, 3]), 0)
+        if len(self.boxes) > 0:
+            self.clearance = np.sqrt(dx ** 2 + dy ** 2).min(axis=-1)
+        else:
+            self.clearance = np.full((self.nx, self.ny), np.inf)
+        # lower bound of the clearance anywhere in a cell
+        self.half_diagonal = resolution * math.sqrt(2) / 2
+
+    def cell_of(self, x, y):
+        return (math.floor((x - self.origin[0]) / self.resolution),
+                math.floor((y - self.origin[1]) / self.resolution))
+
+    def _in_raster(self, i, j):
+        return 0 <= i < self.nx and 0 <= j < self.ny
+
+    def _inside_boxes(self, x, y):
+        """Exact test against the boxes, for points in PARTIAL cells
+        """
+        for min_x, max_x, min_y, max_y in self.boxes:
+            if min_x <= x <= max_x and min_y <= y <= max_y:
+                return True
+        return False
+
+    def is_inside(self, x, y):
+        """Whether (x, y) is inside an obstacle, see the class docstring for PARTIAL cells
+        """
+        i, j = self.cell_of(x, y)
+        if not self._in_raster(i, j):
+            return False
+        state = self.state[i, j]
+        if state == PARTIAL and self.conservative:
+            return self._inside_boxes(x, y)
+        return state != FREE
+
+    def are_inside(self, xs, ys):
+        """Vectorised is_inside for arrays of points, returns a bool array
+        """
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        i = np.floor((xs - self.origin[0]) / self.resolution).astype(int)
+        j = np.floor((ys - self.origin[1]) / self.resolution).astype(int)
+        in_raster = (i >= 0) & (i < self.nx) & (j >= 0) & (j < self.ny)
+        state = self.state[np.clip(i, 0, self.nx - 1), np.clip(j, 0, self.ny - 1)]
+        inside = (state != FREE) & in_raster
+        exact = in_raster & (state == PARTIAL) if self.conservative else np.zeros_like(in_raster)
+        if exact.any():
+            b = self.box_array
+            ex, ey = xs[exact][:, None], ys[exact][:, None]
+            inside[exact] = ((b[:, 0] <= ex) & (ex <= b[:, 1]) & (b[:, 2] <= ey) & (ey <= b[:, 3])).any(axis=-1)
+        return inside
+
+    def clearance_at(self, x, y):
+        """Lower bound of the distance from (x, y) to the closest obstacle
+        """
+        i, j = self.cell_of(x, y)
+        if not self._in_raster(i, j):
+            return 0.
+        return max(self.clearance[i, j] - self.half_diagonal, 0.)
+
+    def segment_collides(self, x1, y1, x2, y2):
+        """Whether the segment passes through a non FREE cell.
+
+            Segments shorter than the clearance around either end point are
+            accepted without walking the grid. Otherwise all cells the segment
+            crosses are found at once, from the parameters at which it crosses
+            the grid lines.
+        """
+        length = math.hypot(x2 - x1, y2 - y1)
+        if self.clearance_at(x1, y1) > length or self.clearance_at(x2, y2) > length:
+            return False
+
+        res = self.resolution
+        fx1, fy1 = (x1 - self.origin[0]) / res, (y1 - self.origin[1]) / res
+        fx2, fy2 = (x2 - self.origin[0]) / res, (y2 - self.origin[1]) / res
+        ts = [np.array([0., 1.])]
+        if fx1 != fx2:
+            lines = np.arange(math.floor(min(fx1, fx2)) + 1, math.ceil(max(fx1, fx2)))
+            ts.append((lines - fx1) / (fx2 - fx1))
+        if fy1 != fy2:
+            lines = np.arange(math.floor(min(fy1, fy2)) + 1, math.ceil(max(fy1, fy2)))
+            ts.append((lines - fy1) / (fy2 - fy1))
+        ts = np.sort(np.concatenate(ts))
+        # one sample inside every crossed cell, plus the end points
+        mid = np.concatenate([(ts[:-1] + ts[1:]) / 2, [0., 1.]])
+        i = np.floor(fx1 + (fx2 - fx1) * mid).astype(int)
+        j = np.floor(fy1 + (fy2 - fy1) * mid).astype(int)
+        if ((i < 0) | (i >= self.nx) | (j < 0) | (j >= self.ny)).any():
+            # leaves the raster, nothing to hit out there
+            keep = (i >= 0) & (i < self.nx) & (j >= 0) & (j < self.ny)
+            i, j = i[keep], j[keep]
+        return bool((self.state[i, j] != FREE).any())
+
+    def segments_collide(self, starts, ends):
+        """segment_collides for arrays of shape (B, 2), returns a bool array of shape (B,)
+        """
+        starts = np.asarray(starts, dtype=float).reshape(-1, 2)
+        ends = np.asarray(ends, dtype=float).reshape(-1, 2)
+        return np.array([self.segment_collides(x1, y1, x2, y2)
+                         for (x1, y1), (x2, y2) in zip(starts.tolist(), ends.tolist())], dtype=bool)
@@ -0,0 +1,262 @@
+import multiprocessing
+import queue
+import sys
+import time
+import traceback
+import numpy as np
+from map import Map
+from rrt import PLANNERS, RRT_STAR_TIME_BUDGET
+from sampling import make_sampler
+from smoothing import path_length
+
+""" Portfolio planning: RRT run times have a long tail over random seeds, so
+    run several independent planners, each with its own seed and strategy
+    (planner and sampler, see rrt.PLANNERS and sampling.SAMPLERS), in separate
+    processes and keep the first valid solution, or the shortest one found before a
+    deadline. Members still running at that point are terminated.
+
+    Every member plans on its own Map loaded from the map file and sends back
+    plain data (a PlannerRun), so nothing but the file name crosses processes.
+    Members are plain processes rather than a multiprocessing.Pool, whose
+    terminate can deadlock when it kills a worker in the middle of a task.
+
+    Usage: python portfolio.py [first|best] [num_members] [trials] [map_file ...]
+"""
+
+# (planner, sampler) of the members, in turn; RRT* only returns at the end of
+# its time budget, so it only joins in best mode, second in turn there so that
+# it runs with the default NUM_MEMBERS, see default_members
+STRATEGIES = [('rrt', 'uniform'), ('connect', 'uniform'), ('rrt', 'goal'), ('connect', 'goal'),
+              ('rrt', 'gaussian'), ('connect', 'bridge')]
+BEST_STRATEGIES = STRATEGIES[:1] + [('star', 'goal')] + STRATEGIES[1:]
+
+NUM_MEMBERS = 4
+# seconds, for best mode
+DEADLINE = 2.0
+# seconds between checks for members that died without a result
+POLL_INTERVAL = 0.1
+
+
+class PlannerRun:
+    """ Outcome of one portfolio member
+
+        Attributes:
+        seed, planner, sampler -- the member's configuration
+        path -- list of (x, y) of the smoothed path, or None if it found none
+        length -- length of the smoothed path, inf without one
+        num_nodes -- size of the tree when the planner stopped
+        time -- seconds the planner ran, in the member's process
+    """
+
+    def __init__(self, seed, planner, sampler, path, length, num_nodes, time):
+        self.seed = seed
+        self.planner = planner
+        self.sampler = sampler
+        self.path = path
+        self.length = length
+        self.num_nodes = num_nodes
+        self.time = time
+
+    def __repr__(self):
+        return 'PlannerRun(seed %d, %s/%s, length %.3f, %d nodes, %.3f s)' % (
+            self.seed, self.planner, self.sampler, self.length, self.num_nodes, self.time)
+
+
+class PortfolioResult:
+    """ Outcome of plan_portfolio
+
+        Attributes:
+        best -- the PlannerRun that was kept, or None if no member found a path
+        runs -- the PlannerRuns that finished before the others were terminated
+        num_members -- number of members launched
+        time -- wall clock seconds until the result was decided, process start up included
+    """
+
+    def __init__(self, best, runs, num_members, time):
+        self.best = best
+        self.runs = runs
+        self.num_members = num_members
+        self.time = time
+
+    @property
+    def path(self):
+        return self.best.path if self.best is not None else None
+
+    def __repr__(self):
+        return 'PortfolioResult(%r, %d/%d members finished, %.3f s)' % (
+            self.best, len(self.runs), self.num_members, self.time)
+
+
+def default_members(num_members, mode='first', base_seed=0):
+    """ (seed, planner, sampler) of num_members members, one seed each and the strategies in turn
+    """
+    strategies = STRATEGIES if mode == 'first' else BEST_STRATEGIES
+    return [(base_seed + k,) + strategies[k % len(strategies)] for k in range(num_members)]
+
+
+def run_member(map_file, seed, planner, sampler, planner_kwargs=None, map_kwargs=None):
+    """ Plan on a fresh Map with the given seed and strategy, in the calling process
+    """
+    np.random.seed(seed)
+    map = Map(map_file, sampler=make_sampler(sampler), **(map_kwargs or {}))
+    start = time.perf_counter()
+    smoothed = PLANNERS[planner](map, **(planner_kwargs or {}))
+    elapsed = time.perf_counter() - start
+    if smoothed is None or not map.is_solution_valid():
+        return PlannerRun(seed, planner, sampler, None, float('inf'), map.get_num_nodes(), elapsed)
+    path = [(node.x, node.y) for node in smoothed]
+    return PlannerRun(seed, planner, sampler, path, path_length(path), map.get_num_nodes(), elapsed)
+
+
+def _member_main(results, index, args):
+    try:
+        results.put((index, run_member(*args)))
+    except Exception:
+        results.put((index, traceback.format_exc()))
+
+
+def plan_portfolio(map_file, members=None, mode='first', deadline=None, processes=None, map_kwargs=None):
+    """ Run a portfolio of planners on a map file.
+
+        Arguments:
+        map_file -- path of the map json file
+        members -- list of (seed, planner, sampler), default_members(NUM_MEMBERS, mode) by default
+        mode -- 'first' keeps the first valid solution, 'best' the shortest one by the deadline
+        deadline -- seconds, when to give up ('first') or stop waiting ('best');
+            no limit in first mode and DEADLINE in best mode by default
+        processes -- members running at the same time, all of them by default
+        map_kwargs -- passed on to Map, e.g. raster_resolution
+
+        A member whose process dies without sending a result counts as a run without a path.
+
+        Returns:
+        PortfolioResult
+    """
+    if mode not in ('first', 'best'):
+        raise ValueError('unknown portfolio mode: %s' % mode)
+    if members is None:
+        members = default_members(NUM_MEMBERS, mode)
+    if deadline is None and mode == 'best':
+        deadline = DEADLINE
+    # RRT* returns when its budget runs out, so it has to end before the deadline to count
+    star_budget = 0.8 * deadline if deadline is not None else RRT_STAR_TIME_BUDGET
+
+    start = time.perf_counter()
+    results = multiprocessing.Queue()
+    processes = processes or len(members)
+    workers = []
+    for seed, planner, sampler in members:
+        planner_kwargs = {'time_budget': star_budget} if planner == 'star' else {}
+        args = (map_file, seed, planner, sampler, planner_kwargs, map_kwargs)
+        workers.append(multiprocessing.Process(target=_member_main, args=(results, len(workers), args),
+                                               daemon=True))
+    runs = []
+    try:
+        for worker in workers[:processes]:
+            worker.start()
+        launched = min(processes, len(workers))
+        reported = set()
+        while len(runs) < len(members):
+            timeout = POLL_INTERVAL
+            if deadline is not None:
+                timeout = min(timeout, max(start + deadline - time.perf_counter(), 0.))
+            try:
+                index, run = results.get(timeout=timeout)
+            except queue.Empty:
+                if deadline is not None and time.perf_counter() >= start + deadline:
+                    break
+                # a member killed from outside (e.g. out of memory) never posts, it counts as a failed run;
+                # one that posted and exited has its result in the queue already, so look there first
+                dead = [index for index, worker in enumerate(workers[:launched])
+                        if index not in reported and worker.exitcode is not None]
+                if not dead:
+                    continue
+                try:
+                    index, run = results.get(timeout=POLL_INTERVAL)
+                except queue.Empty:
+                    index = dead[0]
+                    seed, planner, sampler = members[index]
+                    run = PlannerRun(seed, planner, sampler, None, float('inf'), 0, 0.)
+            reported.add(index)
+            if isinstance(run, str):
+                raise RuntimeError('portfolio member %r failed:\n%s' % (members[index], run))
+            runs.append(run)
+            if mode == 'first' and run.path is not None:
+                break
+            if launched < len(workers):
+                workers[launched].start()
+                launched += 1
+    finally:
+        # cancels the members still running
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+        for worker in workers:
+            if worker.pid is not None:
+                worker.join()
+        results.close()
+        results.cancel_join_thread()
+    elapsed = time.perf_counter() - start
+
+    solved = [run for run in runs if run.path is not None]
+    if not solved:
+        best = None
+    elif mode == 'first':
+        best = solved[0]
+    else:
+        best = min(solved, key=lambda run: run.length)
+    return PortfolioResult(best, runs, len(members), elapsed)
+
+
+def latency_stats(times):
+    """ Summary of a list of run times in seconds: mean, median, tail percentiles and max
+    """
+    times = np.asarray(times, dtype=float)
+    return {'mean': float(np.mean(times)), 'p50': float(np.percentile(times, 50)),
+            'p90': float(np.percentile(times, 90)), 'p99': float(np.percentile(times, 99)),
+            'max': float(np.max(times))}
+
+
+def format_latency(stats):
+    return 'mean %.3f s, p50 %.3f s, p90 %.3f s, p99 %.3f s, max %.3f s' % (
+        stats['mean'], stats['p50'], stats['p90'], stats['p99'], stats['max'])
+
+
+def tail_latency(map_file, trials=10, num_members=NUM_MEMBERS, mode='first', **kwargs):
+    """ Run plan_portfolio trials times with fresh seeds on a map file.
+
+        Returns:
+        (latency_stats of the portfolio wall times, number of trials without a solution, lengths of the paths found)
+    """
+    times, lengths, failures = [], [], 0
+    for trial in range(trials):
+        result = plan_portfolio(map_file, default_members(num_members, mode, base_seed=trial * num_members),
+                                mode, **kwargs)
+        times.append(result.time)
+        if result.best is None:
+            failures += 1
+        else:
+            lengths.append(result.best.length)
+    return latency_stats(times), failures, lengths
+
+
+def run_single(map_file, trials):
+    """ Tail latency of one plain RRT per trial, the baseline for tail_latency
+    """
+    runs = [run_member(map_file, trial, 'rrt', 'uniform') for trial in range(trials)]
+    return latency_stats([run.time for run in runs]), sum(run.path is None for run in runs)
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    mode = args.pop(0) if args and args[0] in ('first', 'best') else 'first'
+    num_members = int(args[0]) if len(args) > 0 else NUM_MEMBERS
+    trials = int(args[1]) if len(args) > 1 else 10
+    map_files = args[2:] if len(args) > 2 else ['maze1.json', 'maze2.json', 'maze3.json']
+    for map_file in map_files:
+        stats, failures = run_single(map_file, trials)
+        print('%s single rrt       : %s, failures %d' % (map_file, format_latency(stats), failures))
+        stats, failures, lengths = tail_latency(map_file, trials, num_members, mode)
+        print('%s portfolio %-5s x%d: %s, failures %d, path length mean %.3f'
+              % (map_file, mode, num_members, format_latency(stats), failures,
+                 np.mean(lengths) if lengths else float('nan')))
@@ -1,35 +1,67 @@
+import math
 import sys
 import time
 from map import Map
+from nn_index import PointIndex
+from sampling import make_sampler
 from gui import *
 from utils import *
 from robot_sim import *
 import os
 
 MAX_NODES = 20000
+VIS_UPDATE_RATE = 10 # max number of tree redraws per second while planning
+RRT_STAR_TIME_BUDGET = 5.0 # seconds RRT* keeps improving the path when run from RRT_visualize
 final_path = []
 
-def RRT(map):
-    """ 
-    Apply the RRT algorithm to path through this
-    map.
+
+class TreeUpdateThrottle:
+    """Observer for plan_rrt that forwards the growing tree to the Visualizer
+       in batches, at most VIS_UPDATE_RATE times per second
     """
-    global final_path 
 
-    map.add_node(map.get_start())
-    map_width, map_height = map.get_size()
-    while (map.get_num_nodes() < MAX_NODES):
+    def __init__(self, rate=VIS_UPDATE_RATE):
+        self.period = 1.0 / rate
+        self.last_update = 0.
+
+    def __call__(self, map, final=False):
+        now = time.time()
+        if final or now - self.last_update >= self.period:
+            map.notify_tree_changed()
+            self.last_update = now
+
+
+def path_cost(path):
+    """ Length of a path given as a list of nodes
+    """
+    return sum(get_dist(node, next_node) for node, next_node in zip(path, path[1:]))
+
+
+def plan_rrt(map, max_nodes=MAX_NODES, observer=None, on_improved=None):
+    """
+    Grow an RRT from the start of the map until a goal is reached.
+
+    Runs as fast as it can; nothing is drawn and the visualizer is not signalled
+    unless an observer is given.
+
+    Arguments:
+        map -- the Map to plan in, its tree is extended in place
+        max_nodes -- give up once the tree has this many nodes
+        observer -- optional callable observer(map, final=False), called after every
+            new edge and once with final=True when planning stops
+        on_improved -- optional callable on_improved(path, cost), called with the
+            (unsmoothed) path to the goal and its length when a solution is found
+
+    Returns:
+        List of nodes of the smoothed path from start to goal, or None if no path was found
+    """
+    map.add_node(map.get_start(), notify=False)
+    while (map.get_num_nodes() < max_nodes):
         # Generate a random node
         rand_node = map.get_random_valid_node()
 
         # Find the nearest node in the existing tree to the random node
-        nearest_node = None
-        min_dist = float('inf')
-        for node in map.get_nodes():
-            dist = get_dist(node, rand_node)
-            if dist < min_dist:
-                nearest_node = node
-                min_dist = dist
+        nearest_node = map.get_nearest_node(rand_node)
 
         # Generate a new node in the direction of the random node from the nearest node,
         # but within a maximum distance (stepping distance)
@@ -37,19 +69,243 @@ def RRT(map):
 
         # Add the new node to the tree if it does not result in a collision
         if not map.is_collision_with_obstacles((nearest_node, new_node)):
-            map.add_path(nearest_node, new_node)
-        time.sleep(0.01)
+            map.add_path(nearest_node, new_node, notify=False)
+            if observer is not None:
+                observer(map)
         if map.is_solved():
             break
 
-    path = map.get_path()
-    smoothed_path = map.get_smooth_path()
+    if observer is not None:
+        observer(map, final=True)
+    if not map.is_solved():
+        return None
+    if on_improved is not None:
+        on_improved(map.get_path(), path_cost(map.get_path()))
+    return map.get_smooth_path()
+
+
+def plan_rrt_connect(map, max_nodes=MAX_NODES, observer=None, on_improved=None):
+    """
+    Bidirectional RRT-Connect: grow the map's tree from the start and a second
+    tree from the goals, alternating which one is extended, and after every
+    extension try to connect the new node straight to the closest node of the
+    other tree. Once they meet, the goal tree branch is copied into the map's
+    tree, so the result reads like a plan_rrt one (get_path, is_solved, ...).
+
+    The goal tree is kept here and is not drawn. Arguments and return value as
+    for plan_rrt; max_nodes counts the nodes of both trees.
+    """
+    map.add_node(map.get_start(), notify=False)
+    # goal tree, parent pointers lead to a goal
+    goal_nodes = [Node((goal.x, goal.y)) for goal in map.get_goals()]
+    goal_index = PointIndex(max(map.width, map.height) / 32)
+    for node in goal_nodes:
+        goal_index.insert(node.x, node.y, node)
+
+    def grow_goal_tree(rand_node):
+        nearest_node = goal_index.nearest(rand_node.x, rand_node.y)[0]
+        new_node = map.step_from_to(nearest_node, rand_node)
+        if map.is_collision_with_obstacles((nearest_node, new_node)):
+            return None
+        new_node = Node((new_node.x, new_node.y), parent=nearest_node)
+        goal_nodes.append(new_node)
+        goal_index.insert(new_node.x, new_node.y, new_node)
+        return new_node
+
+    def merge(start_node, goal_node):
+        # copy the goal tree branch, Map.add_path marks the map solved once a goal is in sight
+        while goal_node is not None and not map.is_solved():
+            start_node = map.add_path(start_node, Node((goal_node.x, goal_node.y)), notify=False)
+            if start_node is None:
+                break
+            goal_node = goal_node.parent
+
+    extend_start = True
+    while not map.is_solved() and map.get_num_nodes() + len(goal_nodes) < max_nodes:
+        rand_node = map.get_random_valid_node()
+        if extend_start:
+            nearest_node = map.get_nearest_node(rand_node)
+            new_node = map.step_from_to(nearest_node, rand_node)
+            if not map.is_collision_with_obstacles((nearest_node, new_node)):
+                new_node = map.add_path(nearest_node, new_node, notify=False)
+                if new_node is not None and not map.is_solved():
+                    goal_node = goal_index.nearest(new_node.x, new_node.y)[0]
+                    if not map.is_collision_with_obstacles((new_node, goal_node)):
+                        merge(new_node, goal_node)
+                if observer is not None:
+                    observer(map)
+        else:
+            new_node = grow_goal_tree(rand_node)
+            if new_node is not None:
+                start_node = map.get_nearest_node(new_node)
+                if not map.is_collision_with_obstacles((start_node, new_node)):
+                    merge(start_node, new_node)
+                    if observer is not None:
+                        observer(map)
+        extend_start = not extend_start
+
+    if observer is not None:
+        observer(map, final=True)
+    if not map.is_solved():
+        return None
+    if on_improved is not None:
+        on_improved(map.get_path(), path_cost(map.get_path()))
+    return map.get_smooth_path()
+
+
+def rewire_radius(map, num_nodes):
+    """
+    RRT* neighbourhood radius, gamma * sqrt(log(n) / n) in 2D, with gamma
+    chosen from the map area so that the radius shrinks from about the map
+    size towards the typical node spacing as the tree grows.
+    """
+    gamma = 2 * math.sqrt(1.5) * math.sqrt(map.width * map.height / math.pi)
+    n = max(num_nodes, 2)
+    return min(gamma * math.sqrt(math.log(n) / n), max(map.width, map.height))
+
+
+def plan_rrt_star(map, max_nodes=MAX_NODES, time_budget=None, max_iterations=None,
+                  observer=None, on_improved=None):
+    """
+    Anytime RRT*: keep growing the tree after the first solution, connecting
+    every new node to the cheapest collision-free neighbour within
+    rewire_radius and rewiring those neighbours through it when that is
+    cheaper. The cost of a tree node holds its cost-to-come, which is pushed
+    down the subtree whenever a node is rewired. The goal is an ordinary tree
+    node once reached, and every new node that sees it is offered as its parent.
+
+    Arguments:
+        map -- the Map to plan in, its tree is extended in place
+        max_nodes -- stop once the tree has this many nodes
+        time_budget -- optional, stop after this many seconds
+        max_iterations -- optional, stop after this many samples
+        observer -- as for plan_rrt
+        on_improved -- optional callable on_improved(path, cost), called with the
+            (unsmoothed) path to the goal and its cost whenever a cheaper one is found
+
+    Returns:
+        List of nodes of the smoothed best path when the budget ran out, or None if no path was found
+    """
+    deadline = time.perf_counter() + time_budget if time_budget is not None else None
+    start = map.get_start()
+    start.cost = 0.
+    start = map.add_node(start, notify=False)
+    children = {start: []}
+    # the goal reached and its node in the tree
+    goal, goal_vertex = None, None
+    best_cost = math.inf
+    iteration = 0
+
+    def set_parent(node, parent, cost):
+        # move node under parent and push the change in cost down its subtree
+        if node.parent is not None:
+            children[node.parent].remove(node)
+        children[parent].append(node)
+        map.rewire(node, parent, notify=False)
+        delta = node.cost - cost
+        stack = [node]
+        while stack:
+            cur = stack.pop()
+            cur.cost -= delta
+            stack.extend(children[cur])
+
+    while map.get_num_nodes() < max_nodes:
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+        if max_iterations is not None and iteration >= max_iterations:
+            break
+        iteration += 1
+
+        rand_node = map.get_random_valid_node()
+        nearest_node = map.get_nearest_node(rand_node)
+        new_node = map.step_from_to(nearest_node, rand_node)
+        radius = rewire_radius(map, map.get_num_nodes())
+        near = [(node, dist) for node, dist in map.get_nodes_within(new_node, radius) if node != goal_vertex]
+        if not any(node == nearest_node for node, _ in near):
+            near.append((nearest_node, get_dist(nearest_node, new_node)))
+        collisions = map.are_collisions_with_obstacles([node for node, _ in near], [new_node] * len(near))
+        free = [(node, dist) for (node, dist), collision in zip(near, collisions) if not collision]
+        if not free:
+            continue
+
+        # cheapest parent
+        parent, parent_dist = min(free, key=lambda item: item[0].cost + item[1])
+        new_node.cost = parent.cost + parent_dist
+        new_node = map.add_node(new_node, notify=False)
+        children[new_node] = []
+        set_parent(new_node, parent, new_node.cost)
+
+        # rewire the neighbours through the new node, the segments were checked above
+        for node, dist in free:
+            if node != parent and new_node.cost + dist < node.cost:
+                set_parent(node, new_node, new_node.cost + dist)
+
+        # offer the new node to the goals
+        for candidate in map.get_goals():
+            if goal is not None and candidate is not goal:
+                continue
+            dist = get_dist(new_node, candidate)
+            if goal is not None and new_node.cost + dist >= goal_vertex.cost:
+                continue
+            if map.is_collision_with_obstacles((new_node, candidate)):
+                continue
+            if goal is None:
+                goal = candidate
+                goal.cost = new_node.cost + dist
+                # links the goal into the tree and marks the map solved
+                goal_vertex = map.add_path(new_node, goal, notify=False)
+                children[goal_vertex] = []
+                children[new_node].append(goal_vertex)
+            else:
+                set_parent(goal_vertex, new_node, new_node.cost + dist)
+            break
+        # also catches the goal getting cheaper through rewiring
+        if goal is not None and goal_vertex.cost < best_cost:
+            best_cost = goal.cost = goal_vertex.cost
+            if on_improved is not None:
+                on_improved(map.get_path(), best_cost)
+
+        if observer is not None:
+            observer(map)
+
+    if observer is not None:
+        observer(map, final=True)
+    if not map.is_solved():
+        return None
+    map.clear_smooth_path()
+    return map.get_smooth_path()
+
+
+PLANNERS = {'rrt': plan_rrt, 'connect': plan_rrt_connect, 'star': plan_rrt_star}
+
+
+def store_path(path, cost):
+    """ on_improved callback keeping the latest path for RRT_visualize to return
+    """
+    global final_path
+    final_path = [(node.x, node.y) for node in path]
+
+
+def RRT(map, planner=plan_rrt):
+    """ 
+    Apply the RRT algorithm to path through this
+    map, showing the tree growing in the Visualizer.
+    """
+    global final_path 
+
+    if planner is plan_rrt_star:
+        planner(map, time_budget=RRT_STAR_TIME_BUDGET, observer=TreeUpdateThrottle(), on_improved=store_path)
+    else:
+        planner(map, observer=TreeUpdateThrottle(), on_improved=store_path)
 
     if map.is_solution_valid():
+        path = map.get_path()
+        smoothed_path = map.get_smooth_path()
         print("A valid solution has been found :-) ")
         print("Nodes created: ", map.get_num_nodes())
         print("Path length: ", len(path))
         print("Smoothed path length: ", len(smoothed_path))
+        print("Smoothing: ", map.smoothing_report)
         
         # Store robot path
         robot_path = []
@@ -79,12 +335,13 @@ class RRTThread(threading.Thread):
     """Thread to run RRT separate from main thread
     """
 
-    def __init__(self, map):
+    def __init__(self, map, planner=plan_rrt):
         threading.Thread.__init__(self, daemon=True)
         self.map = map
+        self.planner = planner
 
     def run(self):
-        self.path = RRT(self.map)
+        self.path = RRT(self.map, self.planner)
         time.sleep(5)
         self.map.reset_paths()
         stopevent.set()     
@@ -95,10 +352,16 @@ def RRT_visualize(map):
     global stopevent
     stopevent = threading.Event()
     exploration = False
+    planner = plan_rrt
     for i in range(0,len(sys.argv)): 
         #reads input whether we are running the exploration version or not
         if (sys.argv[i] == "-explore"):
             exploration = True
+        # -planner rrt|connect|star, -sampler uniform|goal|gaussian|bridge
+        if (sys.argv[i] == "-planner" and i + 1 < len(sys.argv)):
+            planner = PLANNERS[sys.argv[i + 1]]
+        if (sys.argv[i] == "-sampler" and i + 1 < len(sys.argv)):
+            map.sampler = make_sampler(sys.argv[i + 1])
     
     if exploration:
         r = DDRobot(map.get_start().x, map.get_start().y, map)
@@ -107,7 +370,7 @@ def RRT_visualize(map):
         robot_thread.start()
         visualizer.start()
     else:
-        rrt_thread = RRTThread(map=map)
+        rrt_thread = RRTThread(map=map, planner=planner)
         visualizer = Visualizer(map, None, stopevent, exploration)
         rrt_thread.start()
         visualizer.start()
@@ -1,8 +1,10 @@
 from controller import Robot
 from geometry import SE2, Point
+from odometry import OdometryIntegrator
 import math
 import numpy as np
 from rrt import RRT_visualize
+from portfolio import plan_portfolio
 from map import Map
 from gui import *
 import time
@@ -12,6 +14,9 @@ import sys
 MAP_NAME = "./maps/maze1.json"
 TIME_STEP = 64
 MAX_SPEED = 6.28
+# e-puck wheel geometry, in meter
+WHEEL_RADIUS = 0.0205
+AXLE_LENGTH = 0.052
 
 class MoveRobot:
 
@@ -39,6 +44,8 @@ class MoveRobot:
 
         self.wheel_position = [self.left_ps.getValue(), self.right_ps.getValue()]
         print("wheel initial positions", self.wheel_position)
+        # wheel odometry of every get_motion_info call, see odometry_since
+        self.odometry = OdometryIntegrator(WHEEL_RADIUS, AXLE_LENGTH)
 
         # Get absolute position of robot
         self.gps = self.robot.getDevice('gps')
@@ -70,8 +77,16 @@ class MoveRobot:
         self.wheel_position = new_wheel_position
         omega_l, omega_r = wheel_dis_traveled[0] / dt, wheel_dis_traveled[1] / dt
         self.last_step_measured = self.step
+        self.odometry.append(omega_l, omega_r, dt)
         return omega_l, omega_r, dt
 
+    def odometry_since(self, measurement):
+        """
+        Relative transform travelled since the given get_motion_info call (0 is the start),
+        up to the latest one. Constant time regardless of how many calls lie in between.
+        """
+        return self.odometry.since(measurement)
+
     def move_forward(self,next_coords,speed = 1,min_distance = 0.1):
 
         print("move forward...")
@@ -140,7 +155,13 @@ if __name__ == "__main__":
     print(map_name)
     map = Map(map_name, exploration_mode=False)
 
-    path = RRT_visualize(map)
+    if "-portfolio" in sys.argv:
+        # several seeds and planners in parallel, without the visualizer, see portfolio.py
+        result = plan_portfolio(map_name)
+        print(result)
+        path = result.path
+    else:
+        path = RRT_visualize(map)
 
     print(path,'start')
     
@@ -0,0 +1,146 @@
+import numpy as np
+from utils import *
+
+""" Sampling strategies for Map.node_generator.
+
+    A sampler is a callable sampler(map) -> Node returning a random node in free
+    space. Samplers only use the public Map queries (size, goals,
+    is_inside_obstacles, are_inside_obstacles) and numpy's global random state,
+    so runs stay reproducible from np.random.seed like the rest of the lab.
+
+    Gaussian and bridge samplers concentrate samples close to obstacles and in
+    narrow passages. Most of their candidates get rejected, so they draw them in
+    batches and test them with Map.are_inside_obstacles. Combine them with the
+    uniform sampler through MixedSampler so that open space is still covered,
+    and wrap the result in GoalBiasSampler to pull the tree towards the goals.
+"""
+
+
+def are_blocked(map, xs, ys):
+    """ Whether the points are outside the map or inside an obstacle; the map border counts as a wall
+    """
+    outside = (np.abs(xs) > map.width / 2) | (np.abs(ys) > map.height / 2)
+    return outside | map.are_inside_obstacles(xs, ys)
+
+
+def random_points(map, n):
+    """ n uniformly random points within the map boundaries, as arrays xs, ys
+    """
+    xs = np.random.uniform(-map.width / 2, map.width / 2, n)
+    ys = np.random.uniform(-map.height / 2, map.height / 2, n)
+    return xs, ys
+
+
+class UniformSampler:
+    """ Uniform samples over the map, rejecting those inside obstacles
+    """
+
+    def __call__(self, map):
+        while True:
+            x = np.random.uniform(-map.width / 2, map.width / 2)
+            y = np.random.uniform(-map.height / 2, map.height / 2)
+            rand_node = Node((x, y))
+            if not map.is_inside_obstacles(rand_node):
+                return rand_node
+
+
+class GoalBiasSampler:
+    """ Returns a goal with probability goal_bias and a sample of base otherwise
+    """
+
+    def __init__(self, goal_bias=0.05, base=None):
+        self.goal_bias = goal_bias
+        self.base = base if base is not None else UniformSampler()
+
+    def __call__(self, map):
+        goals = map.get_goals()
+        if goals and np.random.uniform() < self.goal_bias:
+            goal = goals[np.random.randint(len(goals))]
+            # a fresh node, the goal itself is linked into the tree by Map.add_path
+            return Node((goal.x, goal.y))
+        return self.base(map)
+
+
+class GaussianSampler:
+    """ Gaussian sampling: draws a uniform point and a second one at normally
+        distributed offset sigma, and keeps the free one when exactly one of them
+        is blocked. Samples gather along obstacle boundaries.
+    """
+
+    def __init__(self, sigma=0.1, batch_size=256, max_batches=20):
+        self.sigma = sigma
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+
+    def __call__(self, map):
+        for _ in range(self.max_batches):
+            xs1, ys1 = random_points(map, self.batch_size)
+            xs2 = xs1 + np.random.normal(0, self.sigma, self.batch_size)
+            ys2 = ys1 + np.random.normal(0, self.sigma, self.batch_size)
+            blocked1, blocked2 = are_blocked(map, xs1, ys1), are_blocked(map, xs2, ys2)
+            hits = np.flatnonzero(blocked1 != blocked2)
+            if len(hits) > 0:
+                i = hits[0]
+                if blocked1[i]:
+                    return Node((float(xs2[i]), float(ys2[i])))
+                return Node((float(xs1[i]), float(ys1[i])))
+        # nothing close to an obstacle, e.g. an empty map
+        return UniformSampler()(map)
+
+
+class BridgeSampler:
+    """ Bridge test: draws two blocked points at normally distributed offset sigma
+        and keeps their midpoint if it is free. Samples gather in gaps narrower
+        than a few sigma, i.e. in narrow passages.
+    """
+
+    def __init__(self, sigma=0.15, batch_size=1024, max_batches=20):
+        self.sigma = sigma
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+
+    def __call__(self, map):
+        for _ in range(self.max_batches):
+            xs1, ys1 = random_points(map, self.batch_size)
+            xs2 = xs1 + np.random.normal(0, self.sigma, self.batch_size)
+            ys2 = ys1 + np.random.normal(0, self.sigma, self.batch_size)
+            xs_mid, ys_mid = (xs1 + xs2) / 2, (ys1 + ys2) / 2
+            bridges = are_blocked(map, xs1, ys1) & are_blocked(map, xs2, ys2) & ~are_blocked(map, xs_mid, ys_mid)
+            hits = np.flatnonzero(bridges)
+            if len(hits) > 0:
+                return Node((float(xs_mid[hits[0]]), float(ys_mid[hits[0]])))
+        # no narrow passage found
+        return UniformSampler()(map)
+
+
+class MixedSampler:
+    """ Picks one of several samplers at random for every sample
+
+        Arguments:
+        samplers -- list of (weight, sampler) pairs
+    """
+
+    def __init__(self, samplers):
+        self.samplers = [sampler for _, sampler in samplers]
+        weights = np.array([weight for weight, _ in samplers], dtype=float)
+        self.probabilities = weights / weights.sum()
+
+    def __call__(self, map):
+        return self.samplers[np.random.choice(len(self.samplers), p=self.probabilities)](map)
+
+
+def make_sampler(name):
+    """ Sampler configurations by name, for the benchmark and the command line
+    """
+    if name == 'uniform':
+        return UniformSampler()
+    if name == 'goal':
+        return GoalBiasSampler(0.05)
+    if name == 'gaussian':
+        return GoalBiasSampler(0.05, MixedSampler([(0.5, UniformSampler()), (0.5, GaussianSampler())]))
+    if name == 'bridge':
+        return GoalBiasSampler(0.05, MixedSampler([(0.5, UniformSampler()), (0.5, BridgeSampler())]))
+    raise ValueError('unknown sampler: %s' % name)
+
+
+SAMPLERS = ['uniform', 'goal', 'gaussian', 'bridge']
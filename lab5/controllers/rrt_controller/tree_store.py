@@ -0,0 +1,162 @@
+import numpy as np
+
+
+class TreeStore:
+    """Array backed RRT tree.
+
+        Vertices live in parallel arrays (coordinates, parent index, cost-to-come)
+        that grow by doubling, instead of one Node object per vertex. Vertices are
+        referred to by index; node() wraps an index in a NodeView that reads and
+        writes the arrays and can stand in for a Node.
+
+        Attributes:
+        x, y -- float64 coordinates
+        parent -- int32 index of the parent vertex, -1 for a root
+        cost -- float64 cost-to-come, maintained by RRT*
+        Only the first len(self) entries are in use.
+    """
+
+    def __init__(self, capacity=1024):
+        self._size = 0
+        self.x = np.empty(capacity, dtype=np.float64)
+        self.y = np.empty(capacity, dtype=np.float64)
+        self.parent = np.empty(capacity, dtype=np.int32)
+        self.cost = np.empty(capacity, dtype=np.float64)
+
+    def __len__(self):
+        return self._size
+
+    def _grow(self):
+        capacity = 2 * len(self.x)
+        for name in ('x', 'y', 'parent', 'cost'):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+
+    def add(self, x, y, parent=-1, cost=0.):
+        """Add a vertex and return its index
+        """
+        if self._size == len(self.x):
+            self._grow()
+        index = self._size
+        self.x[index] = x
+        self.y[index] = y
+        self.parent[index] = parent
+        self.cost[index] = cost
+        self._size += 1
+        return index
+
+    def clear(self):
+        self._size = 0
+
+    def clear_parents(self):
+        """Detach every vertex, keeping the vertices
+        """
+        self.parent[:self._size] = -1
+
+    def node(self, index):
+        return NodeView(self, index)
+
+    def path_to(self, index):
+        """Indices of the vertices from the root to index, by walking the parents
+        """
+        path = [index]
+        parent = self.parent
+        while parent[path[-1]] >= 0:
+            path.append(int(parent[path[-1]]))
+        return path[::-1]
+
+    def root_of(self, index):
+        parent = self.parent
+        while parent[index] >= 0:
+            index = int(parent[index])
+        return index
+
+    def coords(self):
+        """Coordinates of the vertices, a (N, 2) array
+        """
+        return np.stack([self.x[:self._size], self.y[:self._size]], axis=1)
+
+    def edges(self):
+        """(parent index, child index) arrays of all edges
+        """
+        children = np.flatnonzero(self.parent[:self._size] >= 0)
+        return self.parent[children].astype(int), children
+
+
+class NodeView:
+    """A vertex of a TreeStore, with the attributes of a Node (coord, x, y,
+       parent, cost). Views of the same vertex compare equal.
+    """
+    __slots__ = ('store', 'index')
+
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+
+    @property
+    def x(self):
+        return float(self.store.x[self.index])
+
+    @property
+    def y(self):
+        return float(self.store.y[self.index])
+
+    @property
+    def coord(self):
+        return (self.x, self.y)
+
+    @property
+    def parent(self):
+        parent = int(self.store.parent[self.index])
+        return NodeView(self.store, parent) if parent >= 0 else None
+
+    @parent.setter
+    def parent(self, node):
+        self.store.parent[self.index] = node.index if node is not None else -1
+
+    @property
+    def cost(self):
+        return float(self.store.cost[self.index])
+
+    @cost.setter
+    def cost(self, value):
+        self.store.cost[self.index] = value
+
+    def __getitem__(self, key):
+        assert (key == 0 or key == 1)
+        return self.coord[key]
+
+    def __eq__(self, other):
+        return isinstance(other, NodeView) and other.store is self.store and other.index == self.index
+
+    def __hash__(self):
+        return hash((id(self.store), self.index))
+
+    def __repr__(self):
+        return 'NodeView(%d, %r)' % (self.index, self.coord)
+
+
+class TreeNodes:
+    """Read-only sequence of NodeViews over all vertices of a TreeStore
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def __len__(self):
+        return len(self.store)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.store.node(i) for i in range(*index.indices(len(self.store)))]
+        if index < 0:
+            index += len(self.store)
+        if not 0 <= index < len(self.store):
+            raise IndexError('tree node index out of range')
+        return self.store.node(index)
+
+    def __iter__(self):
+        for index in range(len(self.store)):
+            yield self.store.node(index)
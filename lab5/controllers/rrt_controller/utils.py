@@ -9,6 +9,7 @@ class Node(object):
         super(Node, self).__init__()
         self.coord = coord    # 2D coordinate of the node in the map
         self.parent = parent  # parent node in the RRT tree
+        self.cost = 0.        # cost-to-come from the start, kept up to date by RRT*
 
     @property
     def x(self):
@@ -1,47 +1,92 @@
+import contextlib
+import io
+import random
 import sys
+import time
+import numpy as np
 from grid import Grid
 from robot import Robot_Sim
-from robot_gui import RobotEnv, RobotEnvThread
-from concurrent.futures import ThreadPoolExecutor
+from fast_forward import FastForwardEnv
+from concurrent.futures import ProcessPoolExecutor
 import re
 
-def grade(maps, program_state, time_limit, point_per_map):
-    print("Grader running...\n")
-    points = 0
+# Every map is graded in its own process, so maps do not share the GIL and the
+# time limit is CPU time of that process rather than wall clock time, which other
+# maps could eat into. Runs are seeded, headless and fast forwarded between
+# decision points (see fast_forward.py), which finds the same markers on the same ticks.
+
+
+def run_map(map, program_state, time_limit, seed):
+    """ Explore one map until all markers are found, an exception or time_limit CPU seconds
 
-    threads = []
+        Returns:
+        dict record: map, seed, markers (found), markers_total, ticks, cpu_time, wall_time,
+        replans (frontier planning runs), plans (grid plans around obstacles), rrt_calls,
+        collision_checks, timed_out and error (the exception message or None)
+    """
+    random.seed(seed)
+    np.random.seed(seed)
+    grid = Grid(map)
+    robot_init_pose = grid.start
+    robbie = Robot_Sim(*robot_init_pose)
+    robot_env = FastForwardEnv(robbie, grid, testing=True)
+    robot_env.program_state = program_state
+    error = None
+    timed_out = False
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        while len(robbie.markers_found_or_picked) < grid.LANDMARKS_TOTAL:
+            try:
+                robot_env.update()
+            except Exception as e:
+                error = str(e)
+                break
+            if time.process_time() - cpu_start > time_limit:
+                timed_out = True
+                break
+    return {'map': map, 'seed': seed, 'markers': len(robbie.markers_found_or_picked),
+            'markers_total': grid.LANDMARKS_TOTAL, 'ticks': robot_env.ticks,
+            'cpu_time': time.process_time() - cpu_start, 'wall_time': time.perf_counter() - wall_start,
+            'replans': robbie.frontier_plans, 'plans': grid.plan_calls, 'rrt_calls': grid.rrt_calls,
+            'collision_checks': grid.collision_checks, 'timed_out': timed_out, 'error': error}
 
-    for map in maps:
-        grid = Grid(map)
-        robot_init_pose = grid.start
-        robbie = Robot_Sim(*robot_init_pose)
-        robot_env = RobotEnv(robbie, grid, testing=True)
-        robot_env.program_state = program_state
-        robot_thread = RobotEnvThread(robot_env, testing=True, time_limit=time_limit)
-        threads.append(robot_thread)
 
-    with ThreadPoolExecutor() as executor:
-        futures = [executor.submit(thread.run) for thread in threads]
-        results = [f.result() for f in futures]
-        for i, result in enumerate(results):
-            marker_list, num_total_markers = result
-            point = point_per_map * (len(marker_list) / num_total_markers)
-            print(maps[i] + ": " + str(round(point,2)) + "/" + str(point_per_map) + " points")
-            points += point
-        print("\nScore = " + str(points) + "/" + str(float(point_per_map * len(results))) + "\n")
+def grade(maps, program_state, time_limit, point_per_map, seed=0, processes=None):
+    print("Grader running...\n")
+    points = 0
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = [executor.submit(run_map, map, program_state, time_limit, seed) for map in maps]
+        records = [f.result() for f in futures]
+    for record in records:
+        if record['error'] is not None:
+            print(f"Exception in {record['map']}: {record['error']}! Run terminated.")
+        if record['timed_out']:
+            print(f"Run time exceeds {time_limit:.2f} CPU seconds.")
+        point = point_per_map * (record['markers'] / record['markers_total'])
+        print(record['map'] + ": " + str(round(point,2)) + "/" + str(point_per_map) + " points")
+        print("    seed %d, %d/%d markers, %d ticks, %.2f s CPU, %.2f s wall, %d replans, %d plans, %d RRT calls"
+              % (record['seed'], record['markers'], record['markers_total'], record['ticks'], record['cpu_time'],
+                 record['wall_time'], record['replans'], record['plans'], record['rrt_calls']))
+        points += point
+    print("\nScore = " + str(points) + "/" + str(float(point_per_map * len(records))) + "\n")
+    return records
             
 if __name__ == "__main__":
     
     maps = ["maps/maze1.json", "maps/maze2.json", "maps/maze3.json"]
     
     time_limit = 120
+    seed = 0
 
     if len(sys.argv) > 1:
         test = "exploration"
         if len(sys.argv) >= 2:
             maps = [sys.argv[1]]
+        if len(sys.argv) >= 3:
+            seed = int(sys.argv[2])
     else:
-        print("Correct usage: python3 autograder.py [map_filepath]")
+        print("Correct usage: python3 autograder.py [map_filepath] [seed]")
         exit(1)
 
     ## Check for use of grid.markers() ##
@@ -61,5 +106,5 @@ if __name__ == "__main__":
         print(f"'{string_to_check}' present in the file. Invalid submission for exploration.py")
     else:
         if test == "exploration":
-            grade(maps, test, time_limit, 12.5)
+            grade(maps, test, time_limit, 12.5, seed)
 
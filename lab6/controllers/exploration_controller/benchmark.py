@@ -0,0 +1,96 @@
+import json
+import random
+import sys
+import time
+import tracemalloc
+import numpy as np
+from grid import Grid
+
+""" Grid planner benchmark: for every map and seed, plan from the map start to a
+    random free place, drawn from the seeded random module like the rest of the
+    planner, with Grid.rrt and with Grid.plan (A*, what exploration uses). One
+    record per planner, map and seed, written to stdout as JSON for
+    benchmarks/run.py at the repository root; nodes is the tree size for rrt
+    and the cells expanded for A*. Peak memory comes from a second, traced run
+    with the same seed, so tracing does not slow down the timed one.
+
+    Usage: python benchmark.py [num_seeds] [map_file ...]
+"""
+
+
+# planner name -> sampler name of its records
+PLANNERS = {'rrt': 'goal', 'astar': 'none'}
+
+
+def plan_record(map_file, seed, planner='rrt'):
+    """ Plan once and return a benchmark record, see run_json
+    """
+    random.seed(seed)
+    np.random.seed(seed)
+    grid = Grid(map_file)
+    start = (grid.start[0], grid.start[1])
+    goal = grid.random_free_place()
+    if planner == 'astar':
+        return astar_record(map_file, seed, grid, start, goal)
+    began = time.perf_counter()
+    path = grid.rrt(start, goal)
+    elapsed = time.perf_counter() - began
+    solved = bool(path) and path[-1].xy == (goal[0], goal[1])
+    report = grid.smoothing_report
+    # Grid.rrt returns a single path, so the first solution is the last
+    return {'map': map_file, 'planner': 'rrt', 'sampler': PLANNERS['rrt'], 'seed': seed,
+            'solved': solved,
+            'time_to_first_solution': elapsed if solved else None,
+            'time': elapsed,
+            'nodes': grid.rrt_nodes if solved else None,
+            'collision_checks': grid.collision_checks,
+            'path_length': report.original_length if solved else None,
+            'smoothed_length': report.length if solved else None}
+
+
+def astar_record(map_file, seed, grid, start, goal):
+    """ plan_record of Grid.plan, from start to goal on a fresh grid
+    """
+    began = time.perf_counter()
+    path = grid.plan(start, goal)
+    elapsed = time.perf_counter() - began
+    solved = bool(path)
+    report = grid.smoothing_report
+    return {'map': map_file, 'planner': 'astar', 'sampler': PLANNERS['astar'], 'seed': seed,
+            'solved': solved,
+            'time_to_first_solution': elapsed if solved else None,
+            'time': elapsed,
+            'nodes': grid.plan_nodes,
+            'collision_checks': grid.collision_checks,
+            'path_length': report.original_length if solved else None,
+            'smoothed_length': report.length if solved else None}
+
+
+def peak_memory(map_file, seed, planner='rrt'):
+    """ Peak traced memory in bytes of the same run as plan_record
+    """
+    tracemalloc.start()
+    try:
+        plan_record(map_file, seed, planner)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_json(map_files, num_seeds):
+    records = []
+    for planner in PLANNERS:
+        for map_file in map_files:
+            for seed in range(num_seeds):
+                record = plan_record(map_file, seed, planner)
+                record['peak_memory'] = peak_memory(map_file, seed, planner)
+                records.append(record)
+    json.dump({'lab': 'lab6', 'records': records}, sys.stdout, indent=1)
+    print()
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    num_seeds = int(args[0]) if len(args) > 0 else 10
+    map_files = args[1:] if len(args) > 1 else ['maze1.json', 'maze2.json', 'maze3.json']
+    run_json(map_files, num_seeds)
@@ -0,0 +1,134 @@
+import math
+import numpy as np
+
+""" Segment against occupied cell tests on the occupancy bitmap of a Grid.
+
+    A segment collides if it has a point in the closed square [x, x + 1] x
+    [y, y + 1] of an occupied cell (x, y), so touching an obstacle counts, like
+    the line tests these replace. Only the cells along the segment are looked
+    at: for every column of cells the segment crosses, the rows spanned by the
+    segment within that column. This is an exact supercover traversal, with no
+    line equation, so vertical and zero length segments need no special casing.
+    Cells outside the grid are free.
+
+    first_blocked_cell validates motion instead: a point is in the cell it
+    floors to, and the cells outside the grid are blocked, like Grid.is_free
+    per point. It visits the cells of the swept segment in the order they are
+    entered.
+
+    The bitmap is indexed [x, y], True where occupied.
+"""
+
+
+def _row_span(lo, hi, height):
+    # rows whose closed squares meet [lo, hi], clipped to the grid
+    return max(math.ceil(lo) - 1, 0), min(math.floor(hi), height - 1)
+
+
+def segment_collides(occupancy, p1, p2):
+    """ Whether the segment from p1 to p2 (x, y) meets an occupied cell
+    """
+    width, height = occupancy.shape
+    x1, y1 = float(p1[0]), float(p1[1])
+    x2, y2 = float(p2[0]), float(p2[1])
+    min_x, max_x = min(x1, x2), max(x1, x2)
+    slope = (y2 - y1) / (x2 - x1) if x2 != x1 else None
+    for cx in range(max(math.ceil(min_x) - 1, 0), min(math.floor(max_x), width - 1) + 1):
+        if slope is None:
+            ya, yb = y1, y2
+        else:
+            ya = y1 + (max(cx, min_x) - x1) * slope
+            yb = y1 + (min(cx + 1, max_x) - x1) * slope
+        r0, r1 = _row_span(min(ya, yb), max(ya, yb), height)
+        if r0 <= r1 and occupancy[cx, r0:r1 + 1].any():
+            return True
+    return False
+
+
+def _expand(first, last):
+    # (owner, value) of all value in [first[k], last[k]] for every k, empty ranges skipped
+    counts = np.maximum(last - first + 1, 0)
+    owner = np.repeat(np.arange(len(first)), counts)
+    starts = np.cumsum(counts) - counts
+    return owner, first[owner] + np.arange(len(owner)) - starts[owner]
+
+
+def segments_collide(occupancy, starts, ends):
+    """ segment_collides for many segments in a few numpy passes
+
+        Arguments:
+        occupancy -- bool array indexed [x, y], True where occupied
+        starts, ends -- segment end points, arrays of shape (B, 2)
+
+        Returns:
+        bool array of shape (B,)
+    """
+    width, height = occupancy.shape
+    starts = np.asarray(starts, dtype=float).reshape(-1, 2)
+    ends = np.asarray(ends, dtype=float).reshape(-1, 2)
+    x1, y1, x2, y2 = starts[:, 0], starts[:, 1], ends[:, 0], ends[:, 1]
+    min_x, max_x = np.minimum(x1, x2), np.maximum(x1, x2)
+    vertical = x2 == x1
+    slope = np.where(vertical, 0., (y2 - y1) / np.where(vertical, 1., x2 - x1))
+
+    # one entry per (segment, column)
+    first = np.maximum(np.ceil(min_x).astype(int) - 1, 0)
+    last = np.minimum(np.floor(max_x).astype(int), width - 1)
+    segment, cx = _expand(first, last)
+    ya = np.where(vertical[segment], y1[segment], y1[segment] + (np.maximum(cx, min_x[segment]) - x1[segment]) * slope[segment])
+    yb = np.where(vertical[segment], y2[segment], y1[segment] + (np.minimum(cx + 1, max_x[segment]) - x1[segment]) * slope[segment])
+
+    # one entry per (segment, column, row)
+    first = np.maximum(np.ceil(np.minimum(ya, yb)).astype(int) - 1, 0)
+    last = np.minimum(np.floor(np.maximum(ya, yb)).astype(int), height - 1)
+    column, cy = _expand(first, last)
+    hits = occupancy[cx[column], cy]
+
+    result = np.zeros(len(starts), dtype=bool)
+    result[segment[column[hits]]] = True
+    return result
+
+
+def first_blocked_cell(occupancy, p1, p2):
+    """ First cell the motion from p1 to p2 (x, y) enters that is occupied or outside the grid
+
+        The segment is cut where it crosses the grid lines; the cells of the cut
+        points and of the midpoints between them are all the cells it passes
+        through, in order, and are checked in one numpy pass.
+
+        Returns:
+        (x, y) of that cell, None if the motion is free
+    """
+    width, height = occupancy.shape
+    x1, y1 = float(p1[0]), float(p1[1])
+    x2, y2 = float(p2[0]), float(p2[1])
+    dx, dy = x2 - x1, y2 - y1
+    # grid line crossings as (t, x, y), with the crossed coordinate exact
+    t, xs, ys = [np.array([0., 1.])], [np.array([x1, x2])], [np.array([y1, y2])]
+    if dx != 0:
+        lines = np.arange(math.ceil(min(x1, x2)), math.floor(max(x1, x2)) + 1, dtype=float)
+        t.append((lines - x1) / dx)
+        xs.append(lines)
+        ys.append(y1 + t[-1] * dy)
+    if dy != 0:
+        lines = np.arange(math.ceil(min(y1, y2)), math.floor(max(y1, y2)) + 1, dtype=float)
+        t.append((lines - y1) / dy)
+        xs.append(x1 + t[-1] * dx)
+        ys.append(lines)
+    t, xs, ys = np.concatenate(t), np.concatenate(xs), np.concatenate(ys)
+    order = np.argsort(t, kind='stable')
+    t, xs, ys = t[order], xs[order], ys[order]
+    # interleave the cut points with the midpoints of the pieces between them
+    mid = (t[:-1] + t[1:]) / 2
+    px = np.empty(2 * len(t) - 1)
+    py = np.empty(2 * len(t) - 1)
+    px[0::2], py[0::2] = xs, ys
+    px[1::2], py[1::2] = x1 + mid * dx, y1 + mid * dy
+    cx, cy = np.floor(px).astype(int), np.floor(py).astype(int)
+    inside = (cx >= 0) & (cx < width) & (cy >= 0) & (cy < height)
+    blocked = ~inside
+    blocked[inside] = occupancy[cx[inside], cy[inside]]
+    if not blocked.any():
+        return None
+    k = int(np.argmax(blocked))
+    return int(cx[k]), int(cy[k])
@@ -1,7 +1,14 @@
 from robot import Robot_Sim
 from utils import *
+from frontier import FrontierTracker
+from reachability import rank_frontiers
 import math
 
+# distance at which the robot has reached its next coordinate
+ARRIVAL_THRESHOLD = 0.5
+# bearing error in radians above which the robot turns in place before it moves
+TURN_THRESHOLD = 0.1
+
 def get_wheel_velocities(robbie, coord):
     """
     Helper function to determine the velocities of the robot's left and right wheels.
@@ -21,7 +28,7 @@ def get_wheel_velocities(robbie, coord):
     
     # Turn in place first
     angle = math.atan2(dy_robot, dx_robot)
-    threshold = 0.1
+    threshold = TURN_THRESHOLD
     if angle < -threshold:
         return -0.01, 0.01
     elif angle > threshold:
@@ -66,28 +73,28 @@ def frontier_planning(robbie, grid):
     """
     ## TODO: STUDENT CODE START ##
 
-    # Get all frontier cells based on what's adjacent to explored cells and not an obstacle
-    frontier_cells = []
-    for x in range(grid.width):
-        for y in range(grid.height):
-            if grid.is_free(x, y) and (x, y) not in robbie.explored_cells:
-                neighbors = get_neighbors((x, y))
-                if any((nx, ny) in robbie.explored_cells and grid.is_free(nx, ny) for nx, ny in neighbors):
-                    frontier_cells.append((x, y))    
-    # Separate the adjacenct cells into separate frontiers
-    clusters = separate_adjacent_coordinates(frontier_cells, grid)
-    # Compute the centroids of the frontiers
-    centroids = [find_centroid(cluster) for cluster in clusters if cluster]
-    # Pick a centroid based on some heuristic such as sorting the centroids based on their distances to the robbie's current position
-    centroids.sort(key=lambda c: grid_distance(robbie.x, robbie.y, c[0], c[1]))
-    # Choose the centroid which is not same as robot's position and the centoid is not in obstacle
-    for centroid in centroids:
-        path = grid.rrt((robbie.x, robbie.y), centroid)
-        if path:  # If a path is found, set this as the next target
-            robbie.next_coord = centroid
-            break   
+    robbie.frontier_plans += 1
+    # Frontier cells are free cells adjacent to explored cells and not explored themselves.
+    # The tracker keeps them and their frontiers (clusters of adjacent frontier cells) up
+    # to date from the cells explored since the last replan, see frontier.py
+    if robbie.frontier is None or robbie.frontier.grid is not grid:
+        robbie.frontier = FrontierTracker(grid)
+    robbie.frontier.sync(robbie)
+    # Rank the frontiers by path cost through the known cells, information gain and turning,
+    # with one distance field from the robot's cell per replan, see reachability.py.
+    # Targets are the centroids, or the closest frontier cell where a centroid is out of reach
+    ranked = rank_frontiers(robbie, robbie.frontier)
+    # Choose the best target which is not same as robot's position
+    for _, target in ranked:
+        # a frontier curled around the robot has its centroid where the robot already is,
+        # reaching it would not explore anything
+        if grid_distance(robbie.x, robbie.y, target[0], target[1]) < ARRIVAL_THRESHOLD:
+            continue
+        robbie.next_coord = target
+        break
     # In case no centroid is chosen, pick a random point from the frontier
     else:
+        frontier_cells = robbie.frontier.frontier_cells()
         if frontier_cells:
             robbie.next_coord = random.choice(frontier_cells)
         else:
@@ -125,7 +132,7 @@ def exploration_state_machine(robbie, grid):
     ### TODO: STUDENT CODE START ###
 
     # Sensing: Get the free space in robot's current FOV
-    threshold = 0.5
+    threshold = ARRIVAL_THRESHOLD
 
     if robbie.next_coord:
         distance_to_next = math.sqrt((robbie.x - robbie.next_coord[0])**2 + (robbie.y - robbie.next_coord[1])**2)
@@ -137,9 +144,9 @@ def exploration_state_machine(robbie, grid):
     if robbie.next_coord is None or distance_to_next < threshold:
         robbie, robbie.next_coord = frontier_planning(robbie, grid)    
 
-    # If moving to next coordinate results in a collision, then perform RRT and set that as the next coord. 
+    # If moving to next coordinate results in a collision, then plan a path on the grid and set its first waypoint as the next coord.
     if robbie.next_coord and grid.is_collision_with_obstacles((robbie.x, robbie.y), robbie.next_coord):
-        path = grid.rrt((robbie.x, robbie.y), robbie.next_coord)
+        path = grid.plan((robbie.x, robbie.y), robbie.next_coord)
         if path and len(path) > 1:
             robbie.next_coord = path[1]    
     # Now that you know the next coordinate, set Robbie's wheel velocities
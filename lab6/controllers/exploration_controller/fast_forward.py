@@ -0,0 +1,255 @@
+import contextlib
+import io
+import math
+import random
+import sys
+import time
+import numpy as np
+from grid import Grid
+from robot import Robot_Sim
+from robot_gui import RobotEnv
+from collision import segments_collide, first_blocked_cell
+from exploration import get_wheel_velocities, ARRIVAL_THRESHOLD, TURN_THRESHOLD
+from utils import rotate_point
+
+""" Fast-forward headless exploration.
+
+    Between replans exploration_state_machine only steers the robot towards
+    next_coord. FastForwardEnv runs those ticks without it, up to the next
+    event, which is left to a full tick of RobotEnv:
+
+      - next_coord within ARRIVAL_THRESHOLD (frontier planning),
+      - an obstacle between the robot and next_coord (replanning),
+      - a motion into an occupied cell (the full tick raises),
+      - and the last marker found, which ends the exploration.
+
+    An in-place turn is one step: the bearing error closes by the same angle on
+    every tick, so the number of ticks comes from the error, TURN_THRESHOLD and
+    the turn rate. The moves take a few float operations per tick, with the pose
+    arithmetic of Robot_Sim.move_diff_drive; only the ticks that cross a grid
+    line check the motion against the obstacles, since within a cell it cannot
+    meet one. The FOV of all the positions in one cell is rasterized and marked
+    explored in one numpy pass (Robot_Sim.fov_sweep), the cells seen from there
+    being the same. Poses, the cells explored, in order, and the markers found,
+    tick for tick, are the same as with RobotEnv.
+
+    Usage: python fast_forward.py [num_seeds] [map_file ...]
+        explores every map with RobotEnv and FastForwardEnv, checks that they find
+        the markers on the same ticks and end at the same pose, and reports the speedup
+"""
+
+# ticks one fast forward runs at most, so that callers still get to check their time limits
+MAX_TICKS = 1000
+
+
+class Pose:
+    """ A robot pose for get_wheel_velocities, which reads it like a Robot_Sim
+    """
+
+    def __init__(self, x, y, h, wheel_dist):
+        self.x, self.y = x, y
+        self.h = h % 360
+        self.wheel_dist = wheel_dist
+
+
+def turn_ticks(robbie, pose, coord, velocities, dt):
+    """ Ticks of the in-place turn that starts at pose (x, y, h), and the heading it ends with
+
+        The count follows from the bearing error in closed form and is then checked
+        with get_wheel_velocities at the headings on either side of the end of the
+        turn. The headings are summed tick by tick like Robot_Sim.turn_in_place does,
+        so the end heading is exactly the one of a tick by tick run.
+    """
+    x, y, h = pose
+    vr, vl = velocities
+    step = robbie.heading_step(vl, vr, dt)
+    dx, dy = rotate_point(coord[0] - x, coord[1] - y, h % 360)
+    error = abs(math.atan2(dy, dx))
+    ticks = max(math.ceil((error - TURN_THRESHOLD) / abs(math.radians(step))), 1)
+    headings = [h]
+
+    def turning(tick):
+        while len(headings) <= tick:
+            headings.append(headings[-1] + step)
+        return get_wheel_velocities(Pose(x, y, headings[tick], robbie.wheel_dist), coord) == velocities
+
+    while ticks > 1 and not turning(ticks - 1):
+        ticks -= 1
+    while turning(ticks):
+        ticks += 1
+    return ticks, headings[ticks]
+
+
+def markers_seen(grid, sweep):
+    """ Bool array indexed [k, m], True where grid.markers[m] is in FOV from position k of a sweep
+    """
+    cols, rows, visible = sweep
+    seen = np.zeros((len(visible), len(grid.markers)), dtype=bool)
+    for m, (m_x, m_y, _) in enumerate(grid.markers):
+        i, j = m_x - cols[0], m_y - rows[0]
+        if 0 <= i < len(cols) and 0 <= j < len(rows):
+            seen[:, m] = visible[:, i, j]
+    return seen
+
+
+class FastForwardEnv(RobotEnv):
+    """ RobotEnv whose update also runs the ticks up to the next event, see fast_forward
+
+        Attributes:
+        ticks -- ticks run so far, the fast forwarded ones included
+        skipped -- ticks run by fast_forward
+        found_on -- the tick each marker count was reached on
+    """
+
+    def __init__(self, robbie, grid, program_state='exploration', testing=False):
+        super().__init__(robbie, grid, program_state, testing)
+        self.ticks = 0
+        self.skipped = 0
+        self.found_on = []
+
+    def update(self):
+        super().update()
+        self.ticks += 1
+        self._note_found(self.ticks)
+        if self.program_state == 'exploration' \
+                and len(self.robbie.markers_found_or_picked) < self.grid.LANDMARKS_TOTAL:
+            ticks = self.fast_forward()
+            self.ticks += ticks
+            self.skipped += ticks
+
+    def _note_found(self, tick):
+        while len(self.found_on) < len(self.robbie.markers_found_or_picked):
+            self.found_on.append(tick)
+
+    def fast_forward(self):
+        """ Run the ticks on which exploration_state_machine only steers, up to the next event
+
+            Returns:
+            number of ticks run
+        """
+        robbie, grid = self.robbie, self.grid
+        coord = robbie.next_coord
+        if not coord:
+            return 0
+        dt = robbie.TIMESTEP
+        x, y, h = robbie.xyh
+        cell = (math.floor(x), math.floor(y))
+        ticks = 0
+        velocities = None
+        # (tick, x, y, h, velocities, cell) after every tick that moved the robot
+        moves = []
+        # the state before every step, a tick or a whole turn, to go back to if the way
+        # to next_coord turns out to be blocked at its start
+        states = []
+        motion_checks = 0
+        while ticks < MAX_TICKS:
+            if math.sqrt((x - coord[0])**2 + (y - coord[1])**2) < ARRIVAL_THRESHOLD:
+                break
+            states.append((ticks, x, y, h, velocities, len(moves)))
+            step_velocities = get_wheel_velocities(Pose(x, y, h, robbie.wheel_dist), coord)
+            vr, vl = step_velocities
+            if vl + vr == 0:
+                turn, h = turn_ticks(robbie, (x, y, h), coord, step_velocities, dt)
+                ticks += turn
+            else:
+                next_h = h + robbie.heading_step(vl, vr, dt)
+                dx, dy = robbie.step_offset(vl, vr, dt, next_h)
+                next_cell = (math.floor(x + dx), math.floor(y + dy))
+                if next_cell != cell:
+                    # within a cell the motion cannot meet an obstacle, into another one it can,
+                    # and a blocked one is left to the full tick, which raises
+                    motion_checks += 1
+                    if first_blocked_cell(grid.occupancy, (x, y), (x + dx, y + dy)) is not None:
+                        break
+                    cell = next_cell
+                x, y, h = x + dx, y + dy, next_h
+                ticks += 1
+                moves.append((ticks, x, y, h, step_velocities, cell))
+            velocities = step_velocities
+        # the obstacle checks of all the steps in one batch
+        starts = [(state[1], state[2]) for state in states]
+        blocked = segments_collide(grid.occupancy, starts, [(coord[0], coord[1])] * len(starts))
+        # the segments actually tested, fewer than the ticks run since a turn is checked once
+        grid.collision_checks += len(starts) + motion_checks
+        if blocked.any():
+            ticks, x, y, h, velocities, num_moves = states[int(np.argmax(blocked))]
+            del moves[num_moves:]
+        if not ticks:
+            return 0
+
+        if moves:
+            # one FOV sweep per cell the robot passes through
+            sweeps, seen = [], []
+            start = 0
+            for end in range(1, len(moves) + 1):
+                if end < len(moves) and moves[end][5] == moves[start][5]:
+                    continue
+                group = moves[start:end]
+                sweep = robbie.fov_sweep(grid, [move[1] for move in group], [move[2] for move in group])
+                sweeps.append((sweep, len(group)))
+                seen.append(markers_seen(grid, sweep))
+                start = end
+            seen = np.concatenate(seen)
+            for k in np.nonzero(seen.any(axis=1))[0]:
+                marker_list = [(m_x, m_y, m_h) for (m_x, m_y, m_h), s in zip(grid.markers, seen[k]) if s]
+                self.record_markers(marker_list)
+                self._note_found(self.ticks + moves[k][0])
+                if len(robbie.markers_found_or_picked) >= grid.LANDMARKS_TOTAL:
+                    # exploration ends on this tick
+                    moves = moves[:k + 1]
+                    ticks, x, y, h, velocities, _ = moves[-1]
+                    break
+            remaining = len(moves)
+            for sweep, count in sweeps:
+                if remaining <= 0:
+                    break
+                robbie.mark_sweep(grid, sweep, min(count, remaining))
+                remaining -= count
+
+        robbie.place(x, y, h)
+        robbie.vr, robbie.vl = velocities
+        robbie.dt = dt
+        return ticks
+
+
+def explore(map_file, seed, fast_forward=True, time_limit=120):
+    """ Explore a map headless until all markers are found or time_limit seconds passed
+
+        Returns:
+        dict of the run: markers found, ticks, skipped ticks, seconds, the tick each marker
+        count was reached on, and the final pose
+    """
+    random.seed(seed)
+    np.random.seed(seed)
+    grid = Grid(map_file)
+    robbie = Robot_Sim(*grid.start)
+    robot_env = FastForwardEnv(robbie, grid, testing=True) if fast_forward else RobotEnv(robbie, grid, testing=True)
+    ticks = 0
+    found_on = []
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        while len(robbie.markers_found_or_picked) < grid.LANDMARKS_TOTAL \
+                and time.perf_counter() - start < time_limit:
+            robot_env.update()
+            ticks += 1
+            while len(found_on) < len(robbie.markers_found_or_picked):
+                found_on.append(ticks)
+    if fast_forward:
+        ticks, found_on = robot_env.ticks, robot_env.found_on
+    return {'markers': len(robbie.markers_found_or_picked), 'ticks': ticks,
+            'skipped': robot_env.skipped if fast_forward else 0,
+            'time': time.perf_counter() - start, 'found_on': found_on, 'pose': robbie.xyh}
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    num_seeds = int(args[0]) if len(args) > 0 else 3
+    map_files = args[1:] if len(args) > 1 else ['maze1.json', 'maze2.json', 'maze3.json']
+    for map_file in map_files:
+        for seed in range(num_seeds):
+            plain = explore(map_file, seed, fast_forward=False)
+            fast = explore(map_file, seed, fast_forward=True)
+            same = plain['found_on'] == fast['found_on'] and plain['pose'] == fast['pose']
+            print('%s seed %d: %d markers, %d ticks (%d skipped), %.2f s -> %.2f s, speedup %.2fx, %s'
+                  % (map_file, seed, fast['markers'], fast['ticks'], fast['skipped'], plain['time'], fast['time'],
+                     plain['time'] / fast['time'], 'same markers and ticks' if same else 'MISMATCH'))
@@ -0,0 +1,128 @@
+import numpy as np
+from grid_planner import neighbors
+from utils import cluster_coordinates
+
+# 4-neighbourhood of the frontier definition, the clusters use grid_planner.neighbors
+NEIGHBORS_4 = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+
+
+class FrontierTracker:
+    """
+    Frontier cells of the explored part of a grid, maintained incrementally.
+
+    A frontier cell is a free, unexplored cell with a free, explored cell among
+    its 4 neighbours; frontiers are the clusters of frontier cells that are
+    adjacent in the sense of utils.cluster_coordinates (8 neighbours,
+    no diagonal step past an obstacle). This is what a full scan of the grid in
+    exploration.frontier_planning used to compute on every replan.
+
+    The tracker reads the cells a Robot_Sim explored since the last update from
+    its explored_order log, so an update costs time in the number of new cells
+    and the size of the clusters they touch. Explored, frontier and cluster
+    label bitmaps are numpy arrays indexed [x, y]; every cluster keeps its cells,
+    its first cell in (x, y) order and its centroid.
+    """
+
+    def __init__(self, grid):
+        self.grid = grid
+        self.width, self.height = grid.width, grid.height
+        self.free = ~grid.occupancy
+        self.explored = np.zeros((self.width, self.height), dtype=bool)
+        self.frontier = np.zeros((self.width, self.height), dtype=bool)
+        # cluster of every frontier cell, -1 elsewhere
+        self.label = np.full((self.width, self.height), -1, dtype=np.int32)
+        self.clusters = {}
+        self.first = {}
+        self.centroids = {}
+        self._next_label = 0
+        # entries of robbie.explored_order already applied
+        self._cursor = 0
+
+    def _in(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def _adjacent(self, x, y):
+        """
+        Frontier cells adjacent to (x, y), see utils.cluster_coordinates
+        """
+        for cell, _ in neighbors(self.grid.occupancy, (x, y)):
+            if self.frontier[cell]:
+                yield cell
+
+    def sync(self, robbie):
+        """
+        Apply the cells robbie explored since the last call
+        """
+        cells = robbie.explored_order[self._cursor:]
+        self._cursor = len(robbie.explored_order)
+        self.update(cells)
+
+    def update(self, cells):
+        """
+        Mark cells as explored and update the frontier and its clusters
+
+            Arguments:
+            cells -- list of (x, y) grid cells, cells outside the grid or at fractional coordinates are ignored
+        """
+        added, removed = [], []
+        for x, y in cells:
+            if x != int(x) or y != int(y) or not self._in(int(x), int(y)):
+                continue
+            x, y = int(x), int(y)
+            if self.explored[x, y]:
+                continue
+            self.explored[x, y] = True
+            if self.frontier[x, y]:
+                self.frontier[x, y] = False
+                removed.append((x, y))
+            if not self.free[x, y]:
+                continue
+            for dx, dy in NEIGHBORS_4:
+                nx, ny = x + dx, y + dy
+                if self._in(nx, ny) and self.free[nx, ny] and not self.explored[nx, ny] and not self.frontier[nx, ny]:
+                    self.frontier[nx, ny] = True
+                    added.append((nx, ny))
+        if added or removed:
+            self._relabel(added, removed)
+
+    def _relabel(self, added, removed):
+        # clusters that lost cells may split and clusters next to new cells may merge,
+        # so their remaining cells and the new ones are clustered again; no other
+        # frontier cell is adjacent to those
+        affected = set(int(self.label[cell]) for cell in removed if self.label[cell] >= 0)
+        for x, y in added:
+            if self.frontier[x, y]:
+                affected.update(int(self.label[cell]) for cell in self._adjacent(x, y) if self.label[cell] >= 0)
+        seeds = [cell for cell in added if self.frontier[cell]]
+        for cell in removed:
+            self.label[cell] = -1
+        for label in affected:
+            for cell in self.clusters.pop(label):
+                if self.frontier[cell]:
+                    self.label[cell] = -1
+                    seeds.append(cell)
+            del self.first[label]
+            del self.centroids[label]
+
+        clusters, _, centroids = cluster_coordinates(seeds, self.grid)
+        for cluster, centroid in zip(clusters, centroids):
+            label = self._next_label
+            self._next_label += 1
+            for cell in cluster:
+                self.label[cell] = label
+            self.clusters[label] = cluster
+            self.first[label] = min(cluster)
+            self.centroids[label] = centroid
+
+    def frontier_cells(self):
+        """
+        All frontier cells in (x, y) order, a scan of the frontier bitmap
+        """
+        xs, ys = np.nonzero(self.frontier)
+        return list(zip(xs.tolist(), ys.tolist()))
+
+    def frontier_centroids(self):
+        """
+        Centroids of the frontiers, in the order of their first cells like separate_adjacent_coordinates
+        """
+        return [self.centroids[label] for label in sorted(self.clusters, key=self.first.get)]
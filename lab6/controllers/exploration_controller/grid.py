@@ -2,6 +2,10 @@ import json
 import random
 import math
 from utils import *
+from nn_index import PointIndex
+from smoothing import smooth_path
+import grid_planner
+import collision
 
 # grid map class
 class Grid:
@@ -26,6 +30,16 @@ class Grid:
             self.LANDMARKS_TOTAL = 5
             self.centroid = None
             self.fname = fname
+            # number of segments checked against the obstacles so far
+            self.collision_checks = 0
+            # number of rrt and plan calls so far
+            self.rrt_calls = 0
+            self.plan_calls = 0
+            # tree size of the last rrt call, cells expanded by the last plan call
+            # and SmoothedPath of the last rrt or plan call
+            self.rrt_nodes = 0
+            self.plan_nodes = 0
+            self.smoothing_report = None
 
             # . - empty square
             # O - occupied square
@@ -50,6 +64,11 @@ class Grid:
                         raise ValueError('Cannot parse file')
                     
             self.LANDMARKS_TOTAL = len(self.markers)
+            # occupancy bitmap indexed [x, y], for constant time is_free and is_occupied
+            # and the collision tests of collision.py
+            self.occupancy = np.zeros((self.width, self.height), dtype=bool)
+            for obs in self.occupied:
+                self.occupancy[obs[0], obs[1]] = True
             
 
     def is_in(self, x, y):
@@ -72,7 +91,7 @@ class Grid:
             return False
         yy = int(y) 
         xx = int(x)
-        return (xx, yy) not in self.occupied
+        return not self.occupancy[xx, yy]
     
     def is_occupied(self, x, y):
         """ Determine whether the cell is in the grid map and is in obstacle
@@ -84,7 +103,7 @@ class Grid:
             return False
         yy = int(y)
         xx = int(x)
-        return (xx, yy) in self.occupied
+        return bool(self.occupancy[xx, yy])
 
     def random_place(self):
         """ Return a random place in the map
@@ -130,26 +149,26 @@ class Grid:
         Returns:
             bool: 'True' if robot will collide with obstacles and 'False' if not
         """
-        m,c = find_line(p1, p2)
-        if m == math.inf:
-            m,c = find_line((p1[0]+0.001, p1[1]), p2)
-        max_x = max(p1[0], p2[0])
-        min_x= min(p1[0], p2[0])
-        max_y = max(p1[1], p2[1])
-        min_y= min(p1[1], p2[1])
+        self.collision_checks += 1
+        return collision.segment_collides(self.occupancy, p1, p2)
 
-        for obs in self.occupied:
-            # check if obstacle is in range of line segment
-            if obs[0]+1 < min_x or obs[0] > max_x or obs[1]+1 < min_y or obs[1] > max_y:
-                continue
-
-            left_obs_y = obs[0] * m + c
-            right_obs_y = (obs[0]+1) * m + c
-            if (left_obs_y >= obs[1] and left_obs_y <= obs[1]+1) \
-                or (right_obs_y >= obs[1] and right_obs_y <= obs[1]+1) \
-                or (min(left_obs_y, right_obs_y) <= obs[1] and max(left_obs_y, right_obs_y) >= obs[1]+1):
-                return True
-        return False
+    def are_collisions_with_obstacles(self, starts, ends, batch_size=256):
+        """
+        Batched is_collision_with_obstacles, see collision.segments_collide
+        Argument:
+            starts, ends (array-like): segment end points, shape (B, 2)
+            batch_size (int): segments tested per numpy pass, bounds the memory use
+        Returns:
+            bool array of shape (B,), 'True' where the segment collides
+        """
+        starts = np.asarray(starts, dtype=float).reshape(-1, 2)
+        ends = np.asarray(ends, dtype=float).reshape(-1, 2)
+        self.collision_checks += len(starts)
+        result = np.zeros(len(starts), dtype=bool)
+        for first in range(0, len(starts), batch_size):
+            result[first:first + batch_size] = collision.segments_collide(
+                self.occupancy, starts[first:first + batch_size], ends[first:first + batch_size])
+        return result
     
     def step_from_to(self, node0, node1, limit=3):
         """
@@ -173,29 +192,33 @@ class Grid:
             goal (tuple): new coordinates (x,y)
             step_limit (int): max distance between nodes
         Returns:
-            path (list of tuples): path from start to goal
+            path (list of tuples): path from start to goal, empty if no path was found within 20000 nodes
         """
+        self.rrt_calls += 1
         start_node = Node((start[0], start[1]))
         goal_node = Node((goal[0], goal[1]))
         node_list = [start_node]
+        # nearest neighbour lookup over node_list, cells of 2x2 grid cells
+        node_index = PointIndex(2)
+        node_index.insert(start_node.x, start_node.y, start_node)
         path = None
         while True:
             if len(node_list) > 20000:
-                node_list = [start_node]
-                print("Re-running RRT")
-                break
+                # give up, there is no path to walk back from the goal
+                self.rrt_nodes = len(node_list)
+                self.smoothing_report = None
+                return []
             if random.random() <= 0.25:
                 x, y = goal[0], goal[1]
             else:
                 x, y = self.random_free_place()
             rand_node = Node((x, y))
-            nearest_node_dist = math.inf
+            # closest node with a collision free line to the random node
             nearest_node = None
-            for i, node in enumerate(node_list):
-                if grid_node_distance(node, rand_node) < nearest_node_dist \
-                    and not self.is_collision_with_obstacles(node, rand_node):
-                    nearest_node_dist = grid_node_distance(node, rand_node)
+            for node, _ in node_index.iter_nearest(x, y):
+                if not self.is_collision_with_obstacles(node, rand_node):
                     nearest_node = node
+                    break
             if not nearest_node:
                 continue
             new_node = rand_node
@@ -207,6 +230,7 @@ class Grid:
             
             new_node.parent = nearest_node
             node_list.append(new_node)
+            node_index.insert(new_node.x, new_node.y, new_node)
 
             if grid_node_distance(new_node, goal_node) < 2.5:
                 goal_node.parent = new_node
@@ -220,29 +244,34 @@ class Grid:
             path.append(curr_node)
         path = path[::-1]
 
-        # path smoothing
-        plen = len(path)
-        if plen != 0:
-            #run 100 trials
-            for _ in range(100):
-                #pick two random indices
-                indices= [np.random.randint(0, plen), np.random.randint(0, plen)]
-                indices.sort()
-                
-                #if they are not the same or consecutive
-                if indices[1]-indices[0] > 1:
-                    
-                    p1 = path[indices[0]]
-                    p2 = path[indices[1]]
-                    
-                    #connect the two nodes directly if there is a straight line between them
-                    if not self.is_collision_with_obstacles(p1,p2):
-                        newPath = path[:indices[0]+1] + path[indices[1]:]
-                        path = newPath
-                        plen = len(path)
+        # path smoothing: 100 random shortcut trials, all candidate shortcuts
+        # are checked in one batch up front, see smoothing.py
+        result = smooth_path([node.xy for node in path], self.are_collisions_with_obstacles, 'random', trials=100)
+        path = [path[i] for i in result.indices]
+        self.rrt_nodes = len(node_list)
+        self.smoothing_report = result
         
         return path
     
+    def plan(self, start, goal):
+        """
+        A* on the occupancy grid, a faster and deterministic alternative to rrt, see grid_planner.py
+        Arguments:
+            start (tuple): robot's current coordinates (x,y)
+            goal (tuple): new coordinates (x,y)
+        Returns:
+            path (list of Nodes): shortcut path from start to goal, empty if the goal cell is occupied or unreachable
+        """
+        self.plan_calls += 1
+        cells, self.plan_nodes = grid_planner.astar(self.occupancy, grid_planner.point_cell(start),
+                                                    grid_planner.point_cell(goal))
+        if cells is None:
+            return []
+        points = grid_planner.cell_path_points(start, goal, cells)
+        result = smooth_path(points, self.are_collisions_with_obstacles, 'greedy')
+        self.smoothing_report = result
+        return [Node(points[i]) for i in result.indices]
+
     # parse marker position and orientation
     # input: grid position and orientation char from JSON file
     # output: actual marker position (marker origin) and marker orientation
@@ -0,0 +1,128 @@
+import heapq
+import math
+import numpy as np
+
+""" Shortest paths on the occupancy bitmap of a Grid.
+
+    Cells are nodes, connected to their 8 neighbours: straight steps cost 1 and
+    diagonal steps sqrt(2), and a diagonal step is only allowed when both cells
+    it cuts the corner of are free. Frontier clusters use the same adjacency,
+    see utils.cluster_coordinates and frontier.py.
+    astar finds one path with the octile distance as its heuristic, dijkstra the
+    costs from one cell to many, see reachability.py.
+
+    Cells are (x, y) integer tuples and the bitmap is indexed [x, y], True where
+    occupied; the start cell is expanded even if occupied, so a robot touching an
+    obstacle can still plan away from it.
+"""
+
+SQRT2 = math.sqrt(2)
+STEPS = [(1, 0, 1.), (-1, 0, 1.), (0, 1, 1.), (0, -1, 1.),
+         (1, 1, SQRT2), (1, -1, SQRT2), (-1, 1, SQRT2), (-1, -1, SQRT2)]
+
+
+def octile(a, b):
+    """ Length of the shortest 8-connected path between cells a and b on an empty grid
+    """
+    dx, dy = abs(a[0] - b[0]), abs(a[1] - b[1])
+    return max(dx, dy) + (SQRT2 - 1) * min(dx, dy)
+
+
+def neighbors(occupancy, cell):
+    """ Free neighbours of cell with the step costs, see the module docstring
+    """
+    width, height = occupancy.shape
+    x, y = cell
+    for dx, dy, cost in STEPS:
+        nx, ny = x + dx, y + dy
+        if not (0 <= nx < width and 0 <= ny < height) or occupancy[nx, ny]:
+            continue
+        if dx and dy and (occupancy[x, ny] or occupancy[nx, y]):
+            continue
+        yield (nx, ny), cost
+
+
+def point_cell(point):
+    """ Grid cell containing a point (x, y)
+    """
+    return int(math.floor(point[0])), int(math.floor(point[1]))
+
+
+def astar(occupancy, start, goal):
+    """ Shortest path between two cells
+
+        Arguments:
+        occupancy -- bool array indexed [x, y], True where occupied
+        start, goal -- (x, y) cells
+
+        Returns:
+        (path, expanded) -- list of cells from start to goal, None if goal is occupied or not
+            reachable, and the number of cells expanded
+    """
+    width, height = occupancy.shape
+    if not (0 <= goal[0] < width and 0 <= goal[1] < height) or occupancy[goal]:
+        return None, 0
+    cost = {start: 0.}
+    parent = {start: None}
+    heap = [(octile(start, goal), 0., start)]
+    closed = set()
+    while heap:
+        _, g, cell = heapq.heappop(heap)
+        if cell in closed:
+            continue
+        if cell == goal:
+            path = [cell]
+            while parent[path[-1]] is not None:
+                path.append(parent[path[-1]])
+            return path[::-1], len(closed)
+        closed.add(cell)
+        for next_cell, step in neighbors(occupancy, cell):
+            next_g = g + step
+            if next_g < cost.get(next_cell, math.inf):
+                cost[next_cell] = next_g
+                parent[next_cell] = cell
+                heapq.heappush(heap, (next_g + octile(next_cell, goal), next_g, next_cell))
+    return None, len(closed)
+
+
+def dijkstra(occupancy, start, targets=None):
+    """ Path costs from a cell
+
+        Arguments:
+        occupancy -- bool array indexed [x, y], True where occupied
+        start -- (x, y) cell
+        targets -- cells of interest; the search stops once all of them are settled,
+            and runs over the whole reachable grid if None
+
+        Returns:
+        float array indexed [x, y] of the path costs, inf where unreachable (or not
+        settled before the search stopped)
+    """
+    dist = np.full(occupancy.shape, np.inf)
+    if not (0 <= start[0] < occupancy.shape[0] and 0 <= start[1] < occupancy.shape[1]):
+        return dist
+    remaining = None if targets is None else set(targets)
+    tentative = {start: 0.}
+    heap = [(0., start)]
+    while heap:
+        d, cell = heapq.heappop(heap)
+        if dist[cell] < math.inf:
+            continue
+        dist[cell] = d
+        if remaining is not None:
+            remaining.discard(cell)
+            if not remaining:
+                break
+        for next_cell, step in neighbors(occupancy, cell):
+            if d + step < tentative.get(next_cell, math.inf):
+                tentative[next_cell] = d + step
+                heapq.heappush(heap, (d + step, next_cell))
+    return dist
+
+
+def cell_path_points(start, goal, cells):
+    """ Waypoints of a path of cells from the point start to the point goal (tuples or Nodes): the
+        centres of the cells between the start and goal cells, which are left out
+        since both points already lie in them
+    """
+    return [(start[0], start[1])] + [(x + 0.5, y + 0.5) for x, y in cells[1:-1]] + [(goal[0], goal[1])]
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# nearest neighbour index for RRT trees shared by all labs, see common/point_index.py at the repository root
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../../common'))
+from point_index import PointIndex
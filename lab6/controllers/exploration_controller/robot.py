@@ -2,6 +2,60 @@ import random
 
 from grid import *
 from utils import *
+from visibility import Visibility
+from collision import first_blocked_cell
+
+
+class ExploredCells:
+    """ Set-like view of the grid cells a robot explored, stored as a bitmap indexed [x, y]
+
+        Supports `in`, iteration and len like the set of cells it replaces. The
+        robot's start position counts as explored even when it is not a grid cell.
+    """
+
+    def __init__(self, start):
+        self.start = start
+        # created by the first mark, when the grid size is known
+        self.bitmap = None
+
+    def _cell(self, cell):
+        x, y = cell
+        if x != int(x) or y != int(y):
+            return None
+        x, y = int(x), int(y)
+        if self.bitmap is None or not (0 <= x < self.bitmap.shape[0] and 0 <= y < self.bitmap.shape[1]):
+            return None
+        return x, y
+
+    def mark(self, grid, xs, ys):
+        """ Mark the cells (xs[i], ys[i]) as explored and return a mask of the ones that were not yet
+        """
+        if self.bitmap is None:
+            self.bitmap = np.zeros((grid.width, grid.height), dtype=bool)
+            start = self._cell(self.start)
+            if start is not None:
+                self.bitmap[start] = True
+        new = ~self.bitmap[xs, ys]
+        self.bitmap[xs[new], ys[new]] = True
+        return new
+
+    def __contains__(self, cell):
+        if cell == self.start:
+            return True
+        cell = self._cell(cell)
+        return cell is not None and bool(self.bitmap[cell])
+
+    def __iter__(self):
+        if self._cell(self.start) is None:
+            yield self.start
+        if self.bitmap is not None:
+            xs, ys = np.nonzero(self.bitmap)
+            yield from zip(xs.tolist(), ys.tolist())
+
+    def __len__(self):
+        count = int(self.bitmap.sum()) if self.bitmap is not None else 0
+        return count + (self._cell(self.start) is None)
+
 
 class Robot_Sim(object):
 
@@ -15,7 +69,7 @@ class Robot_Sim(object):
     path = 'rrt path'
 
     # functions members
-    def __init__(self, x, y, heading=None, wheel_dist=0.5, wheel_r = 1):
+    def __init__(self, x, y, heading=None, wheel_dist=0.5, wheel_r = 1, occlusion=True):
         if heading is None:
             heading = random.uniform(0, 360)
         self.__x = x
@@ -26,7 +80,19 @@ class Robot_Sim(object):
         
         self.wheel_r = wheel_r
         # Grid cells already explored by the robot
-        self.explored_cells = {(x, y)}
+        self.explored_cells = ExploredCells((x, y))
+        # the same cells in the order they were first explored, see frontier.FrontierTracker
+        self.explored_order = [(x, y)]
+        # FrontierTracker of exploration.frontier_planning
+        self.frontier = None
+        # how often exploration.frontier_planning ran
+        self.frontier_plans = 0
+        # whether obstacles hide the cells behind them, see visibility.py
+        self.occlusion = occlusion
+        self._visibility = None
+        # cells in FOV at the last pose they were computed for, see _fov
+        self._fov_key = None
+        self._fov_cells = None
 
         self.next_coord = None
         self.path = []
@@ -66,6 +132,92 @@ class Robot_Sim(object):
         return random.uniform(0, 360)
     
 
+    def _fov(self, grid, dist):
+        """ Cells in FOV of the robot as (list of (x, y), x array, y array, set of (x, y)), in x then y order
+
+            The disc of cells is rasterized at once with numpy, cells hidden behind
+            obstacles are dropped if self.occlusion is set, and newly seen cells are
+            marked explored. The result is kept until the robot moves, so the FOV
+            accessors called on every tick share a single raster.
+
+            The disc is not a fixed stencil around the robot's cell: distances are
+            measured from the exact position, so the cells on its rim depend on
+            where in its cell the robot is. A stencil per fractional offset would
+            hardly ever be reused by a continuous pose, so the disc is rasterized
+            for every new position instead; it is only a few hundred cells.
+        """
+        r_x, r_y = self.__x, self.__y
+        key = (r_x, r_y, dist, id(grid))
+        if key == self._fov_key:
+            return self._fov_cells
+
+        xs = np.arange(math.floor(r_x - dist), math.ceil(r_x + dist + 1))
+        ys = np.arange(math.floor(r_y - dist), math.ceil(r_y + dist + 1))
+        x_dis = np.where(xs <= r_x, r_x - xs - 1, r_x - xs)
+        y_dis = np.where(ys <= r_y, r_y - ys - 1, r_y - ys)
+        visible = np.sqrt(x_dis[:, None] ** 2 + y_dis[None, :] ** 2) <= dist
+        visible &= ((xs >= 0) & (xs < grid.width))[:, None] & ((ys >= 0) & (ys < grid.height))[None, :]
+        visible &= (xs != r_x)[:, None] | (ys != r_y)[None, :]
+        i, j = np.nonzero(visible)
+        xs, ys = xs[i], ys[j]
+        if self.occlusion:
+            seen = self._visibility_for(grid, dist).visible((r_x, r_y), xs, ys)
+            xs, ys = xs[seen], ys[seen]
+        cells = list(zip(xs.tolist(), ys.tolist()))
+
+        new = self.explored_cells.mark(grid, xs, ys)
+        self.explored_order.extend(zip(xs[new].tolist(), ys[new].tolist()))
+
+        self._fov_key = key
+        self._fov_cells = (cells, xs, ys, set(cells))
+        return self._fov_cells
+
+    def _visibility_for(self, grid, dist):
+        visibility = self._visibility
+        if visibility is None or visibility.occupancy is not grid.occupancy or visibility.radius < dist + 2:
+            # a cell of the disc is at most dist + 2 cells from the robot's cell
+            visibility = self._visibility = Visibility(grid, dist + 2)
+        return visibility
+
+    def fov_sweep(self, grid, xs, ys, dist=10):
+        """ The FOV of _fov at the positions (xs[k], ys[k]), all in one cell, rasterized together
+
+            Nothing is marked explored, see mark_sweep.
+
+            Returns:
+            (cols, rows, visible) -- visible is a bool array indexed [k, i, j], True where
+                the cell (cols[i], rows[j]) is in FOV from position k
+        """
+        px = np.asarray(xs, dtype=float)[:, None]
+        py = np.asarray(ys, dtype=float)[:, None]
+        cols = np.arange(math.floor(px.min() - dist), math.ceil(px.max() + dist + 1))
+        rows = np.arange(math.floor(py.min() - dist), math.ceil(py.max() + dist + 1))
+        # the window _fov rasterizes at each position, clipped to the grid
+        col_in = (cols >= np.floor(px - dist)) & (cols < np.ceil(px + dist + 1)) & (cols >= 0) & (cols < grid.width)
+        row_in = (rows >= np.floor(py - dist)) & (rows < np.ceil(py + dist + 1)) & (rows >= 0) & (rows < grid.height)
+        x_dis = np.where(cols <= px, px - cols - 1, px - cols)
+        y_dis = np.where(rows <= py, py - rows - 1, py - rows)
+        visible = np.sqrt(x_dis[:, :, None] ** 2 + y_dis[:, None, :] ** 2) <= dist
+        visible &= col_in[:, :, None] & row_in[:, None, :]
+        visible &= (cols != px)[:, :, None] | (rows != py)[:, None, :]
+        if self.occlusion:
+            visible &= self._visibility_for(grid, dist).visible((xs[0], ys[0]), cols[:, None], rows[None, :])
+        return cols, rows, visible
+
+    def mark_sweep(self, grid, sweep, count):
+        """ Mark the cells in FOV from the first count positions of a fov_sweep as explored, in the
+            order get_cells_in_fov at each of the positions in turn would
+        """
+        cols, rows, visible = sweep
+        seen = visible[:count].reshape(count, -1)
+        explored = self.explored_cells.bitmap[np.clip(cols, 0, grid.width - 1)][:, np.clip(rows, 0, grid.height - 1)]
+        new = np.nonzero(seen.any(axis=0) & ~explored.reshape(-1))[0]
+        # by the position a cell is first seen from, then in x then y order like _fov
+        new = new[np.lexsort((new, np.argmax(seen[:, new], axis=0)))]
+        xs, ys = cols[new // len(rows)], rows[new % len(rows)]
+        self.explored_cells.mark(grid, xs, ys)
+        self.explored_order.extend(zip(xs.tolist(), ys.tolist()))
+
     def get_cells_in_fov(self, grid, dist=10):
         """ Get list of grid cells that are in FOV of robot
 
@@ -75,19 +227,7 @@ class Robot_Sim(object):
 
             Return: List of visible grid cells
         """
-        block_list = []
-        r_x, r_y = self.__x, self.__y
-        
-        for x in range(math.floor(r_x - dist), math.ceil(r_x + dist + 1)):
-                for y in range(math.floor(r_y - dist), math.ceil(r_y + dist + 1)):
-                    x_dis = r_x - x - 1 if x <= r_x else r_x - x
-                    y_dis = r_y - y - 1 if y <= r_y else r_y - y
-                    if math.sqrt(x_dis**2 + y_dis**2) > dist:
-                        continue
-                    if grid.is_in(x, y) and (x != self.__x or y != self.__y):
-                        block_list.append((x, y))
-                        self.explored_cells.add((x, y))
-        return block_list
+        return list(self._fov(grid, dist)[0])
 
 
     def get_obstacles_in_fov(self, grid, dist=10):
@@ -99,12 +239,9 @@ class Robot_Sim(object):
 
             Return: List of visible cells occupied by obstacles
         """
-        obstacle_list = []
-        visible_grid_cells = self.get_cells_in_fov(grid, dist)
-        for (x, y) in visible_grid_cells:
-            if grid.is_in(x, y) and grid.is_occupied(x, y):
-                obstacle_list.append((x, y))
-        return obstacle_list
+        _, xs, ys, _ = self._fov(grid, dist)
+        occupied = grid.occupancy[xs, ys]
+        return list(zip(xs[occupied].tolist(), ys[occupied].tolist()))
     
 
     def get_free_cells_in_fov(self, grid, dist=10):
@@ -116,15 +253,9 @@ class Robot_Sim(object):
 
             Return: List of visible cells that are free
         """
-        free_cells = []
-        obstacle_list = self.get_obstacles_in_fov(grid, dist)
-        visible_grid_cells = self.get_cells_in_fov(grid, dist)
-
-        for (x, y) in visible_grid_cells:
-            if (x, y) in obstacle_list:
-                continue
-            free_cells.append((x, y))
-        return free_cells
+        _, xs, ys, _ = self._fov(grid, dist)
+        free = ~grid.occupancy[xs, ys]
+        return list(zip(xs[free].tolist(), ys[free].tolist()))
     
 
     def read_marker_around(self, grid, dis=10):
@@ -137,13 +268,45 @@ class Robot_Sim(object):
         Return: List of markers around
         """
         marker_list = []
-        free_block = set(self.get_cells_in_fov(grid, dis))
+        free_block = self._fov(grid, dis)[3]
         for marker in grid.markers:
             m_x, m_y, m_h = marker
             if (m_x, m_y) in free_block:
                 marker_list.append((m_x, m_y, m_h))
         return marker_list
 
+    def heading_step(self, vl, vr, dt):
+        """ Heading change in degrees of one move_diff_drive step
+        """
+        w = (vr-vl) * self.wheel_r/self.wheel_dist
+        return math.degrees(w)*dt
+
+    def step_offset(self, vl, vr, dt, heading):
+        """ Position change (dx, dy) of one move_diff_drive step that ends with the given heading
+        """
+        v = (vl+vr) * self.wheel_r/2
+        h_rad = math.radians(heading)
+        return v * math.cos(h_rad) * dt, v * math.sin(h_rad) * dt
+
+    def turn_in_place(self, vl, vr, dt, ticks=1):
+        """ The heading update of move_diff_drive, ticks times; with vl + vr == 0 the robot
+            does not move and sees the same cells as before
+
+            The heading is summed one step at a time, so it is exactly the heading of
+            ticks steps of move_diff_drive.
+
+            No return
+        """
+        step = self.heading_step(vl, vr, dt)
+        for _ in range(ticks):
+            self.__h += step
+
+    def place(self, x, y, h):
+        """ Put the robot at a pose without checking the motion or sensing, for fast_forward.py,
+            which checks and senses the steps it takes itself
+        """
+        self.__x, self.__y, self.__h = x, y, h
+
     def move_diff_drive(self, grid, vl, vr, dt):
         """ Move the robot with a steering angle and diff drive forward.
             Note that the distance between the wheels is 0.5
@@ -154,28 +317,13 @@ class Robot_Sim(object):
 
             No return
         """
-        v = (vl+vr) * self.wheel_r/2
-        w = (vr-vl) * self.wheel_r/self.wheel_dist
-        self.__h += math.degrees(w)*dt
-        
-        h_rad = math.radians(self.__h)
-        dx = v * math.cos(h_rad) * dt
-        dy = v * math.sin(h_rad) * dt
-
-        # Check if theres a collision along path
-        m, c = find_line((self.__x, self.__y), (self.__x+dx, self.__y+dy))
-        if m == math.inf:
-            m,c = find_line((self.__x+0.01, self.__y), (self.__x+dx, self.__y+dy))
-
-        x_range = [self.__x + .1 * i for i in range(1, math.floor(dx / .1))]
-        x_range = [self.__x] + x_range + [self.__x+dx]
-        # print("x_range: ", x_range)
-        for xi in x_range:
-            yi = m * xi + c
-            yi = max(yi, 0)
-            xi = max(xi, 0)
-            if not grid.is_free(math.floor(xi), math.floor(yi)):
-                raise Exception(f"grid ({math.floor(xi)}, {math.floor(yi)}) isn't free error")
+        self.turn_in_place(vl, vr, dt)
+        dx, dy = self.step_offset(vl, vr, dt, self.__h)
+
+        # Check if theres a collision along path: every cell the motion passes through must be free
+        blocked = first_blocked_cell(grid.occupancy, (self.__x, self.__y), (self.__x+dx, self.__y+dy))
+        if blocked is not None:
+            raise Exception(f"grid ({blocked[0]}, {blocked[1]}) isn't free error")
         self.__x += dx
         self.__y += dy
         
@@ -42,11 +42,14 @@ class RobotEnv:
             # read markers around
             marker_list = self.robbie.read_marker_around(self.grid)
 
-            #update markers found        
-            if len(self.robbie.markers_found_or_picked) != len(set(self.robbie.markers_found_or_picked).union(set(marker_list))):
-                self.robbie.markers_found_or_picked = list(set(self.robbie.markers_found_or_picked).union(set(marker_list)))
-                fname = self.grid.fname
-                print(f'{fname} found {len(self.robbie.markers_found_or_picked)}/{self.grid.LANDMARKS_TOTAL} markers')          
+            self.record_markers(marker_list)
+
+    def record_markers(self, marker_list):
+        #update markers found        
+        if len(self.robbie.markers_found_or_picked) != len(set(self.robbie.markers_found_or_picked).union(set(marker_list))):
+            self.robbie.markers_found_or_picked = list(set(self.robbie.markers_found_or_picked).union(set(marker_list)))
+            fname = self.grid.fname
+            print(f'{fname} found {len(self.robbie.markers_found_or_picked)}/{self.grid.LANDMARKS_TOTAL} markers')          
 
 # thread to run robot environment when GUI is on
 class RobotEnvThread(threading.Thread):
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# path shortcutting and corner cutting shared by all labs, see common/path_smoothing.py at the repository root
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../../common'))
+from path_smoothing import SHORTCUT_MODES, SmoothedPath, path_length, smooth_path
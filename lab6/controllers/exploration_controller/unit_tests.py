@@ -0,0 +1,172 @@
+import unittest
+import math
+import random
+import numpy as np
+from grid import Grid
+from collision import segment_collides, segments_collide, first_blocked_cell
+from frontier import FrontierTracker
+from utils import cluster_coordinates, find_centroid
+
+
+def meets_square(p1, p2, cx, cy):
+    """ Brute force: whether the segment p1 p2 has a point in the closed square of cell (cx, cy)
+    """
+    lo, hi = 0., 1.
+    for a, d, c in ((p1[0], p2[0] - p1[0], cx), (p1[1], p2[1] - p1[1], cy)):
+        if d == 0:
+            if not c <= a <= c + 1:
+                return False
+        else:
+            t0, t1 = sorted(((c - a) / d, (c + 1 - a) / d))
+            lo, hi = max(lo, t0), min(hi, t1)
+    return lo <= hi
+
+
+def brute_collides(occupancy, p1, p2):
+    xs, ys = np.nonzero(occupancy)
+    return any(meets_square(p1, p2, x, y) for x, y in zip(xs.tolist(), ys.tolist()))
+
+
+def brute_first_blocked(occupancy, p1, p2):
+    """ Brute force: walk every cell of the segment's bounding box, a point being in the cell it floors to
+    """
+    width, height = occupancy.shape
+    (x1, y1), (x2, y2) = p1, p2
+    entered = []
+    for cx in range(math.floor(min(x1, x2)), math.floor(max(x1, x2)) + 1):
+        for cy in range(math.floor(min(y1, y2)), math.floor(max(y1, y2)) + 1):
+            lo, hi = 0., 1.
+            for a, d, c in ((x1, x2 - x1, cx), (y1, y2 - y1, cy)):
+                if d == 0:
+                    if not c <= a < c + 1:
+                        lo, hi = 1., 0.
+                else:
+                    t0, t1 = sorted(((c - a) / d, (c + 1 - a) / d))
+                    lo, hi = max(lo, t0), min(hi, t1)
+            if lo < hi or (lo == hi and (math.floor(x1 + lo * (x2 - x1)), math.floor(y1 + lo * (y2 - y1))) == (cx, cy)):
+                blocked = not (0 <= cx < width and 0 <= cy < height) or occupancy[cx, cy]
+                if blocked:
+                    entered.append((lo, (cx, cy)))
+    return min(entered)[1] if entered else None
+
+
+def reference_clusters(cells, is_free):
+    """ Breadth first clustering: 8 neighbours, both cells free and no diagonal step past an obstacle
+    """
+    cells = set(cells)
+    clusters, seen = [], set()
+    for start in sorted(cells):
+        if start in seen:
+            continue
+        seen.add(start)
+        cluster, queue = [start], [start]
+        while queue:
+            x, y = queue.pop()
+            if not is_free(x, y):
+                continue
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    cell = (x + dx, y + dy)
+                    if cell in cells and cell not in seen and is_free(*cell) \
+                            and is_free(x, y + dy) and is_free(x + dx, y):
+                        seen.add(cell)
+                        cluster.append(cell)
+                        queue.append(cell)
+        clusters.append(frozenset(cluster))
+    return set(clusters)
+
+
+class TestCollision(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.occupancy = rng.rand(20, 15) < 0.2
+        self.segments = [(tuple(rng.uniform(-2, 22, 2)), tuple(rng.uniform(-2, 22, 2))) for _ in range(500)]
+        # vertical, horizontal, zero length and along the grid edges
+        self.special = [((3.5, 1.2), (3.5, 9.7)), ((0., 0.), (0., 14.)), ((20., 2.), (20., 8.)),
+                        ((1.2, 0.), (17.3, 0.)), ((2.3, 15.), (2.3, 15.)), ((4.5, 4.5), (4.5, 4.5)),
+                        ((-1., 3.), (21., 3.)), ((5., 5.), (6., 6.)), ((0., 7.), (-1.5, 7.))]
+
+    def test_batch_matches_scalar(self):
+        segments = self.segments + self.special
+        starts, ends = [s for s, _ in segments], [e for _, e in segments]
+        batch = segments_collide(self.occupancy, starts, ends)
+        self.assertEqual(batch.tolist(), [segment_collides(self.occupancy, s, e) for s, e in segments])
+
+    def test_segment_collides_brute_force(self):
+        for p1, p2 in self.segments + self.special:
+            self.assertEqual(segment_collides(self.occupancy, p1, p2), brute_collides(self.occupancy, p1, p2),
+                             (p1, p2))
+
+    def test_special_segments(self):
+        occupancy = np.zeros((4, 4), dtype=bool)
+        occupancy[1, 1] = True
+        # touching the square counts, from any side
+        self.assertTrue(segment_collides(occupancy, (2., 0.), (2., 4.)))
+        self.assertFalse(segment_collides(occupancy, (0.5, 2.5), (0.5, 2.5)))
+        self.assertTrue(segment_collides(occupancy, (1.5, 1.5), (1.5, 1.5)))
+        self.assertTrue(segment_collides(occupancy, (0., 0.), (1., 1.)))
+        self.assertFalse(segment_collides(occupancy, (3.5, 0.), (3.5, 4.)))
+        # outside the grid is free for segment tests and blocked for motion
+        self.assertFalse(segment_collides(occupancy, (-2., 3.5), (6., 3.5)))
+        self.assertEqual(first_blocked_cell(occupancy, (3.5, 3.5), (4.5, 3.5)), (4, 3))
+        self.assertEqual(first_blocked_cell(occupancy, (0.5, 1.5), (3.5, 1.5)), (1, 1))
+        self.assertIsNone(first_blocked_cell(occupancy, (2.5, 2.5), (2.5, 2.5)))
+
+    def test_first_blocked_cell_brute_force(self):
+        for p1, p2 in self.segments + self.special:
+            self.assertEqual(first_blocked_cell(self.occupancy, p1, p2), brute_first_blocked(self.occupancy, p1, p2),
+                             (p1, p2))
+
+
+class TestClustering(unittest.TestCase):
+    def setUp(self):
+        self.grid = Grid('maze1.json')
+
+    def test_cluster_coordinates(self):
+        rng = random.Random(0)
+        for _ in range(20):
+            cells = [(rng.randrange(self.grid.width), rng.randrange(self.grid.height)) for _ in range(400)]
+            clusters, sizes, centroids = cluster_coordinates(cells, self.grid)
+            self.assertEqual(set(frozenset(cluster) for cluster in clusters),
+                             reference_clusters(cells, self.grid.is_free))
+            self.assertEqual(sizes, [len(cluster) for cluster in clusters])
+            self.assertEqual(centroids, [find_centroid(cluster) for cluster in clusters])
+            self.assertEqual([cluster[0] for cluster in clusters],
+                             sorted((cluster[0] for cluster in clusters), key=cells.index))
+
+    def test_frontier_tracker_matches_rescan(self):
+        grid = self.grid
+        tracker = FrontierTracker(grid)
+        rng = random.Random(1)
+        explored = np.zeros((grid.width, grid.height), dtype=bool)
+        for _ in range(6):
+            cx, cy = rng.randrange(grid.width), rng.randrange(grid.height)
+            cells = [(x, y) for x in range(cx - 6, cx + 7) for y in range(cy - 6, cy + 7)
+                     if 0 <= x < grid.width and 0 <= y < grid.height and rng.random() < 0.8]
+            tracker.update(cells)
+            for cell in cells:
+                explored[cell] = True
+
+            free = ~grid.occupancy
+            frontier = []
+            for x in range(grid.width):
+                for y in range(grid.height):
+                    if free[x, y] and not explored[x, y] and any(
+                            0 <= x + dx < grid.width and 0 <= y + dy < grid.height
+                            and free[x + dx, y + dy] and explored[x + dx, y + dy]
+                            for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1))):
+                        frontier.append((x, y))
+            self.assertEqual(tracker.frontier_cells(), frontier)
+            clusters = reference_clusters(frontier, grid.is_free)
+            self.assertEqual(set(frozenset(cluster) for cluster in tracker.clusters.values()), clusters)
+            for label, cluster in tracker.clusters.items():
+                self.assertEqual(tracker.first[label], min(cluster))
+                centroid = tracker.centroids[label]
+                expected = find_centroid(sorted(cluster))
+                self.assertAlmostEqual(centroid[0], expected[0])
+                self.assertAlmostEqual(centroid[1], expected[1])
+                self.assertTrue(all(tracker.label[cell] == label for cell in cluster))
+
+
+if __name__ == '__main__':
+    unittest.main()
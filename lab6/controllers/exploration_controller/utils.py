@@ -1,6 +1,7 @@
 import random
 import math
 import numpy as np
+import grid_planner
 
 # Node object for RRT
 class Node(object):
@@ -88,26 +89,55 @@ def find_centroid(points):
 
 def separate_adjacent_coordinates(coordinates , grid):
     """
-    Separates out a list of cells into a list of frontiers
+    Separates out a list of cells into a list of frontiers, see cluster_coordinates
     """
-    def is_adjacent(coord1, coord2, grid):
-        x1, y1 = coord1
-        x2, y2 = coord2
-        flag = grid.is_free(x1,y2) and grid.is_free(x2,y1)
-        return (abs(x1 - x2) <= 1) and (abs(y1 - y2) <= 1) and flag
-
-    def dfs(coord, grid):
-        visited.add(coord)
-        component.append(coord)
-        for neighbor in [c for c in coordinates if c not in visited and is_adjacent(coord, c, grid)]:
-            dfs(neighbor,grid)
-
-    visited = set()
-    components = []
-    for coord in coordinates:
-        if coord not in visited:
-            component = []
-            dfs(coord, grid)
-            components.append(component)
-
-    return components
\ No newline at end of file
+    clusters, _, _ = cluster_coordinates(coordinates, grid)
+    return clusters
+
+
+def cluster_coordinates(coordinates, grid):
+    """
+    Connected components of a list of cells. Two free cells are adjacent if
+    grid_planner.neighbors connects them: they are among each other's 8
+    neighbours and no diagonal step between them cuts past an obstacle. Cells
+    that are not free are clusters of their own.
+
+    Union-find over the cells, near linear in their number and without recursion.
+    Clusters come in the order of their first cell in coordinates, every cell once,
+    and keep the order of coordinates within.
+
+    Returns:
+        clusters (list of lists of cells), sizes (list of int), centroids (list of (x, y))
+    """
+    cells = list(dict.fromkeys((coord[0], coord[1]) for coord in coordinates))
+    index = {cell: i for i, cell in enumerate(cells)}
+    parent = list(range(len(cells)))
+    size = [1] * len(cells)
+
+    def find(i):
+        root = i
+        while parent[root] != root:
+            root = parent[root]
+        while parent[i] != root:
+            parent[i], i = root, parent[i]
+        return root
+
+    for i, (x, y) in enumerate(cells):
+        if not grid.is_free(x, y):
+            continue
+        for next_cell, _ in grid_planner.neighbors(grid.occupancy, (x, y)):
+            j = index.get(next_cell)
+            if j is None:
+                continue
+            a, b = find(i), find(j)
+            if a != b:
+                if size[a] < size[b]:
+                    a, b = b, a
+                parent[b] = a
+                size[a] += size[b]
+
+    components = {}
+    for i, cell in enumerate(cells):
+        components.setdefault(find(i), []).append(cell)
+    clusters = list(components.values())
+    return clusters, [len(cluster) for cluster in clusters], [find_centroid(cluster) for cluster in clusters]
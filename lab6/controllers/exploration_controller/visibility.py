@@ -0,0 +1,118 @@
+import functools
+import math
+import numpy as np
+
+""" Occlusion aware visibility on the occupancy bitmap of a Grid.
+
+    A cell is visible from the robot's cell if the Bresenham line between the two
+    cells crosses no occupied cell on the way; the first obstacle on a line is
+    visible itself, what lies behind it is not. Lines only depend on the offset
+    between the cells, so they are traced once per radius (ray_stencil) and the
+    visible cells from a cell are then one vectorized lookup of the bitmap, kept
+    per cell since the map does not change. Only the square window of the
+    radius around a cell is kept, not a bitmap of the whole map.
+"""
+
+
+def bresenham(dx, dy):
+    """ Cells strictly between (0, 0) and (dx, dy) on the Bresenham line, in order
+    """
+    cells = []
+    x, y = 0, 0
+    step_x, step_y = (1 if dx > 0 else -1), (1 if dy > 0 else -1)
+    adx, ady = abs(dx), abs(dy)
+    err = adx - ady
+    while (x, y) != (dx, dy):
+        e2 = 2 * err
+        if e2 > -ady:
+            err -= ady
+            x += step_x
+        if e2 < adx:
+            err += adx
+            y += step_y
+        if (x, y) != (dx, dy):
+            cells.append((x, y))
+    return cells
+
+
+@functools.lru_cache(maxsize=None)
+def ray_stencil(radius):
+    """ Lines from (0, 0) to every offset within radius
+
+        Returns:
+        (offsets, rays, valid) -- offsets is a (K, 2) int array of target offsets, rays a (K, L, 2) int
+            array of the cells between (0, 0) and each target padded with (0, 0), valid a (K, L)
+            bool array of the entries that are not padding
+    """
+    r = int(math.ceil(radius))
+    offsets = [(dx, dy) for dx in range(-r, r + 1) for dy in range(-r, r + 1)
+               if (dx, dy) != (0, 0) and dx * dx + dy * dy <= radius * radius]
+    lines = [bresenham(dx, dy) for dx, dy in offsets]
+    length = max(len(line) for line in lines)
+    rays = np.zeros((len(offsets), length, 2), dtype=int)
+    valid = np.zeros((len(offsets), length), dtype=bool)
+    for k, line in enumerate(lines):
+        if line:
+            rays[k, :len(line)] = line
+            valid[k, :len(line)] = True
+    return np.array(offsets, dtype=int), rays, valid
+
+
+class Visibility:
+    """ Cells visible from the cells of a grid, computed on demand and cached per cell
+
+        Arguments:
+        grid -- a Grid, its occupancy bitmap is read once
+        radius -- how far to look, in cells; should cover the FOV from anywhere in a cell
+    """
+
+    def __init__(self, grid, radius):
+        self.occupancy = grid.occupancy
+        self.width, self.height = grid.width, grid.height
+        self.radius = radius
+        # half width of the windows kept per cell
+        self.reach = int(math.ceil(radius))
+        self._cache = {}
+
+    def window(self, cell):
+        """ Bitmap of the cells visible from cell, cell itself included, indexed [i, j] for the
+            cell (x - reach + i, y - reach + j) around the cell (x, y) that cell is in
+        """
+        cell = (int(math.floor(cell[0])), int(math.floor(cell[1])))
+        window = self._cache.get(cell)
+        if window is None:
+            window = self._cache[cell] = self._compute(cell)
+        return window
+
+    def visible(self, cell, xs, ys):
+        """ Whether the cells (xs, ys) are visible from cell, for int arrays xs and ys of
+            broadcastable shapes
+        """
+        window = self.window(cell)
+        i = np.asarray(xs) - (int(math.floor(cell[0])) - self.reach)
+        j = np.asarray(ys) - (int(math.floor(cell[1])) - self.reach)
+        i, j = np.broadcast_arrays(i, j)
+        size = 2 * self.reach + 1
+        inside = (i >= 0) & (i < size) & (j >= 0) & (j < size)
+        result = np.zeros(i.shape, dtype=bool)
+        result[inside] = window[i[inside], j[inside]]
+        return result
+
+    def _compute(self, cell):
+        offsets, rays, valid = ray_stencil(self.radius)
+        cx, cy = cell
+        r = self.reach
+        window = np.zeros((2 * r + 1, 2 * r + 1), dtype=bool)
+        if 0 <= cx < self.width and 0 <= cy < self.height:
+            window[r, r] = True
+        tx, ty = cx + offsets[:, 0], cy + offsets[:, 1]
+        inside = (tx >= 0) & (tx < self.width) & (ty >= 0) & (ty < self.height)
+        # cells between the robot and an inside target may still leave the grid
+        # when the robot itself is outside, those do not block
+        rx, ry = cx + rays[..., 0], cy + rays[..., 1]
+        ray_inside = valid & (rx >= 0) & (rx < self.width) & (ry >= 0) & (ry < self.height)
+        blocked = np.zeros(valid.shape, dtype=bool)
+        blocked[ray_inside] = self.occupancy[rx[ray_inside], ry[ray_inside]]
+        seen = inside & ~blocked.any(axis=1)
+        window[offsets[seen, 0] + r, offsets[seen, 1] + r] = True
+        return window